@@ -0,0 +1,65 @@
+# app/api/admin.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query # type: ignore
+from fastapi.responses import FileResponse # type: ignore
+from pydantic_settings import BaseSettings # type: ignore
+
+from ..diagnostics import clear_diagnostics, get_diagnostics
+from ..profiling import PROFILE_FORMATS, get_profile_path, list_profiles
+
+# 管理用エンドポイントの設定 (環境変数で上書き可能)
+class AdminSettings(BaseSettings):
+    # 💡 未設定の場合、管理用エンドポイントは無効（404）になる
+    admin_token: Optional[str] = None
+
+admin_settings = AdminSettings()
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """X-Admin-Token ヘッダーが ADMIN_TOKEN と一致するリクエストだけを通す"""
+    if not admin_settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token != admin_settings.admin_token:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+# ----------------------------------------------------
+# 💡 SQLの診断（スロークエリ・N+1）
+# ----------------------------------------------------
+
+@router.get("/diagnostics")
+def read_diagnostics():
+    """記録済みのスロークエリ（EXPLAIN付き）と N+1 の疑いがあるリクエストを新しい順に返す"""
+    return get_diagnostics()
+
+@router.delete("/diagnostics", status_code=204)
+def delete_diagnostics():
+    """診断の記録を消去する"""
+    clear_diagnostics()
+
+# ----------------------------------------------------
+# 💡 リクエストのプロファイル
+# ----------------------------------------------------
+
+@router.get("/profiles")
+def read_profiles(limit: int = Query(50, ge=1, le=500)):
+    """保存済みプロファイルのメタデータ（ルート・所要時間・サンプル数・SQL発行数）を新しい順に返す"""
+    return {"profiles": list_profiles(limit)}
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = Query("speedscope", description=f"ファイル形式: {', '.join(PROFILE_FORMATS)}")
+):
+    """プロファイルをダウンロードする（speedscope.app で開くか、collapsed を flamegraph.pl に渡す）"""
+    found = get_profile_path(profile_id, format)
+    if not found:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    path, media_type = found
+    return FileResponse(path, media_type=media_type, filename=path.name)
@@ -0,0 +1,52 @@
+# app/api/analytics.py
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import get_db
+from ..schemas.analytics import ProjectTimeComparison, TimeBreakdown
+from ..services.rollups import default_month_range, get_project_time_comparison, get_time_breakdown
+from ..profiling import ProfiledRoute
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    route_class=ProfiledRoute
+)
+
+def resolve_range(date_from: Optional[date], date_to: Optional[date]):
+    """省略時は今月（初日から翌月の初日まで）"""
+    default_from, default_to = default_month_range()
+    date_from, date_to = date_from or default_from, date_to or default_to
+    if date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be earlier than date_to")
+    return date_from, date_to
+
+# --- 計測時間の内訳（どこに時間を使ったか）---
+@router.get("/time", response_model=TimeBreakdown)
+def read_time_breakdown(
+    date_from: Optional[date] = Query(None, description="この日以降（省略時は今月の初日）"),
+    date_to: Optional[date] = Query(None, description="この日より前（省略時は翌月の初日）"),
+    db: Session = Depends(get_db)
+):
+    """
+    期間内の計測時間を、合計・日別・カテゴリ別・タスクテンプレート別に返す。
+    集計済みのロールアップ（t_time_rollup_daily）だけを読むため、タイマーログの件数に関わらず高速に応答する。
+    """
+    date_from, date_to = resolve_range(date_from, date_to)
+    return get_time_breakdown(db, date_from, date_to)
+
+# --- プロジェクトごとの見積/実績 ---
+@router.get("/projects", response_model=List[ProjectTimeComparison])
+def read_project_time_comparison(
+    date_from: Optional[date] = Query(None, description="この日以降に作成されたプロジェクト（省略時は今月の初日）"),
+    date_to: Optional[date] = Query(None, description="この日より前に作成されたプロジェクト（省略時は翌月の初日）"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """期間内に作成されたプロジェクトの見積/実績時間の合計を新しい順に返す（t_time_rollup_project を読む）"""
+    date_from, date_to = resolve_range(date_from, date_to)
+    return get_project_time_comparison(db, date_from, date_to, limit)
@@ -0,0 +1,60 @@
+# app/api/channel.py
+
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import get_db
+from ..schemas.channel import ChannelGrowthIngestResult, ChannelGrowthSeries
+from ..services.channel_growth import get_growth_series, parse_growth_payload, upsert_channel_growth
+from ..profiling import ProfiledRoute
+
+router = APIRouter(
+    prefix="/channel",
+    tags=["Channel"],
+    route_class=ProfiledRoute
+)
+
+# --- 成長指標の一括取り込み（CSV / JSON）---
+@router.post("/growth", response_model=ChannelGrowthIngestResult)
+async def ingest_channel_growth(request: Request, db: Session = Depends(get_db)):
+    """
+    YouTube Studio などから書き出した期間ごとの指標をまとめて取り込む。
+    Content-Type が text/csv ならヘッダー行付きのCSV、それ以外は JSON（行の配列か {"rows": [...]}）として読む。
+    同じ期間（start_date, end_date）の行は上書きする。1行でも不正なら何も取り込まずに 400 を返す。
+    """
+    body = await request.body()
+    # CSV / JSON の検証と同期セッションでの書き込みはスレッドプールで行い、イベントループを止めない
+    try:
+        return await run_in_threadpool(_ingest_growth, db, body, request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _ingest_growth(db: Session, body: bytes, content_type: str) -> ChannelGrowthIngestResult:
+    rows = parse_growth_payload(body, content_type)
+    inserted, updated = upsert_channel_growth(db, rows)
+    db.commit()
+    return ChannelGrowthIngestResult(received=len(rows), inserted=inserted, updated=updated)
+
+# --- 成長指標の時系列（移動平均・前の区間との差・期間比較）---
+@router.get("/growth", response_model=ChannelGrowthSeries)
+def read_channel_growth(
+    date_from: Optional[date] = Query(None, description="この日以降に始まる期間（省略時は90日前。bucket の区間の初日にそろえる）"),
+    date_to: Optional[date] = Query(None, description="この日より前に始まる期間（省略時は明日）"),
+    bucket: str = Query("day", pattern="^(day|week|month)$", description="集計の単位"),
+    window: int = Query(7, ge=1, le=365, description="移動平均に使う区間の数（当区間を含む）"),
+    db: Session = Depends(get_db)
+):
+    """
+    期間内の指標を bucket ごとに集計し、移動平均・1つ前の区間との差、
+    期間全体と同じ長さの直前の期間との比較を返す（CTR はインプレッション数で重み付け）。
+    """
+    date_to = date_to or date.today() + timedelta(days=1)
+    date_from = date_from or date_to - timedelta(days=90)
+    try:
+        return get_growth_series(db, date_from, date_to, bucket, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,38 @@
+# app/api/dashboard.py
+
+from fastapi import APIRouter, Depends, Query, Response # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from ..database import get_db
+from ..schemas.dashboard import Dashboard
+from ..services.dashboard import get_dashboard, dashboard_cache
+from .responses import response_settings, dumps
+from ..profiling import ProfiledRoute
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"],
+    route_class=ProfiledRoute # 計測中のリクエストでエンドポイントのスレッドを採取対象にする
+)
+
+# --- ダッシュボード集計エンドポイント ---
+@router.get("/", response_model=Dashboard)
+def read_dashboard(
+    limit: int = Query(50, ge=1, le=500, description="表示するプロジェクト数"),
+    include_completed: bool = Query(False, description="完了済みプロジェクトも含めるか"),
+    db: Session = Depends(get_db)
+):
+    """
+    ホーム画面用に、プロジェクトごとのステータス・進捗・見積/実績時間・計測中タイマー・
+    AI生成物の有無を1回の集計クエリで返す。結果は短時間キャッシュされる。
+    """
+    cache_key = (limit, include_completed)
+    body = dashboard_cache.get(cache_key)
+    if body is None:
+        document = get_dashboard(db, limit, include_completed)
+        if response_settings.fast_json:
+            body = dumps(document)
+        else:
+            body = Dashboard.model_validate(document).model_dump_json().encode()
+        dashboard_cache.put(cache_key, body)
+
+    return Response(content=body, media_type="application/json")
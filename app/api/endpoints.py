@@ -1,11 +1,15 @@
 # app/api/endpoints.py
 
+import asyncio
+import logging
 from typing import Optional, List, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query # type: ignore
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response, WebSocket, WebSocketDisconnect # type: ignore
+from fastapi.responses import JSONResponse # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
 from sqlalchemy.orm import Session # type: ignore
-from ..database import get_db
-from ..schemas.project import Project, ProjectCreate, TimerStart, TimerStop, ProjectTask, TaskTemplate, TaskTemplateCreate
-from ..schemas.ai import TalkScaffold, ProjectSummary
+from ..database import get_db, SessionLocal
+from ..schemas.project import Project, ProjectCreate, TimerStart, TimerStop, ProjectTask, TaskTemplate, TaskTemplateCreate, TimerEventBatch, TimerEventAck, ProjectView, TaskEstimate
+from ..schemas.ai import TalkScaffold, ProjectSummary, ScaffoldPatchOperation, DiscussionQuestionPatch, QuestionRegenerateRequest, ScaffoldPatchResult
 # from ..services.project import create_initial_project, get_project_by_id, check_and_transition_status, start_timer, stop_timer, complete_task, create_task_template, get_all_task_templates, update_task_template, delete_task_template
 from ..services.project_main import (
     create_initial_project, 
@@ -21,39 +25,158 @@ from ..services.task import (
     delete_task_template
 )
 from ..services.timer import start_timer, stop_timer
-from ..services.ai_generator import generate_talk_scaffold, update_scaffold_in_project, generate_thumbnail_concept, update_thumbnail_in_project, generate_project_summary, update_summary_in_project
+from ..services.estimate import list_estimates, record_task_actuals
+from ..services.timer_events import timer_event_buffer
+from ..services.events import publish_project_event, get_project_live_snapshot, project_event_hub
+from ..services.project_cache import get_project_version, make_project_etag, etag_matches, project_response_cache
+from ..services.project_read import load_project_document, load_project_tasks, load_project_view, parse_project_view
+from ..services.idempotency import run_idempotent, request_fingerprint
+from ..services.scaffold_patch import PatchConflictError, VersionConflictError, parse_if_match, patch_scaffold, question_operations
+from .responses import response_settings, dumps
+from ..profiling import ProfiledRoute
+from ..services.ai_generator import generate_talk_scaffold, generate_discussion_question, update_scaffold_in_project, generate_thumbnail_concept, update_thumbnail_in_project, generate_project_summary, update_summary_in_project
 from ..models.project import DBProject, DBProjectTask
 from ..models.master import DBTaskTemplate # task_id の検証のため
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/projects",
-    tags=["Projects"]
+    tags=["Projects"],
+    route_class=ProfiledRoute # 計測中のリクエストでエンドポイントのスレッドを採取対象にする
 )
 
+# --- 冪等キー付きレスポンスの組み立て ---
+def idempotent_response(status_code: int, body: Any, replayed: bool) -> JSONResponse:
+    """保存済みレスポンスの再送であることを Idempotent-Replayed ヘッダーで示す"""
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(content=body, status_code=status_code, headers=headers)
+
 # --- プロジェクト作成エンドポイント ---
 @router.post("/", response_model=Project)
 def create_project(
     project: ProjectCreate, 
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db)
 ):
-    """新しいプロジェクトを作成し、初期サブタスクを生成する"""
+    """
+    新しいプロジェクトを作成し、初期サブタスクを生成する。
+    Idempotency-Key ヘッダー付きで再送された場合は、プロジェクトを重複作成せず最初のレスポンスを返す。
+    """
     # 実際はここで入力angle_idのバリデーションが必要です
     
-    db_project = create_initial_project(db, project)
-    return db_project
+    def work():
+        db_project = create_initial_project(db, project)
+        return status.HTTP_200_OK, Project.model_validate(db_project).model_dump(mode="json")
+
+    return idempotent_response(*run_idempotent(
+        idempotency_key, request_fingerprint("POST", "/projects/", project.model_dump(mode="json")), work
+    ))
 
 # --- プロジェクト詳細取得エンドポイント (動作確認用) ---
 @router.get("/{project_id}", response_model=Project)
 def read_project(
     project_id: int, 
+    request: Request,
+    fields: Optional[str] = Query(None, description="返すスカラー列のカンマ区切り (例: current_status_id,progress_rate)"),
+    include: Optional[str] = Query(None, description="追加で返す項目のカンマ区切り (tasks, scaffold, thumbnail, summary, timers)"),
     db: Session = Depends(get_db)
 ):
-    """プロジェクトIDでプロジェクト詳細を取得する"""
-    project = get_project_by_id(db, project_id)
-    if not project:
+    """
+    プロジェクトIDでプロジェクト詳細を取得する。
+    fields / include を指定すると、要求された列・項目だけをDBから読み込んで返す（未指定時は従来どおりの完全なレスポンス）。
+    バージョンから作ったETagが If-None-Match と一致すれば 304 を返し、
+    一致しなくても同じバージョンのレスポンスはキャッシュ済みのバイト列を返す。
+    """
+    try:
+        view = parse_project_view(fields, include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    variant = view.key if view else ""
+
+    version = get_project_version(db, project_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+
+    headers = {"ETag": make_project_etag(project_id, version, variant), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = project_response_cache.get((project_id, version, variant))
+    if body is None:
+        passthrough = response_settings.fast_json and response_settings.fast_json_jsonb_passthrough
+        loaded_version = version
+        if view:
+            # 💡 部分取得: 要求された列・項目だけを読み込む
+            document = load_project_view(db, project_id, view, passthrough)
+            if not document:
+                raise HTTPException(status_code=404, detail="Project not found")
+            if response_settings.fast_json:
+                body = dumps(document)
+            else:
+                body = ProjectView.model_validate(document).model_dump_json(exclude_unset=True).encode()
+        elif response_settings.fast_json:
+            # 💡 高速経路: ORM/Pydanticを経由せず dict を orjson で直接バイト列にする
+            document = load_project_document(db, project_id, passthrough)
+            if not document:
+                raise HTTPException(status_code=404, detail="Project not found")
+            loaded_version = document["version"]
+            body = dumps(document)
+        else:
+            project = get_project_by_id(db, project_id)
+            if not project:
+                raise HTTPException(status_code=404, detail="Project not found")
+            loaded_version = project.version
+            body = Project.model_validate(project).model_dump_json().encode()
+        # 💡 読み込んだ行のバージョンでキーを作り直す（取得の間に更新が入った場合に備える）
+        version = loaded_version
+        headers["ETag"] = make_project_etag(project_id, version, variant)
+        project_response_cache.put((project_id, version, variant), body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# --- リアルタイム更新チャンネル (WebSocket) ---
+def _load_live_snapshot(project_id: int):
+    db = SessionLocal()
+    try:
+        return get_project_live_snapshot(db, project_id)
+    finally:
+        db.close()
+
+@router.websocket("/{project_id}/live")
+async def project_live_channel(websocket: WebSocket, project_id: int):
+    """
+    プロジェクトの変更（タイマー開始/停止、タスク完了、ステータス遷移、AI生成物の保存）を
+    差分イベントとしてプッシュする。接続直後に最小限のスナップショットを1回送る。
+    """
+    await websocket.accept()
+    queue = project_event_hub.subscribe(project_id)
+    receiver = asyncio.ensure_future(websocket.receive_text())
+    getter = asyncio.ensure_future(queue.get())
+    try:
+        snapshot = await run_in_threadpool(_load_live_snapshot, project_id)
+        if snapshot is None:
+            await websocket.close(code=4404, reason="Project not found")
+            return
+        await websocket.send_json(snapshot)
+
+        while True:
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            # 差分と受信が同時に完了した場合も差分を取りこぼさないよう、先に送る
+            if getter in done:
+                await websocket.send_text(getter.result())
+                getter = asyncio.ensure_future(queue.get())
+            if receiver in done:
+                # クライアントからのメッセージは使わない（切断検知のみ）
+                receiver.result()
+                receiver = asyncio.ensure_future(websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        getter.cancel()
+        project_event_hub.unsubscribe(project_id, queue)
 
 # --- サブタスク完了エンドポイント ---
 @router.put("/{project_id}/tasks/{task_id}/complete", response_model=Project)
@@ -80,6 +203,8 @@ def complete_project_task(
         db_task.status = '完了'
         db_task.completed_at = datetime.now()
         db.add(db_task)
+        record_task_actuals(db, [db_task.project_task_id]) # 見積もりの統計に実績を追加
+        publish_project_event(db, project_id, "task_completed", task_id=task_id, completed_at=db_task.completed_at)
         db.commit()
 
     # 3. ステータス自動遷移ロジックを実行
@@ -91,7 +216,7 @@ def complete_project_task(
     if transition_occurred:
         # 遷移が起きたことを示すメッセージなどをレスポンスに含めることも可能ですが、
         # ここでは更新されたプロジェクト情報を返します。
-        print(f"Project {project_id} transitioned to status: {updated_project.current_status_id}")
+        logger.info("Project %s transitioned to status: %s", project_id, updated_project.current_status_id)
 
     return updated_project
 
@@ -100,57 +225,162 @@ def complete_project_task(
 @router.post("/{project_id}/scaffold", status_code=status.HTTP_200_OK)
 def generate_and_save_scaffold( # 💡 戻り値の型ヒントを削除
     project_id: int, 
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db)
 ):
     """
     指定プロジェクトのテーマとアングルに基づき、AIにトーク骨子を生成させ、保存する。
+    Idempotency-Key ヘッダー付きで再送された場合は、再生成せず最初の結果を返す。
     """
     
-    # 1. 骨子をAIに生成させる
+    def work():
+        # 1. 骨子をAIに生成させる
+        try:
+            scaffold_data_dict = generate_talk_scaffold(db, project_id) 
+        except ValueError as e:
+            # APIキーが空の場合、この ValueError になる可能性が高い
+            raise HTTPException(status_code=400, detail=str(e)) 
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"AI生成中に予期せぬエラーが発生しました: {e}")
+
+        # 2. 生成されたデータをDBに保存
+        update_scaffold_in_project(db, project_id, scaffold_data_dict)
+        
+        # 3. 成功メッセージと、AIが生成したデータ（dict）をそのまま返す
+        return status.HTTP_200_OK, {
+            "message": "Talk scaffold successfully generated and saved.", 
+            "data": scaffold_data_dict
+        }
+
+    return idempotent_response(*run_idempotent(
+        idempotency_key, request_fingerprint("POST", f"/projects/{project_id}/scaffold"), work
+    ))
+
+# --- トーク骨子の部分更新（JSON Patch・質問単位）---
+def apply_scaffold_patch(project_id: int, if_match: Optional[str], operations: List[dict], db: Session,
+                         question: Optional[dict] = None, expected_version: Optional[int] = None,
+                         source: str = "patch") -> JSONResponse:
+    """
+    If-Match のバージョンで骨子にパッチを適用し、新しい ETag を付けて結果を返す。
+    If-Match がなければ 428、バージョンが違えば 412、パスが現在の骨子にない場合は 409 を返す。
+    """
+    version = parse_if_match(if_match, project_id)
+    if version is None and expected_version is None:
+        raise HTTPException(status_code=428, detail='If-Match header with the project ETag (e.g. "p1-v3") is required.')
+    if version is not None and expected_version is not None and version != expected_version:
+        raise HTTPException(status_code=412, detail=f"Project was modified (current version: {expected_version})")
     try:
-        scaffold_data_dict = generate_talk_scaffold(db, project_id) 
+        new_version = patch_scaffold(db, project_id, version if version is not None else expected_version, operations, source)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except VersionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e), headers={"ETag": make_project_etag(project_id, e.current_version)})
+    except PatchConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
-        # APIキーが空の場合、この ValueError になる可能性が高い
-        raise HTTPException(status_code=400, detail=str(e)) 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI生成中に予期せぬエラーが発生しました: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # 2. 生成されたデータをDBに保存
-    update_scaffold_in_project(db, project_id, scaffold_data_dict)
-    
-    # 3. 成功メッセージと、AIが生成したデータ（dict）をそのまま返す
-    return {
-        "message": "Talk scaffold successfully generated and saved.", 
-        "data": scaffold_data_dict
-    }
+    body = ScaffoldPatchResult(project_id=project_id, version=new_version, question=question)
+    return JSONResponse(
+        content=body.model_dump(mode="json", exclude_none=True),
+        headers={"ETag": make_project_etag(project_id, new_version)}
+    )
+
+@router.patch("/{project_id}/scaffold", response_model=ScaffoldPatchResult)
+def patch_project_scaffold(
+    project_id: int,
+    operations: List[ScaffoldPatchOperation],
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    db: Session = Depends(get_db)
+):
+    """
+    トーク骨子に JSON Patch（add / remove / replace / test）を適用する。骨子全体を送らずに1か所だけ変更できる。
+    If-Match には GET /projects/{id} が返した ETag を指定する（読んだ後に更新されていれば 412）。
+    """
+    return apply_scaffold_patch(
+        project_id, if_match, [operation.model_dump(exclude_unset=True) for operation in operations], db
+    )
+
+@router.patch("/{project_id}/scaffold/questions/{index}", response_model=ScaffoldPatchResult)
+def patch_discussion_question(
+    project_id: int,
+    index: int,
+    fields: DiscussionQuestionPatch,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    db: Session = Depends(get_db)
+):
+    """discussion_flow の index 番目（0始まり）の質問のうち、指定したフィールドだけを更新する"""
+    if index < 0:
+        raise HTTPException(status_code=400, detail=f"discussion_flow[{index}] does not exist.")
+    try:
+        operations = question_operations(index, fields.model_dump(exclude_none=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return apply_scaffold_patch(project_id, if_match, operations, db)
+
+@router.post("/{project_id}/scaffold/questions/{index}/regenerate", response_model=ScaffoldPatchResult)
+def regenerate_discussion_question(
+    project_id: int,
+    index: int,
+    request: Optional[QuestionRegenerateRequest] = None,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    db: Session = Depends(get_db)
+):
+    """
+    discussion_flow の index 番目の質問だけをAIに作り直させて保存する（プロンプトにはその質問と前後の質問文だけを含める）。
+    If-Match を省略した場合は、生成前に読んだバージョンのまま更新されていないときだけ保存する。
+    If-Match が古ければ、AIを呼ぶ前に 412 を返す。
+    """
+    try:
+        question, read_version = generate_discussion_question(
+            db, project_id, index, request.instruction if request else "", parse_if_match(if_match, project_id)
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except VersionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e), headers={"ETag": make_project_etag(project_id, e.current_version)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    operations = [{"op": "replace", "path": f"/discussion_flow/{index}", "value": question}]
+    return apply_scaffold_patch(
+        project_id, if_match, operations, db, question=question, expected_version=read_version, source="regenerate_question"
+    )
 
 # --- サムネイルコンセプト生成エンドポイント ---
 @router.post("/{project_id}/thumbnail", status_code=status.HTTP_200_OK)
 def generate_and_save_thumbnail_concept(
     project_id: int, 
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db)
 ):
     """
     指定プロジェクトのトーク骨子に基づき、AIにサムネイルコンセプトを生成させ、保存する。
+    Idempotency-Key ヘッダー付きで再送された場合は、再生成せず最初の結果を返す。
     """
     
-    # 1. コンセプトをAIに生成させる
-    try:
-        thumbnail_concept_dict = generate_thumbnail_concept(db, project_id) 
-    except ValueError as e:
-        # トーク骨子がない場合やAIパースエラーの場合
-        raise HTTPException(status_code=400, detail=str(e)) 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI生成中に予期せぬエラーが発生しました: {e}")
+    def work():
+        # 1. コンセプトをAIに生成させる
+        try:
+            thumbnail_concept_dict = generate_thumbnail_concept(db, project_id) 
+        except ValueError as e:
+            # トーク骨子がない場合やAIパースエラーの場合
+            raise HTTPException(status_code=400, detail=str(e)) 
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"AI生成中に予期せぬエラーが発生しました: {e}")
 
-    # 2. 生成されたデータをDBに保存
-    update_thumbnail_in_project(db, project_id, thumbnail_concept_dict)
-    
-    # 3. 成功メッセージと、AIが生成したデータ（dict）をそのまま返す
-    return {
-        "message": "Thumbnail concept successfully generated and saved.", 
-        "data": thumbnail_concept_dict
-    }
+        # 2. 生成されたデータをDBに保存
+        update_thumbnail_in_project(db, project_id, thumbnail_concept_dict)
+        
+        # 3. 成功メッセージと、AIが生成したデータ（dict）をそのまま返す
+        return status.HTTP_200_OK, {
+            "message": "Thumbnail concept successfully generated and saved.", 
+            "data": thumbnail_concept_dict
+        }
+
+    return idempotent_response(*run_idempotent(
+        idempotency_key, request_fingerprint("POST", f"/projects/{project_id}/thumbnail"), work
+    ))
 
 # --- タイマー開始エンドポイント ---
 @router.post("/{project_id}/tasks/{task_id}/start_timer", response_model=TimerStart)
@@ -189,6 +419,41 @@ def task_stop_timer(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# --- タイマーイベント一括受信エンドポイント ---
+@router.post("/{project_id}/timer_events", response_model=TimerEventAck, status_code=status.HTTP_202_ACCEPTED)
+def ingest_timer_events(
+    project_id: int,
+    batch: TimerEventBatch,
+    flush: bool = Query(False, description="True の場合、書き込みバッファを即座にDBへ反映する"),
+    db: Session = Depends(get_db)
+):
+    """
+    クライアントがローカルにキューイングしたタイマーイベント（start/stop/lap）をまとめて受け付ける。
+    event_id による冪等性があるため、同じバッチを再送しても二重計上されない。
+    書き込みはバッファ経由でまとめて行われる。バッファはワーカーのメモリ上にあるため、
+    クライアントは pending_event_ids に含まれないイベント（書き込み済み）だけをローカルから削除する。
+    """
+    if not db.get(DBProject, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    try:
+        accepted, duplicates = timer_event_buffer.submit(db, project_id, batch.events)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if flush:
+        try:
+            timer_event_buffer.flush()
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"タイマーイベントの書き込みに失敗しました（再試行されます）: {e}")
+
+    return TimerEventAck(
+        accepted=accepted,
+        duplicates=duplicates,
+        pending=timer_event_buffer.pending_count,
+        pending_event_ids=timer_event_buffer.pending_ids([e.event_id for e in batch.events])
+    )
+
 # --- タスク完了エンドポイント ---
 @router.post("/{project_id}/tasks/{task_id}/complete", response_model=ProjectTask)
 def complete_task_endpoint(
@@ -220,6 +485,12 @@ def get_project_tasks(
     指定されたプロジェクトのタスクリストを取得する。
     タスクの状態 (status) でフィルタリング可能。
     """
+    if response_settings.fast_json:
+        # 💡 高速経路: 行を dict のまま orjson でシリアライズし、response_model の再検証を省く
+        if get_project_version(db, project_id) is None:
+            raise HTTPException(status_code=404, detail="Project not found.")
+        return Response(content=dumps(load_project_tasks(db, project_id, status)), media_type="application/json")
+
     # 💡 修正: ロジックをサービス関数に委譲
     try:
         return get_filtered_project_tasks(db, project_id, status)
@@ -230,29 +501,36 @@ def get_project_tasks(
 @router.post("/{project_id}/summary", status_code=status.HTTP_200_OK)
 def generate_and_save_summary(
     project_id: int, 
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db)
 ):
     """
     プロジェクトの終了データに基づき、AIにサマリーと反省点を生成させ、保存する。
+    Idempotency-Key ヘッダー付きで再送された場合は、再生成せず最初の結果を返す。
     """
     
-    # 1. サマリーをAIに生成させる
-    try:
-        summary_dict = generate_project_summary(db, project_id) 
-    except ValueError as e:
-        # データ不足やAIパースエラーの場合
-        raise HTTPException(status_code=400, detail=str(e)) 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI生成中に予期せぬエラーが発生しました: {e}")
+    def work():
+        # 1. サマリーをAIに生成させる
+        try:
+            summary_dict = generate_project_summary(db, project_id) 
+        except ValueError as e:
+            # データ不足やAIパースエラーの場合
+            raise HTTPException(status_code=400, detail=str(e)) 
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"AI生成中に予期せぬエラーが発生しました: {e}")
 
-    # 2. 生成されたデータをDBに保存
-    update_summary_in_project(db, project_id, summary_dict)
-    
-    # 3. 成功メッセージと、AIが生成したデータ（dict）をそのまま返す
-    return {
-        "message": "Project summary successfully generated and saved.", 
-        "data": summary_dict
-    }
+        # 2. 生成されたデータをDBに保存
+        update_summary_in_project(db, project_id, summary_dict)
+        
+        # 3. 成功メッセージと、AIが生成したデータ（dict）をそのまま返す
+        return status.HTTP_200_OK, {
+            "message": "Project summary successfully generated and saved.", 
+            "data": summary_dict
+        }
+
+    return idempotent_response(*run_idempotent(
+        idempotency_key, request_fingerprint("POST", f"/projects/{project_id}/summary"), work
+    ))
 
 # --- タスクテンプレート管理エンドポイント ---
 
@@ -278,6 +556,15 @@ def get_all_templates_endpoint(
     """
     return get_all_task_templates(db)
 
+@router.get("/templates/estimates", response_model=List[TaskEstimate])
+def get_template_estimates_endpoint(
+    db: Session = Depends(get_db)
+):
+    """
+    タスクテンプレートごとの実績時間の統計（中央値・P80・トレンド）と、新規プロジェクトで使う見積もり時間を取得する。
+    """
+    return list_estimates(db)
+
 @router.put("/templates/{template_id}", response_model=TaskTemplate)
 def update_template_endpoint(
     template_id: int,
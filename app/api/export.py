@@ -0,0 +1,53 @@
+# app/api/export.py
+
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query # type: ignore
+from fastapi.responses import StreamingResponse # type: ignore
+
+from ..services.export import EXPORT_FORMATS, ExportFilters, ExportUnavailableError, export_stream
+from ..profiling import ProfiledRoute
+from .admin import require_admin
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export"],
+    dependencies=[Depends(require_admin)], # 全件を出力するため管理用トークンを必須にする
+    route_class=ProfiledRoute
+)
+
+# --- 一括エクスポート（チャンク単位のストリーミング）---
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$", description="出力形式"),
+    date_from: Optional[datetime] = Query(None, description="この日時以降（projects/tasks はプロジェクト作成日時、timer_logs は開始日時）"),
+    date_to: Optional[datetime] = Query(None, description="この日時より前"),
+    status_id: Optional[List[int]] = Query(None, description="プロジェクトのステータスID（複数指定可）"),
+    task_status: Optional[List[str]] = Query(None, description="タスクのステータス（tasks / timer_logs のみ、複数指定可）"),
+    with_names: bool = Query(True, description="マスタの名称列（ステータス名・タスク名など）を含めるか"),
+):
+    """
+    projects / tasks / timer_logs を NDJSON・CSV・Parquet でストリーミング出力する。
+    サーバーサイドカーソルで一定行数ずつ読み出すため、件数に関わらずメモリ使用量は一定。
+    """
+    filters = ExportFilters(
+        date_from=date_from,
+        date_to=date_to,
+        status_ids=status_id or [],
+        task_statuses=task_status or [],
+    )
+    try:
+        chunks = export_stream(dataset, format, filters, with_names=with_names)
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'},
+    )
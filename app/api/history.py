@@ -0,0 +1,85 @@
+# app/api/history.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query # type: ignore
+from fastapi.responses import JSONResponse # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import get_db
+from ..schemas.history import ArtifactName, ArtifactHistoryPage, ArtifactRevision, ArtifactRevertRequest, ArtifactRevertResult
+from ..services.artifact_history import list_artifact_history, load_artifact_revision, revert_artifact
+from ..services.project_cache import get_project_version, make_project_etag
+from ..services.scaffold_patch import parse_if_match
+from ..profiling import ProfiledRoute
+
+router = APIRouter(
+    prefix="/projects",
+    tags=["History"],
+    route_class=ProfiledRoute
+)
+
+def require_project(db: Session, project_id: int) -> int:
+    version = get_project_version(db, project_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    return version
+
+# --- 版の一覧（メタデータだけ）---
+@router.get("/{project_id}/artifacts/{artifact}/history", response_model=ArtifactHistoryPage)
+def read_artifact_history(
+    project_id: int,
+    artifact: ArtifactName,
+    before_revision: Optional[int] = Query(None, description="この版より古い版を返す（前のページの next_before_revision）"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """新しい版から順に、版番号・保存形式・サイズ・作成日時を返す（中身は GET .../history/{revision} で取得する）"""
+    require_project(db, project_id)
+    items = list_artifact_history(db, project_id, artifact, before_revision, limit + 1)
+    next_before_revision = items[limit - 1]["revision"] if len(items) > limit else None
+    return ArtifactHistoryPage(artifact=artifact, items=items[:limit], next_before_revision=next_before_revision)
+
+# --- 版の復元 ---
+@router.get("/{project_id}/artifacts/{artifact}/history/{revision}", response_model=ArtifactRevision)
+def read_artifact_revision(project_id: int, artifact: ArtifactName, revision: int, db: Session = Depends(get_db)):
+    """直前のスナップショットに差分を当てて、指定した版の内容を返す"""
+    require_project(db, project_id)
+    try:
+        document = load_artifact_revision(db, project_id, artifact, revision)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return ArtifactRevision(artifact=artifact, revision=revision, document=document)
+
+# --- 巻き戻し ---
+@router.post("/{project_id}/artifacts/{artifact}/revert", response_model=ArtifactRevertResult)
+def revert_artifact_revision(
+    project_id: int,
+    artifact: ArtifactName,
+    request: ArtifactRevertRequest,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    db: Session = Depends(get_db)
+):
+    """
+    成果物を指定した版の内容に戻す（巻き戻しも新しい版として記録されるため、取り消しも同じ操作でできる）。
+    If-Match を指定した場合は、現在のバージョンと一致するときだけ戻す（違えば 412）。レスポンスの ETag は巻き戻し後のもの。
+    """
+    version = require_project(db, project_id)
+    expected_version = None
+    if if_match is not None:
+        expected_version = parse_if_match(if_match, project_id)
+        if expected_version != version:
+            raise HTTPException(status_code=412, detail=f"Project was modified (current version: {version})",
+                                headers={"ETag": make_project_etag(project_id, version)})
+    try:
+        reverted = revert_artifact(db, project_id, artifact, request.revision, expected_version)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    current_version = get_project_version(db, project_id)
+    if reverted is None:
+        raise HTTPException(status_code=412, detail=f"Project was modified (current version: {current_version})",
+                            headers={"ETag": make_project_etag(project_id, current_version)})
+
+    document, new_revision = reverted
+    body = ArtifactRevertResult(artifact=artifact, reverted_to=request.revision, revision=new_revision, document=document)
+    return JSONResponse(content=body.model_dump(mode="json"), headers={"ETag": make_project_etag(project_id, current_version)})
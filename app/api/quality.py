@@ -0,0 +1,47 @@
+# app/api/quality.py
+
+from fastapi import APIRouter, Depends, HTTPException # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import get_db
+from ..schemas.quality import QualityChecklist, QualityCheckResultBatch
+from ..services.events import publish_project_event
+from ..services.project_cache import get_project_version
+from ..services.project_main import check_and_transition_status
+from ..services.quality import get_project_checklist, save_check_results
+from ..profiling import ProfiledRoute
+
+router = APIRouter(
+    prefix="/projects",
+    tags=["Quality"],
+    route_class=ProfiledRoute
+)
+
+# --- 品質チェックリストの取得 ---
+@router.get("/{project_id}/checklist", response_model=QualityChecklist)
+def read_checklist(project_id: int, db: Session = Depends(get_db)):
+    """プロジェクトに適用されるチェック項目（有効な項目のうち、対象タスクをプロジェクトが含むもの）と結果を返す"""
+    if get_project_version(db, project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    return get_project_checklist(db, project_id)
+
+# --- 品質チェックの結果の一括保存 ---
+@router.put("/{project_id}/checklist", response_model=QualityChecklist)
+def update_checklist(project_id: int, batch: QualityCheckResultBatch, db: Session = Depends(get_db)):
+    """
+    チェックリストの結果をまとめて保存し、ステータスの自動遷移をチェックする
+    （必須の品質チェックがすべて済むと、require_quality_checks のルールで遷移できるようになる）。
+    """
+    if get_project_version(db, project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+
+    try:
+        saved = save_check_results(db, project_id, [result.model_dump() for result in batch.results])
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    publish_project_event(db, project_id, "checklist_updated", check_ids=saved)
+    db.commit()
+
+    status_changed = check_and_transition_status(db, project_id)
+    return {**get_project_checklist(db, project_id), "status_changed": status_changed}
@@ -0,0 +1,37 @@
+# app/api/responses.py
+
+from typing import Any
+
+import orjson # type: ignore
+from fastapi.responses import JSONResponse # type: ignore
+from pydantic_settings import BaseSettings # type: ignore
+
+# 高速シリアライズの設定 (環境変数で上書き可能)
+class ResponseSettings(BaseSettings):
+    fast_json: bool = False # True で orjson による高速シリアライズ経路を使う（オプトイン）
+    fast_json_jsonb_passthrough: bool = True # JSONB列をDBのテキストのまま埋め込む（再パースしない）
+
+response_settings = ResponseSettings()
+
+# orjson の共通オプション: dict のキーが int の場合も許可し、naive な datetime はそのまま出力する
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def dumps(content: Any) -> bytes:
+    """orjson で bytes にシリアライズする（orjson.Fragment は再エンコードせずに埋め込まれる）"""
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+def jsonb_fragment(raw_json: Any) -> Any:
+    """
+    DBから ::text で取り出したJSONB列を、再パースせずにレスポンスへ埋め込むための Fragment に包む。
+    NULL の場合は None を返す。
+    """
+    if raw_json is None:
+        return None
+    return orjson.Fragment(raw_json)
+
+class ORJSONResponse(JSONResponse):
+    """orjson でシリアライズするレスポンスクラス"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
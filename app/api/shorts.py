@@ -0,0 +1,76 @@
+# app/api/shorts.py
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import get_db
+from ..schemas.shorts import (
+    ShortsStatus, Shorts, ShortsPage, ShortsExtractRequest, ShortsExtractResult,
+    ShortsStatusUpdate, ShortsBulkStatusUpdate, ShortsBulkStatusResult
+)
+from ..services.shorts import (
+    ALLOWED_TRANSITIONS, extract_shorts_candidates, find_missing_projects, get_shorts, list_shorts, transition_shorts_status
+)
+from ..profiling import ProfiledRoute
+
+router = APIRouter(
+    prefix="/shorts",
+    tags=["Shorts"],
+    route_class=ProfiledRoute
+)
+
+# --- Shorts 候補の抽出（複数の VOD をまとめて）---
+@router.post("/candidates", response_model=ShortsExtractResult)
+def extract_candidates(request: ShortsExtractRequest, db: Session = Depends(get_db)):
+    """
+    VOD プロジェクトの骨子の質問と収録時の区間ごとの計測時間から、Shorts の候補を作る。
+    抽出し直すと未作成の候補は作り直す（編集済・公開済の Shorts はそのまま）。
+    """
+    missing = find_missing_projects(db, request.vod_project_ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Projects not found: {missing}")
+
+    result = extract_shorts_candidates(db, request.vod_project_ids)
+    db.commit()
+    return result
+
+# --- 一覧（VOD・状態で絞り込み）---
+@router.get("/", response_model=ShortsPage)
+def read_shorts(
+    vod_project_id: Optional[int] = Query(None, description="VOD プロジェクトのID（省略時はチャンネル全体）"),
+    status: Optional[List[ShortsStatus]] = Query(None, description="状態（複数指定可）"),
+    high_hook_only: bool = Query(False, description="is_high_hook の候補だけを返す"),
+    after_id: Optional[int] = Query(None, description="前のページの next_after_id"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """shorts_id の順に返す。次のページは next_after_id を after_id に渡して取得する"""
+    items, next_after_id = list_shorts(db, vod_project_id, status, high_hook_only, after_id, limit)
+    return ShortsPage(items=items, next_after_id=next_after_id)
+
+# --- 状態の一括遷移 ---
+@router.put("/status", response_model=ShortsBulkStatusResult)
+def update_shorts_status_bulk(update: ShortsBulkStatusUpdate, db: Session = Depends(get_db)):
+    """遷移できるものだけを更新し、存在しないか遷移できなかったIDは skipped_ids で返す"""
+    updated, skipped_ids = transition_shorts_status(db, update.shorts_ids, update.status, update.published_at)
+    db.commit()
+    return ShortsBulkStatusResult(updated=updated, skipped_ids=skipped_ids)
+
+# --- 状態の遷移 ---
+@router.put("/{shorts_id}/status", response_model=Shorts)
+def update_shorts_status(shorts_id: int, update: ShortsStatusUpdate, db: Session = Depends(get_db)):
+    """未作成 → 編集済 → 公開済（編集済 → 未作成 も可）。現在の状態から遷移できない場合は 409 を返す"""
+    updated, _ = transition_shorts_status(db, [shorts_id], update.status, update.published_at)
+    if not updated:
+        current = get_shorts(db, shorts_id)
+        if current is None:
+            raise HTTPException(status_code=404, detail="Shorts not found.")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Cannot change status from '{current['status']}' to '{update.status}' "
+                   f"(allowed from: {', '.join(ALLOWED_TRANSITIONS[update.status])})"
+        )
+    db.commit()
+    return updated[0]
@@ -0,0 +1,240 @@
+# app/cli.py
+#
+# 管理用コマンド
+#
+#   python -m app.cli init-db   # テーブル作成・マイグレーション適用・シーケンスのリセット
+#   python -m app.cli export timer_logs --format parquet --out logs.parquet [--from 2025-01-01 --to 2025-02-01]
+#                               # 一括エクスポート（--out を省略すると標準出力）
+#   python -m app.cli import --projects p.csv --tasks t.csv --timer-logs l.csv [--dry-run]
+#                               # 過去の制作履歴の一括インポート（COPY + 集合演算でマージ）
+#   python -m app.cli rebuild-estimates   # 見積もりの統計 (t_task_estimate) を過去の実績から作り直す
+#   python -m app.cli rollups backfill [--from 2025-01-01 --to 2025-02-01]
+#                               # 分析用のロールアップ (t_time_rollup_*) をタイマーログから作り直す
+#   python -m app.cli rollups check [--from ... --to ...] [--fix]
+#                               # ロールアップと元データのずれを確認する（ずれがあれば終了コード 1）
+#   python -m app.cli partitions status|ensure   # t_timer_log の月別パーティションの一覧・今後の月の作成
+#   python -m app.cli partitions archive [--keep-months 12] [--dry-run]
+#                               # 古い月を切り離して archive スキーマへ移す（restore YYYY-MM で付け直す）
+
+import argparse
+import sys
+import time
+from datetime import date, datetime
+
+from .database import SessionLocal, engine, init_db
+from .services.bulk_import import run_import
+from .services.estimate import rebuild_estimates
+from .services.partitions import (
+    archive_timer_log_partitions, ensure_timer_log_partitions, list_timer_log_partitions, partition_settings,
+    restore_timer_log_partition,
+)
+from .services.rollups import check_time_rollups, rebuild_time_rollups
+from .services.export import EXPORT_DATASETS, EXPORT_FORMATS, ExportFilters, ExportUnavailableError, export_stream
+
+def cmd_init_db(args: argparse.Namespace) -> int:
+    init_db()
+    return 0
+
+def cmd_export(args: argparse.Namespace) -> int:
+    filters = ExportFilters(
+        date_from=args.date_from,
+        date_to=args.date_to,
+        status_ids=args.status_id or [],
+        task_statuses=args.task_status or [],
+    )
+    try:
+        chunks = export_stream(args.dataset, args.format, filters, with_names=not args.no_names, chunk_rows=args.chunk_rows)
+    except (ValueError, ExportUnavailableError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    written = 0
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.out:
+            out.close()
+        else:
+            out.flush()
+    print(f"📦 Exported {args.dataset} ({args.format}, {written:,} bytes) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+def cmd_import(args: argparse.Namespace) -> int:
+    sources = {
+        dataset: path
+        for dataset, path in (("projects", args.projects), ("tasks", args.tasks), ("timer_logs", args.timer_logs))
+        if path
+    }
+    if not sources:
+        print("❌ Specify at least one of --projects, --tasks, --timer-logs", file=sys.stderr)
+        return 2
+
+    report = run_import(sources, dry_run=args.dry_run, fmt=args.format, chunk_rows=args.chunk_rows)
+    print(f"{'dataset':<11} {'read':>9} {'invalid':>8} {'unresolved':>10} {'inserted':>9} {'updated':>8} {'skipped':>8}")
+    for dataset, r in report.datasets.items():
+        if dataset in sources:
+            print(f"{dataset:<11} {r.read:>9} {r.invalid:>8} {r.unresolved:>10} {r.inserted:>9} {r.updated:>8} {r.skipped:>8}")
+    print(f"tasks created for timer logs: {report.created_tasks}, "
+          f"recomputed: {report.recomputed_tasks} tasks / {report.recomputed_projects} projects")
+    for error in report.errors:
+        print(f"⚠️ {error}")
+    if report.error_count > len(report.errors):
+        print(f"⚠️ ... and {report.error_count - len(report.errors)} more errors")
+    status = "🧪 Dry run finished (rolled back)" if report.dry_run else "✅ Import committed"
+    print(f"{status} in {report.elapsed_sec}s")
+    return 1 if report.error_count else 0
+
+def cmd_rebuild_estimates(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        count = rebuild_estimates(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"📐 Rebuilt estimates for {count} task templates in {time.perf_counter() - started:.1f}s")
+    return 0
+
+def cmd_rollups_backfill(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        counts = rebuild_time_rollups(db, args.date_from, args.date_to)
+        db.commit()
+    finally:
+        db.close()
+    print(f"📊 Rebuilt {counts['daily']} daily rows and {counts['projects']} project rows in {time.perf_counter() - started:.1f}s")
+    return 0
+
+def cmd_rollups_check(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        report = check_time_rollups(db, args.date_from, args.date_to)
+        for row in report.daily_mismatches:
+            print(f"⚠️ daily {row['day']} template={row['task_template_id']}: "
+                  f"rollup={row['rollup_min']} ({row['rollup_logs']} logs), expected={row['expected_min']} ({row['expected_logs']} logs)")
+        for row in report.project_mismatches:
+            print(f"⚠️ project {row['project_id']}: rollup est/actual={row['rollup_est_min']}/{row['rollup_actual_min']}, "
+                  f"expected={row['expected_est_min']}/{row['expected_actual_min']}")
+        if report.ok:
+            print("✅ Rollups are consistent")
+            return 0
+        print(f"❌ {report.daily_mismatch_count} daily / {report.project_mismatch_count} project rows differ")
+        if args.fix:
+            counts = rebuild_time_rollups(db, args.date_from, args.date_to)
+            db.commit()
+            print(f"📊 Rebuilt {counts['daily']} daily rows and {counts['projects']} project rows")
+        return 1
+    finally:
+        db.close()
+
+def cmd_partitions_status(args: argparse.Namespace) -> int:
+    with engine.connect() as conn:
+        partitions = list_timer_log_partitions(conn)
+    print(f"{'partition':<24} {'state':<9} {'rows (est.)':>12} {'total':>10} {'indexes':>10}")
+    for p in partitions:
+        state = "attached" if p["attached"] else p["schema"]
+        print(f"{p['name']:<24} {state:<9} {max(p['estimated_rows'], 0):>12,} "
+              f"{p['total_bytes'] // 1024:>8,}kB {p['index_bytes'] // 1024:>8,}kB")
+    return 0
+
+def cmd_partitions_ensure(args: argparse.Namespace) -> int:
+    with engine.begin() as conn:
+        created = ensure_timer_log_partitions(conn)
+    print(f"🗂️ Created {len(created)} partitions{': ' + ', '.join(created) if created else ''}")
+    return 0
+
+def cmd_partitions_archive(args: argparse.Namespace) -> int:
+    with engine.begin() as conn:
+        result = archive_timer_log_partitions(conn, keep_months=args.keep_months, dry_run=args.dry_run)
+    for name in result["skipped"]:
+        print(f"⚠️ {name} skipped: it still has running timers")
+    if args.dry_run:
+        print(f"🧪 Would archive: {', '.join(result['archived']) or '(none)'}")
+        return 0
+
+    # 切り離した月はもう書き込まれないため、凍結しておき以後の周回防止 VACUUM を不要にする
+    schema = partition_settings.timer_log_archive_schema
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name in result["archived"]:
+            conn.exec_driver_sql(f"VACUUM (FREEZE, ANALYZE) {schema}.{name}")
+    print(f"🗄️ Archived {len(result['archived'])} partitions to '{schema}'"
+          f"{': ' + ', '.join(result['archived']) if result['archived'] else ''}")
+    return 0
+
+def cmd_partitions_restore(args: argparse.Namespace) -> int:
+    try:
+        with engine.begin() as conn:
+            name = restore_timer_log_partition(conn, args.month)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    print(f"🗂️ Restored {name}")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="動画制作効率化支援システム 管理コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_db_parser = subparsers.add_parser("init-db", help="DBを初期化する（アドバイザリロックで直列化）")
+    init_db_parser.set_defaults(func=cmd_init_db)
+
+    export_parser = subparsers.add_parser("export", help="プロジェクト・タスク・タイマーログを一括エクスポートする")
+    export_parser.add_argument("dataset", choices=list(EXPORT_DATASETS))
+    export_parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson")
+    export_parser.add_argument("--out", help="出力ファイル（省略時は標準出力）")
+    export_parser.add_argument("--from", dest="date_from", type=datetime.fromisoformat, help="この日時以降（ISO 8601）")
+    export_parser.add_argument("--to", dest="date_to", type=datetime.fromisoformat, help="この日時より前（ISO 8601）")
+    export_parser.add_argument("--status-id", type=int, action="append", help="プロジェクトのステータスID（複数指定可）")
+    export_parser.add_argument("--task-status", action="append", help="タスクのステータス（tasks / timer_logs のみ、複数指定可）")
+    export_parser.add_argument("--no-names", action="store_true", help="マスタの名称列を含めない")
+    export_parser.add_argument("--chunk-rows", type=int, help="一度に読み出す行数（既定は EXPORT_CHUNK_ROWS）")
+    export_parser.set_defaults(func=cmd_export)
+
+    import_parser = subparsers.add_parser("import", help="過去の制作履歴を一括インポートする")
+    import_parser.add_argument("--projects", help="プロジェクトのファイル（CSV / NDJSON）")
+    import_parser.add_argument("--tasks", help="タスクのファイル")
+    import_parser.add_argument("--timer-logs", help="タイマーログのファイル")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"], help="入力形式（省略時は拡張子で判定）")
+    import_parser.add_argument("--dry-run", action="store_true", help="検証とマージ件数の確認だけを行い、反映しない")
+    import_parser.add_argument("--chunk-rows", type=int, help="検証・COPY する1チャンクの行数（既定は IMPORT_CHUNK_ROWS）")
+    import_parser.set_defaults(func=cmd_import)
+
+    estimates_parser = subparsers.add_parser("rebuild-estimates", help="見積もりの統計を過去の実績から作り直す")
+    estimates_parser.set_defaults(func=cmd_rebuild_estimates)
+
+    rollups_parser = subparsers.add_parser("rollups", help="分析用のロールアップを作り直す・確認する")
+    rollups_subparsers = rollups_parser.add_subparsers(dest="rollups_command", required=True)
+    backfill_parser = rollups_subparsers.add_parser("backfill", help="タイマーログからロールアップを作り直す")
+    backfill_parser.set_defaults(func=cmd_rollups_backfill)
+    check_parser = rollups_subparsers.add_parser("check", help="ロールアップと元データのずれを確認する")
+    check_parser.add_argument("--fix", action="store_true", help="ずれがあれば指定期間を作り直す")
+    check_parser.set_defaults(func=cmd_rollups_check)
+    for sub in (backfill_parser, check_parser):
+        sub.add_argument("--from", dest="date_from", type=date.fromisoformat, help="この日以降（日別のみ、ISO 8601）")
+        sub.add_argument("--to", dest="date_to", type=date.fromisoformat, help="この日より前（日別のみ、ISO 8601）")
+
+    partitions_parser = subparsers.add_parser("partitions", help="t_timer_log の月別パーティションを管理する")
+    partitions_subparsers = partitions_parser.add_subparsers(dest="partitions_command", required=True)
+    partitions_subparsers.add_parser("status", help="パーティションの一覧とサイズ").set_defaults(func=cmd_partitions_status)
+    partitions_subparsers.add_parser("ensure", help="今後の月のパーティションを作り、default の行を振り分ける").set_defaults(func=cmd_partitions_ensure)
+    archive_parser = partitions_subparsers.add_parser("archive", help="古い月を切り離して archive スキーマへ移す")
+    archive_parser.add_argument("--keep-months", type=int, help="残す月数（今月を含む、既定は TIMER_LOG_RETENTION_MONTHS）")
+    archive_parser.add_argument("--dry-run", action="store_true", help="対象の月を表示するだけで切り離さない")
+    archive_parser.set_defaults(func=cmd_partitions_archive)
+    restore_parser = partitions_subparsers.add_parser("restore", help="archive スキーマの月を付け直す")
+    restore_parser.add_argument("month", type=lambda value: date.fromisoformat(f"{value}-01"), help="YYYY-MM")
+    restore_parser.set_defaults(func=cmd_partitions_restore)
+
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,29 @@
 # app/database.py
 
-from pydoc import text
-from sqlalchemy import create_engine # type: ignore
+import time
+from pathlib import Path
+from sqlalchemy import create_engine, text # type: ignore
 from sqlalchemy.orm import sessionmaker # type: ignore
 from sqlalchemy.ext.declarative import declarative_base # type: ignore
 from pydantic_settings import BaseSettings # type: ignore
+from .diagnostics import install_query_diagnostics
+from .tracing import install_commit_tracing, install_sql_tracing
 
 # .envファイルから環境変数を読み込むための設定
 class Settings(BaseSettings):
     database_url: str = "postgresql://myuser:mypassword@db:5432/minecraft_movie_db"
+    # 💡 開発用: アプリ読み込み時にDB初期化を行うか（本番はプロセスマネージャーが起動前に1回だけ実行する）
+    init_db_on_startup: bool = True
 
 settings = Settings()
 
 # 💡 エンジン、セッション、ベースは「1つだけ」定義する
 engine = create_engine(settings.database_url)
+# スロークエリ・N+1 の診断フックを登録する (app/diagnostics.py)
+install_query_diagnostics(engine)
+install_sql_tracing(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+install_commit_tracing(SessionLocal)
 Base = declarative_base()
 
 # 依存性注入（DI）用の関数: リクエストごとに新しいDBセッションを提供
@@ -42,30 +51,82 @@ def reset_task_template_sequence(engine):
         connection.commit()
     print("✅ m_task_template sequence successfully reset.")
 
-def init_db():
-    """DBが起動するのを待ってから初期化を実行する"""
-    import app.models.project
-    import app.models.master
+# DB初期化を複数プロセス・複数コンテナで同時に実行しないためのアドバイザリロックID
+INIT_DB_LOCK_ID = 7346120001
 
-    # 💡 接続リトライロジック
-    max_retries = 5
+# 既存DB向けのマイグレーションSQL (init-db/migrations/*.sql をファイル名順に1回ずつ適用する)
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "init-db" / "migrations"
+
+def wait_for_db(max_retries: int = 5, interval_sec: int = 3):
+    """DBが接続を受け付けるまで待つ"""
     for i in range(max_retries):
         try:
             # 接続テスト
             with engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
-            break
+            return
         except Exception as e:
             if i == max_retries - 1:
                 raise e
             print(f"🔄 Database not ready yet... retrying ({i+1}/{max_retries})")
-            time.sleep(3) # 3秒待機
+            time.sleep(interval_sec)
 
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully.")
-    
-    try:
-        reset_task_template_sequence(engine)
-        print("✅ Sequences reset.")
-    except Exception as e:
-        print(f"⚠️ Sequence reset skipped (might be missing table): {e}")
\ No newline at end of file
+def apply_migrations(connection):
+    """未適用のマイグレーションSQLを適用し、t_schema_migration に記録する"""
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS t_schema_migration (
+            name VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    applied = {row[0] for row in connection.execute(text("SELECT name FROM t_schema_migration"))}
+
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        if path.name in applied:
+            continue
+        connection.exec_driver_sql(path.read_text(encoding="utf-8"))
+        connection.execute(text("INSERT INTO t_schema_migration (name) VALUES (:name)"), {"name": path.name})
+        print(f"✅ Migration applied: {path.name}")
+
+def init_db():
+    """
+    DBが起動するのを待ってから初期化を実行する。
+    アドバイザリロックで直列化するため、複数のプロセスやコンテナから同時に呼ばれても1つずつ実行される。
+    """
+    import app.models.project
+    import app.models.master
+    import app.models.idempotency
+    import app.models.estimate
+    import app.models.rollup
+    import app.models.channel
+    import app.models.shorts
+    import app.models.quality
+    import app.models.history
+
+    # 💡 接続リトライロジック
+    wait_for_db()
+
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": INIT_DB_LOCK_ID})
+        try:
+            Base.metadata.create_all(bind=engine)
+            print("✅ Database tables created successfully.")
+
+            with engine.begin() as connection:
+                apply_migrations(connection)
+
+            # t_timer_log の今後の月のパーティションを作り、default に入った行を月ごとに振り分ける
+            from .services.partitions import ensure_timer_log_partitions
+            with engine.begin() as connection:
+                created = ensure_timer_log_partitions(connection)
+            if created:
+                print(f"✅ Timer log partitions created: {', '.join(created)}")
+
+            try:
+                reset_task_template_sequence(engine)
+                print("✅ Sequences reset.")
+            except Exception as e:
+                print(f"⚠️ Sequence reset skipped (might be missing table): {e}")
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": INIT_DB_LOCK_ID})
+            lock_conn.commit()
@@ -0,0 +1,277 @@
+# app/diagnostics.py
+#
+# SQLの診断（スロークエリログと N+1 検出）
+#
+#   - しきい値を超えたSQLを、バインドパラメータと EXPLAIN の結果（実行計画）と一緒に記録する
+#   - 1リクエスト内で同じ形のSQL（リテラル・パラメータを除いた正規化文）が K 回を超えたら、
+#     最初に発行したアプリ側の呼び出し元と一緒に記録する
+#
+# 記録は /admin/diagnostics で参照する。エンジンへの登録は app/database.py で行う。
+
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import event # type: ignore
+
+from .tracing import current_trace_id
+
+# 診断の設定 (環境変数で上書き可能)
+class DiagnosticsSettings(BaseSettings):
+    diagnostics_enabled: bool = True
+    slow_query_ms: float = 200.0 # これを超えたSQLをスロークエリとして記録する
+    slow_query_explain: bool = True # スロークエリ（SELECTのみ）の実行計画を取得する（EXPLAIN。SQLは実行しない）
+    slow_query_explain_analyze: bool = False # EXPLAIN (ANALYZE, BUFFERS) でSQLを再実行して実測値も取得する（関数呼び出し・行ロックを含むSQLは対象外）
+    explain_timeout_ms: int = 10000 # EXPLAIN ANALYZE の statement_timeout
+    n_plus_one_threshold: int = 10 # 1リクエストで同じ正規化SQLがこの回数を超えたら N+1 として記録する
+    diagnostics_history: int = 200 # 保持する記録の件数（種類ごと）
+
+diagnostics_settings = DiagnosticsSettings()
+
+logger = logging.getLogger(__name__)
+
+# パラメータの表示を切り詰める長さ（scaffold_data などの大きなJSONをそのまま保持しないため）
+MAX_PARAM_REPR = 500
+
+APP_DIR = Path(__file__).resolve().parent
+
+# ----------------------------------------------------
+# 💡 記録の保持
+# ----------------------------------------------------
+
+_lock = threading.Lock()
+_slow_queries: Deque[Dict[str, Any]] = deque(maxlen=diagnostics_settings.diagnostics_history)
+_n_plus_one: Deque[Dict[str, Any]] = deque(maxlen=diagnostics_settings.diagnostics_history)
+
+def get_diagnostics() -> Dict[str, Any]:
+    """記録済みのスロークエリと N+1 を新しい順に返す"""
+    with _lock:
+        slow_queries = [dict(entry) for entry in reversed(_slow_queries)]
+        n_plus_one = [dict(entry) for entry in reversed(_n_plus_one)]
+    return {
+        "settings": diagnostics_settings.model_dump(),
+        "slow_queries": slow_queries,
+        "n_plus_one": n_plus_one,
+    }
+
+def clear_diagnostics():
+    with _lock:
+        _slow_queries.clear()
+        _n_plus_one.clear()
+
+# ----------------------------------------------------
+# 💡 正規化と呼び出し元
+# ----------------------------------------------------
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\([^)]+\)s|%s|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+def normalize_statement(statement: str) -> str:
+    """リテラルとプレースホルダーを ? にそろえ、IN (...) の要素数の違いも同一視する"""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    return _PLACEHOLDER_LIST.sub("?, ...", normalized)
+
+def find_call_site() -> Optional[str]:
+    """SQLを発行したアプリ側のコード（app/ 配下で最も内側のフレーム）を 'path:line in func' で返す"""
+    frame = sys._getframe(1)
+    this_file = __file__
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename != this_file and filename.startswith(str(APP_DIR)):
+            relative = Path(filename).relative_to(APP_DIR.parent)
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+def _format_parameters(parameters: Any) -> str:
+    text = repr(parameters)
+    return text if len(text) <= MAX_PARAM_REPR else text[:MAX_PARAM_REPR] + "..."
+
+# ----------------------------------------------------
+# 💡 スロークエリと EXPLAIN
+#    実行計画の取得は別スレッド・別接続で行い、リクエストの応答時間に影響させない。
+#    既定は EXPLAIN（計画だけ。SQLは実行しない）。EXPLAIN ANALYZE はSQLをもう一度実行するため、
+#    有効にした場合も副作用のないSELECT（関数呼び出し・FOR UPDATE などを含まないもの）に限り、
+#    ロールバックするトランザクション内で実行する（pg_advisory_lock・nextval・pg_notify などを再実行しない）。
+# ----------------------------------------------------
+
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+def _is_select(statement: str) -> bool:
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    # WITH ... の中に INSERT / UPDATE / DELETE を含むものは除外する
+    if head == "WITH":
+        return not re.search(r"\b(INSERT|UPDATE|DELETE)\b", statement, re.IGNORECASE)
+    return head == "SELECT"
+
+# 関数呼び出しと見なさない「識別子 (」（構文のキーワード）
+_NON_FUNCTION_KEYWORDS = {
+    "IN", "EXISTS", "ANY", "ALL", "SOME", "VALUES", "AS", "ON", "USING", "OVER", "FILTER", "WITHIN",
+    "AND", "OR", "NOT", "WHERE", "SELECT", "FROM", "JOIN", "LATERAL", "WITH", "CAST", "ARRAY", "ROW",
+}
+_CALL = re.compile(r"([A-Za-z_][A-Za-z0-9_.]*)\s*\(")
+_LOCKING_CLAUSE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+def _is_safe_to_analyze(statement: str) -> bool:
+    """再実行しても副作用のないSQLか（関数呼び出し・行ロックを含まない SELECT）。集計関数も含めて関数はすべて除外する"""
+    if not _is_select(statement) or _LOCKING_CLAUSE.search(statement):
+        return False
+    without_literals = _STRING_LITERAL.sub("''", statement)
+    return all(name.upper() in _NON_FUNCTION_KEYWORDS for name in _CALL.findall(without_literals))
+
+def _run_explain(engine, entry: Dict[str, Any], statement: str, parameters: Any, analyze: bool):
+    explain = "EXPLAIN (ANALYZE, BUFFERS)" if analyze else "EXPLAIN"
+    try:
+        with engine.connect() as conn:
+            conn.info["diagnostics_internal"] = True
+            transaction = conn.begin()
+            try:
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(diagnostics_settings.explain_timeout_ms)}")
+                rows = conn.exec_driver_sql(f"{explain} {statement}", parameters).fetchall()
+                plan = "\n".join(row[0] for row in rows)
+            finally:
+                transaction.rollback() # ANALYZE で実行した分も含めて何も残さない
+                conn.info.pop("diagnostics_internal", None)
+    except Exception as e:
+        plan = f"EXPLAIN failed: {e}"
+    with _lock:
+        entry["explain"] = plan
+
+def _record_slow_query(conn, statement: str, parameters: Any, executemany: bool, elapsed_ms: float, call_site: Optional[str]):
+    entry: Dict[str, Any] = {
+        "at": datetime.now().isoformat(),
+        "duration_ms": round(elapsed_ms, 2),
+        "statement": statement,
+        "parameters": _format_parameters(parameters),
+        "call_site": call_site,
+        "trace_id": current_trace_id(),
+        "explain": None,
+    }
+    with _lock:
+        _slow_queries.append(entry)
+    logger.warning("🐢 Slow query (%.0fms) at %s: %s", elapsed_ms, call_site, _WHITESPACE.sub(" ", statement)[:200])
+
+    if diagnostics_settings.slow_query_explain and not executemany and _is_select(statement):
+        analyze = diagnostics_settings.slow_query_explain_analyze and _is_safe_to_analyze(statement)
+        _explain_executor.submit(_run_explain, conn.engine, entry, statement, parameters, analyze)
+
+# ----------------------------------------------------
+# 💡 リクエストごとの同一SQLの集計（N+1 検出）
+# ----------------------------------------------------
+
+class RequestQueryLog:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.trace_id = current_trace_id()
+        self.counts: Dict[str, int] = {}
+        self.call_sites: Dict[str, Optional[str]] = {}
+
+    def add(self, normalized: str, call_site: Optional[str]):
+        count = self.counts.get(normalized, 0) + 1
+        self.counts[normalized] = count
+        if count == 1:
+            self.call_sites[normalized] = call_site
+
+_request_query_log: ContextVar[Optional[RequestQueryLog]] = ContextVar("request_query_log", default=None)
+
+def _record_n_plus_one(log: RequestQueryLog):
+    threshold = diagnostics_settings.n_plus_one_threshold
+    findings = [
+        {
+            "at": datetime.now().isoformat(),
+            "method": log.method,
+            "path": log.path,
+            "count": count,
+            "statement": normalized,
+            "call_site": log.call_sites.get(normalized),
+            "trace_id": log.trace_id,
+        }
+        for normalized, count in log.counts.items()
+        if count > threshold
+    ]
+    if not findings:
+        return
+    with _lock:
+        _n_plus_one.extend(findings)
+    for finding in findings:
+        logger.warning(
+            "🔁 N+1 suspected: %s %s ran the same statement %d times at %s: %s",
+            finding["method"], finding["path"], finding["count"], finding["call_site"], finding["statement"][:200],
+            extra={"trace_id": finding["trace_id"]}
+        )
+
+class QueryDiagnosticsMiddleware:
+    """リクエストの間に発行されたSQLを正規化して数え、終了時に N+1 を判定する"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not diagnostics_settings.diagnostics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        log = RequestQueryLog(scope["method"], scope["path"])
+        token = _request_query_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_query_log.reset(token)
+            _record_n_plus_one(log)
+
+# ----------------------------------------------------
+# 💡 エンジンへの登録
+# ----------------------------------------------------
+
+def install_query_diagnostics(engine):
+    """エンジンにカーソル実行のフックを登録する"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("diagnostics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("diagnostics_query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if not diagnostics_settings.diagnostics_enabled or conn.info.get("diagnostics_internal"):
+            return
+
+        log = _request_query_log.get()
+        is_slow = elapsed_ms >= diagnostics_settings.slow_query_ms
+        if log is None and not is_slow:
+            return
+
+        normalized = normalize_statement(statement) if log is not None else None
+        # 呼び出し元の取得はスタックをたどるため、必要なとき（リクエスト内で初出・スロークエリ）だけ行う
+        call_site = find_call_site() if is_slow or normalized not in log.counts else None
+        if log is not None:
+            log.add(normalized, call_site)
+        if is_slow:
+            _record_slow_query(conn, statement, parameters, executemany, elapsed_ms, call_site)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None:
+            starts = conn.info.get("diagnostics_query_start")
+            if starts:
+                starts.pop()
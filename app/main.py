@@ -2,18 +2,42 @@
 
 from fastapi import FastAPI # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
-from .database import Base, engine, init_db # Baseとengineをインポート
+from fastapi.responses import JSONResponse, PlainTextResponse # type: ignore
+from .database import Base, engine, init_db, settings as db_settings # Baseとengineをインポート
 from .api import endpoints as project_router # エンドポイントをインポート
+from .api import dashboard as dashboard_router
+from .api import admin as admin_router
+from .api import export as export_router
+from .api import analytics as analytics_router
+from .api import channel as channel_router
+from .api import shorts as shorts_router
+from .api import quality as quality_router
+from .api import history as history_router
+from .api.responses import ORJSONResponse, response_settings
+from .services.timer_events import timer_event_buffer
+from .services.events import project_event_hub
+from .metrics import MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, render_metrics
+from .diagnostics import QueryDiagnosticsMiddleware
+from .profiling import ProfilingMiddleware, profiling_settings
+from .tracing import TracingMiddleware, configure_trace_logging, shutdown_tracing, tracing_active
 
-# 💡 起動時に1回だけ初期化を実行
-try:
-    init_db()
-except Exception as e:
-    print(f"❌ DB Initialization failed: {e}")
+# app.* ロガー（サービスの警告など）の出力に trace_id を含める
+configure_trace_logging()
+
+# 💡 開発時（uvicorn 単体起動）は読み込み時に1回だけ初期化を実行
+#    本番では gunicorn のマスタープロセス（gunicorn.conf.py）か `python -m app.cli init-db` が
+#    ワーカー起動前に初期化するため、INIT_DB_ON_STARTUP=false で各ワーカーの初期化を省く
+if db_settings.init_db_on_startup:
+    try:
+        init_db()
+    except Exception as e:
+        print(f"❌ DB Initialization failed: {e}")
 
 app = FastAPI(
     title="動画制作効率化支援システム API",
-    version="1.0.0"
+    version="1.0.0",
+    # 💡 FAST_JSON=true で全エンドポイントのシリアライズを orjson に切り替える
+    default_response_class=ORJSONResponse if response_settings.fast_json else JSONResponse
 )
 
 # --- CORS 設定 ---
@@ -29,12 +53,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # すべてのメソッドを許可 (GET, POSTなど)
     allow_headers=["*"],
+    # デバッグ時のSQL発行数ヘッダーをフロントエンドから読めるようにする
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms", "X-Trace-Id"],
 )
 
+# --- リクエストのプロファイリング（PROFILE_TOKEN か PROFILE_SAMPLE_RATE を設定したときだけ有効）---
+#     計測ミドルウェアより内側に置き、メタデータにSQL発行数を含める
+if profiling_settings.enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# --- 計測ミドルウェア（ルートごとのレイテンシ・ステータス・SQL発行数）---
+app.add_middleware(MetricsMiddleware)
+# --- SQL診断ミドルウェア（N+1 検出）---
+app.add_middleware(QueryDiagnosticsMiddleware)
+# --- トレーシング（TRACING_ENABLED=true のときだけ有効）---
+#     一番外側に置き、内側のミドルウェアの記録（診断・プロファイル）にも trace_id を残す
+if tracing_active():
+    app.add_middleware(TracingMiddleware)
+
+# --- 終了時に書き込み待ちのタイマーイベントを反映し、LISTEN 接続を閉じる ---
+@app.on_event("shutdown")
+def flush_timer_events():
+    timer_event_buffer.close()
+    project_event_hub.close()
+    shutdown_tracing()
+
 # --- ルートエンドポイント（動作確認用）---
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Coding Partner API. System is running."}
 
+# --- Prometheus 形式のメトリクス ---
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # --- プロジェクトルーターを追加 ---
-app.include_router(project_router.router)
\ No newline at end of file
+app.include_router(project_router.router)
+app.include_router(dashboard_router.router)
+app.include_router(admin_router.router)
+app.include_router(export_router.router)
+app.include_router(analytics_router.router)
+app.include_router(channel_router.router)
+app.include_router(shorts_router.router)
+app.include_router(quality_router.router)
+app.include_router(history_router.router)
\ No newline at end of file
@@ -0,0 +1,276 @@
+# app/metrics.py
+#
+# リクエスト単位の計測（Prometheus テキスト形式で /metrics に出力する）
+#
+#   - ルートごとのレイテンシのヒストグラムとステータスコード別の件数、処理中のリクエスト数
+#   - SQLAlchemy のイベントフックで数えた、リクエストごとのSQL発行数とDB時間
+#
+# 計測値はプロセス内に保持するため、gunicorn の複数ワーカー構成では
+# 各ワーカーが自分の担当したリクエスト分だけを返す（worker ラベルで区別できる）。
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import event # type: ignore
+from sqlalchemy.engine import Engine # type: ignore
+
+# 計測の設定 (環境変数で上書き可能)
+class MetricsSettings(BaseSettings):
+    metrics_enabled: bool = True
+    # 💡 デバッグ時はレスポンスヘッダーにリクエストごとのSQL発行数とDB時間を載せる
+    debug: bool = False
+
+metrics_settings = MetricsSettings()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+QUERY_COUNT_HEADER = b"x-db-query-count"
+QUERY_TIME_HEADER = b"x-db-time-ms"
+
+# ルーティングに一致しなかったリクエストのラベル（パスをそのままラベルにすると種類が際限なく増えるため）
+UNMATCHED_ROUTE = "<unmatched>"
+
+LabelValues = Tuple[str, ...]
+
+# ----------------------------------------------------
+# 💡 メトリクスの入れ物
+# ----------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Iterable[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = ("worker",) + tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        return (_WORKER,) + tuple(labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}" for key, value in items
+        ]
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        # キーごとに [各バケットの件数..., 合計値, 件数]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = self.header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', _format_number(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', '+Inf'))} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_number(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {state[-1]}")
+        return lines
+
+_WORKER = str(os.getpid())
+
+def _reset_worker_label():
+    """フォーク後のワーカーでは自分の pid をラベルにする"""
+    global _WORKER
+    _WORKER = str(os.getpid())
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_worker_label)
+
+REQUESTS_TOTAL = Counter("http_requests_total", "Total HTTP requests.", ("method", "route", "status"))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request latency in seconds.", ("method", "route"))
+# 処理中の件数はルーティング前に数えるため、メソッド単位で集計する
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being processed.", ("method",))
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements issued per HTTP request.", ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL per HTTP request.", ("method", "route"))
+DB_STATEMENTS_TOTAL = Counter("db_statements_total", "Total SQL statements executed (including background work).")
+DB_SECONDS_TOTAL = Counter("db_seconds_total", "Total time spent executing SQL in seconds (including background work).")
+
+REGISTRY = [
+    REQUESTS_TOTAL, REQUEST_DURATION, REQUESTS_IN_PROGRESS,
+    REQUEST_DB_STATEMENTS, REQUEST_DB_SECONDS, DB_STATEMENTS_TOTAL, DB_SECONDS_TOTAL,
+]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def render_metrics() -> str:
+    """全メトリクスを Prometheus テキスト形式で出力する"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ----------------------------------------------------
+# 💡 リクエストごとのSQL計測
+#    ContextVar に置いた集計オブジェクトを、同期エンドポイントのスレッドプールからも共有する。
+# ----------------------------------------------------
+
+@dataclass
+class RequestDBStats:
+    statements: int = 0
+    seconds: float = 0.0
+
+_request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+def current_db_stats() -> Optional[RequestDBStats]:
+    """処理中のリクエストのSQL集計（リクエスト外なら None）"""
+    return _request_db_stats.get()
+
+@contextmanager
+def track_db_stats():
+    """ブロック内で発行されたSQLの件数と時間を数える（ベンチマーク・バッチ処理用）"""
+    stats = RequestDBStats()
+    token = _request_db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_db_stats.reset(token)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    DB_STATEMENTS_TOTAL.inc()
+    DB_SECONDS_TOTAL.inc(amount=elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # 失敗したSQLは after_cursor_execute が呼ばれないため、開始時刻だけ取り除く
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            starts.pop()
+
+# ----------------------------------------------------
+# 💡 計測ミドルウェア（ASGI）
+# ----------------------------------------------------
+
+def _route_label(scope) -> str:
+    """
+    リクエストに一致したルートのパステンプレート（/projects/{project_id} など）を返す。
+    ルーティング時に scope["route"] が設定されるため、アプリの処理後に参照する。
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+class MetricsMiddleware:
+    """
+    HTTPリクエストごとにレイテンシ・処理中件数・ステータスコードとSQL発行数を記録する。
+    ストリーミングレスポンスでも本文の送信完了までを計測するため、ASGIミドルウェアとして実装している。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics_settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestDBStats()
+        token = _request_db_stats.set(stats)
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+                if metrics_settings.debug:
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER, str(stats.statements).encode()))
+                    headers.append((QUERY_TIME_HEADER, f"{stats.seconds * 1000:.1f}".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = _route_label(scope)
+            REQUESTS_IN_PROGRESS.dec(method)
+            REQUESTS_TOTAL.inc(method, route, str(status_holder["status"]))
+            REQUEST_DURATION.observe(elapsed, method, route)
+            REQUEST_DB_STATEMENTS.observe(stats.statements, method, route)
+            REQUEST_DB_SECONDS.observe(stats.seconds, method, route)
+            _request_db_stats.reset(token)
@@ -0,0 +1,23 @@
+# app/models/channel.py
+
+from sqlalchemy import Column, Integer, BigInteger, Date, DateTime, Numeric, Text, Index, func # type: ignore
+from ..database import Base
+
+# t_channel_growth テーブルに対応するモデル (チャンネル全体の期間ごとの成長指標。YouTube Studio などから取り込む)
+class DBChannelGrowth(Base):
+    __tablename__ = 't_channel_growth'
+    __table_args__ = (
+        # 同じ期間の再取り込みを UPSERT にするための一意インデックス（期間での絞り込みにも使う）
+        Index('ux_channel_growth_period', 'start_date', 'end_date', unique=True),
+    )
+
+    record_id = Column(BigInteger, primary_key=True)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    views_count = Column(BigInteger, nullable=False)
+    subscriber_gain = Column(Integer, nullable=False)
+    watch_time_min = Column(BigInteger, nullable=False)
+    impression_count = Column(BigInteger, nullable=False)
+    avg_ctr = Column(Numeric(4, 2), nullable=False) # インプレッションのクリック率（%）
+    improvements_made = Column(Text) # その期間に行った改善施策のメモ
+    recorded_at = Column(DateTime, nullable=False, server_default=func.now())
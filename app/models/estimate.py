@@ -0,0 +1,19 @@
+# app/models/estimate.py
+
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, BigInteger, Float, func, text # type: ignore
+from sqlalchemy.dialects.postgresql import ARRAY # type: ignore
+from ..database import Base
+
+# t_task_estimate テーブルに対応するモデル (タスクテンプレートごとの実績時間の統計。見積もりの初期値に使う)
+class DBTaskEstimate(Base):
+    __tablename__ = 't_task_estimate'
+
+    task_template_id = Column(Integer, ForeignKey('m_task_template.task_template_id', ondelete='CASCADE'), primary_key=True)
+    sample_count = Column(Integer, nullable=False, server_default=text('0')) # 統計に使った実績の件数（直近 ESTIMATE_WINDOW 件まで）
+    median_min = Column(Float)
+    p80_min = Column(Float)
+    mean_min = Column(Float)
+    trend_min_per_task = Column(Float) # 完了1件ごとの実績時間の変化（Theil-Sen 推定の傾き）
+    sample_task_ids = Column(ARRAY(BigInteger), nullable=False, server_default=text("'{}'")) # 完了順の project_task_id
+    sample_values = Column(ARRAY(Float), nullable=False, server_default=text("'{}'")) # sample_task_ids に対応する actual_time_min
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
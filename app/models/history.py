@@ -0,0 +1,22 @@
+# app/models/history.py
+
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, LargeBinary, ForeignKey, Index, func # type: ignore
+from ..database import Base
+
+# t_artifact_history テーブルに対応するモデル (骨子・サムネイル・サマリーの版の履歴。直前の版との差分か全体を圧縮して保存する)
+class DBArtifactHistory(Base):
+    __tablename__ = 't_artifact_history'
+    __table_args__ = (
+        # 版の復元（直前のスナップショットから対象の版まで）と一覧の範囲検索用
+        Index('ux_artifact_history_revision', 'project_id', 'artifact', 'revision', unique=True),
+    )
+
+    history_id = Column(BigInteger, primary_key=True)
+    project_id = Column(BigInteger, ForeignKey('t_project.project_id', ondelete='CASCADE'), nullable=False)
+    artifact = Column(String(20), nullable=False) # (scaffold, thumbnail, summary)
+    revision = Column(Integer, nullable=False) # プロジェクト × 成果物ごとに1から振る版番号
+    is_snapshot = Column(Boolean, nullable=False) # TRUE: 全体、FALSE: 直前の版からの JSON Patch
+    payload = Column(LargeBinary, nullable=False) # zlib で圧縮した JSON
+    size_bytes = Column(Integer, nullable=False) # この版の全体の JSON のサイズ（圧縮前）
+    source = Column(String(30), nullable=False) # 版を作った操作 (baseline, generate, patch, regenerate_question, revert)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
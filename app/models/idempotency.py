@@ -0,0 +1,22 @@
+# app/models/idempotency.py
+
+from sqlalchemy import Column, Integer, String, DateTime, Index # type: ignore
+from sqlalchemy.dialects.postgresql import JSONB # type: ignore
+from datetime import datetime
+from ..database import Base
+
+# t_idempotency_key テーブルに対応するモデル (POSTの再送で処理を重複させないための記録)
+class DBIdempotencyKey(Base):
+    __tablename__ = 't_idempotency_key'
+
+    idempotency_key = Column(String(255), primary_key=True) # クライアントが Idempotency-Key ヘッダーで送る値
+    request_fingerprint = Column(String(64), nullable=False) # メソッド・パス・ボディのハッシュ
+    status = Column(String(20), nullable=False) # (processing, completed)
+    response_status = Column(Integer)
+    response_body = Column(JSONB)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_idempotency_key_expires', 'expires_at'),
+    )
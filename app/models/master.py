@@ -1,6 +1,6 @@
 # app/models/master.py
 
-from sqlalchemy import Column, Integer, String, Boolean, Text, ARRAY, ForeignKey # type: ignore
+from sqlalchemy import Column, Integer, String, Boolean, Text, ARRAY, ForeignKey, Index # type: ignore
 from ..database import Base
 
 # m_status モデル (t_project が参照)
@@ -37,4 +37,18 @@ class DBTransitionRule(Base):
     current_status_id = Column(Integer, ForeignKey('m_status.status_id'), nullable=False)
     next_status_id = Column(Integer, ForeignKey('m_status.status_id'), nullable=False)
     required_task_ids = Column(ARRAY(Integer), nullable=False) # 必要な完了済みタスクIDのリスト
-    is_active = Column(Boolean, nullable=False, default=True)
\ No newline at end of file
+    is_active = Column(Boolean, nullable=False, default=True)
+    require_quality_checks = Column(Boolean, nullable=False, default=False) # 必須の品質チェックがすべて済んでいることも条件にする
+
+# m_quality_checklist モデル (t_quality_check_result が参照)
+class DBQualityCheck(Base):
+    __tablename__ = 'm_quality_checklist'
+    __table_args__ = (
+        # シードの自然キー（NULL の対象タスクも同じ値として扱う）
+        Index('ux_quality_checklist_item', 'target_task_id', 'check_item', unique=True, postgresql_nulls_not_distinct=True),
+    )
+    check_id = Column(Integer, primary_key=True)
+    check_item = Column(String(255), nullable=False)
+    target_task_id = Column(Integer, ForeignKey('m_task_template.task_template_id')) # このタスクを含むプロジェクトだけに適用（NULL は全プロジェクト）
+    is_required = Column(Boolean, nullable=False, default=True)
+    is_active = Column(Boolean, nullable=False, default=True)
@@ -1,6 +1,6 @@
 # app/models/project.py
 
-from sqlalchemy import Column, Integer, String, BigInteger, Text, Boolean, DateTime, ForeignKey, ARRAY, JSON, func, Float # type: ignore
+from sqlalchemy import Column, Integer, String, BigInteger, Text, Boolean, DateTime, ForeignKey, ARRAY, JSON, func, Float, Index # type: ignore
 from sqlalchemy.orm import relationship # type: ignore
 from datetime import datetime
 from ..database import Base  # app/database.py で定義したBaseをインポート
@@ -27,9 +27,15 @@ class DBProject(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.now)
     published_at = Column(DateTime)
     progress_rate = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=1) # 書き込みごとに加算（ETag・キャッシュ用）
+    source_key = Column(String(255), nullable=True) # 一括インポート元での識別子（アプリで作成したものは NULL）
     
     # リレーションシップ定義（サブタスクを取得するために使用）
     tasks = relationship("DBProjectTask", back_populates="project")
+
+    __table_args__ = (
+        Index('ux_project_source_key', 'source_key', unique=True),
+    )
     
 # t_project_task テーブルに対応するモデル
 class DBProjectTask(Base):
@@ -50,13 +56,28 @@ class DBProjectTask(Base):
 # t_timer_log テーブルに対応するモデル
 class DBTimerLog(Base):
     __tablename__ = 't_timer_log'
+    # 💡 start_time の月ごとのレンジパーティション（パーティションの管理は services/partitions.py）
+    __table_args__ = {'postgresql_partition_by': 'RANGE (start_time)'}
     
-    log_id = Column(BigInteger, primary_key=True, index=True)
+    log_id = Column(BigInteger, primary_key=True, autoincrement=True)
     # 外部キー: プロジェクトタスク
     project_task_id = Column(BigInteger, ForeignKey('t_project_task.project_task_id'), nullable=False) 
-    start_time = Column(DateTime, nullable=False, default=func.now())
+    # 主キーにパーティションキーを含める（ORMの UPDATE / refresh も1つのパーティションだけを見る）
+    start_time = Column(DateTime, primary_key=True, default=func.now())
     end_time = Column(DateTime, nullable=True)
     duration_min = Column(Float, nullable=True) # 分単位で記録
+    section_index = Column(Integer, nullable=True) # 収録セクション（質問）のインデックス
+    memo = Column(Text, nullable=True)
     
     # リレーションシップ (DBProjectTask から参照可能)
-    task = relationship("DBProjectTask", back_populates="timer_logs")
\ No newline at end of file
+    task = relationship("DBProjectTask", back_populates="timer_logs")
+
+# t_timer_event テーブルに対応するモデル (オフライン送信イベントの冪等性確保用)
+class DBTimerEvent(Base):
+    __tablename__ = 't_timer_event'
+
+    event_id = Column(String(64), primary_key=True) # クライアント生成の冪等ID
+    project_task_id = Column(BigInteger, ForeignKey('t_project_task.project_task_id'), nullable=False)
+    event_type = Column(String(10), nullable=False) # (start, stop, lap)
+    client_ts = Column(DateTime, nullable=False) # クライアント側で記録した発生時刻
+    received_at = Column(DateTime, nullable=False, default=datetime.now)
\ No newline at end of file
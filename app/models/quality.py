@@ -0,0 +1,19 @@
+# app/models/quality.py
+
+from sqlalchemy import Column, Integer, BigInteger, Boolean, DateTime, Text, ForeignKey, Index # type: ignore
+from ..database import Base
+
+# t_quality_check_result テーブルに対応するモデル (プロジェクトごとの品質チェックの結果。1プロジェクト × 1チェック項目で1行)
+class DBQualityCheckResult(Base):
+    __tablename__ = 't_quality_check_result'
+    __table_args__ = (
+        # チェックリスト単位の一括保存（ON CONFLICT）とプロジェクトごとの取得用
+        Index('ux_quality_check_result', 'project_id', 'check_id', unique=True),
+    )
+
+    result_id = Column(BigInteger, primary_key=True)
+    project_id = Column(BigInteger, ForeignKey('t_project.project_id'), nullable=False)
+    check_id = Column(Integer, ForeignKey('m_quality_checklist.check_id'), nullable=False)
+    is_checked = Column(Boolean, nullable=False)
+    checked_at = Column(DateTime) # チェックを付けた日時（外すと NULL）
+    memo = Column(Text)
@@ -0,0 +1,22 @@
+# app/models/rollup.py
+
+from sqlalchemy import Column, Integer, BigInteger, Date, DateTime, Float, ForeignKey, func, text # type: ignore
+from ..database import Base
+
+# t_time_rollup_daily テーブルに対応するモデル (日付 × タスクテンプレートごとの計測時間。カテゴリは m_task_template から引く)
+class DBTimeRollupDaily(Base):
+    __tablename__ = 't_time_rollup_daily'
+
+    day = Column(Date, primary_key=True) # ログの開始日
+    task_template_id = Column(Integer, ForeignKey('m_task_template.task_template_id', ondelete='CASCADE'), primary_key=True)
+    minutes = Column(Float, nullable=False, server_default=text('0'))
+    log_count = Column(Integer, nullable=False, server_default=text('0'))
+
+# t_time_rollup_project テーブルに対応するモデル (プロジェクトごとの見積/実績時間の合計)
+class DBTimeRollupProject(Base):
+    __tablename__ = 't_time_rollup_project'
+
+    project_id = Column(BigInteger, ForeignKey('t_project.project_id', ondelete='CASCADE'), primary_key=True)
+    est_total_min = Column(Integer, nullable=False, server_default=text('0'))
+    actual_total_min = Column(Float, nullable=False, server_default=text('0'))
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
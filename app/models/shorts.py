@@ -0,0 +1,22 @@
+# app/models/shorts.py
+
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Index, text # type: ignore
+from ..database import Base
+
+# t_shorts_management テーブルに対応するモデル (VOD → Shorts ファネル。VOD の区間ごとの Shorts 候補と制作状況)
+class DBShortsManagement(Base):
+    __tablename__ = 't_shorts_management'
+    __table_args__ = (
+        # VOD ごとの一覧・状態での絞り込み（keyset ページングのため shorts_id まで含める）
+        Index('ix_shorts_project_status', 'vod_project_id', 'status', 'shorts_id'),
+        # チャンネル全体の状態別一覧（未作成の候補の消化など）
+        Index('ix_shorts_status', 'status', 'shorts_id'),
+    )
+
+    shorts_id = Column(BigInteger, primary_key=True)
+    vod_project_id = Column(BigInteger, ForeignKey('t_project.project_id'), nullable=False)
+    source_timestamp_sec = Column(Integer, nullable=False) # VOD 内の切り出し開始位置（秒）
+    shorts_theme = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False) # (未作成, 編集済, 公開済)
+    is_high_hook = Column(Boolean, nullable=False, server_default=text('false'))
+    published_at = Column(DateTime)
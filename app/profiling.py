@@ -0,0 +1,346 @@
+# app/profiling.py
+#
+# リクエスト単位のオンデマンド・プロファイリング（サンプリング方式）
+#
+#   - X-Profile ヘッダーに PROFILE_TOKEN を付けたリクエスト、または PROFILE_SAMPLE_RATE の割合で
+#     選ばれたリクエストだけを、別スレッドから一定間隔でスタックを採取して計測する
+#   - 結果は collapsed-stack（flamegraph.pl 等）と speedscope 形式で PROFILE_DIR に保存し、
+#     /admin/profiles で一覧・ダウンロードする（保存は別スレッドで行い、リクエストの処理時間に含めない）
+#
+# 同期エンドポイントはスレッドプールで実行されるため、イベントループのスレッドに加えて、
+# エンドポイント実行中のスレッドを ProfiledRoute で登録し、スレッドごとのプロファイルとして記録する。
+# PROFILE_TOKEN も PROFILE_SAMPLE_RATE も未設定の場合、ミドルウェアもエンドポイントのラップも行わない。
+
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as CounterDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.routing import APIRoute # type: ignore
+from pydantic_settings import BaseSettings # type: ignore
+
+from .metrics import current_db_stats
+from .tracing import current_trace_id
+
+# プロファイリングの設定 (環境変数で上書き可能)
+class ProfilingSettings(BaseSettings):
+    profile_token: Optional[str] = None # X-Profile ヘッダーにこの値を付けたリクエストを計測する
+    profile_sample_rate: float = 0.0 # 0〜1。ヘッダーなしでも計測するリクエストの割合
+    profile_interval_ms: float = 1.0 # スタックを採取する間隔（ミリ秒）
+    profile_dir: str = "/tmp/app-profiles" # 保存先（複数ワーカーで共有できる場所にする）
+    profile_keep: int = 100 # 保存しておく件数（古いものから削除）
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.profile_token) or self.profile_sample_rate > 0
+
+profiling_settings = ProfilingSettings()
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+MAX_STACK_DEPTH = 200
+
+# ----------------------------------------------------
+# 💡 サンプラー
+# ----------------------------------------------------
+
+class ProfileSession:
+    """1リクエスト分の採取状態。登録されたスレッドのスタックだけを採取する"""
+
+    def __init__(self, interval_sec: float):
+        self.interval_sec = interval_sec
+        self.thread_names: Dict[int, str] = {}
+        self.samples: Dict[str, CounterDict] = {}
+        self._active: Dict[int, int] = {} # thread id -> 登録の入れ子数
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def register_thread(self, name: str):
+        ident = threading.get_ident()
+        with self._lock:
+            self._active[ident] = self._active.get(ident, 0) + 1
+            self.thread_names.setdefault(ident, f"{name}-{ident}")
+
+    def unregister_thread(self):
+        ident = threading.get_ident()
+        with self._lock:
+            remaining = self._active.get(ident, 0) - 1
+            if remaining > 0:
+                self._active[ident] = remaining
+            else:
+                self._active.pop(ident, None)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_sec):
+            frames = sys._current_frames()
+            with self._lock:
+                targets = [(ident, self.thread_names[ident]) for ident in self._active]
+            for ident, name in targets:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = _collapse(frame)
+                self.samples.setdefault(name, CounterDict())[stack] += 1
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+@functools.lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    """site-packages 以下はパッケージからの相対パス、アプリのコードはリポジトリからの相対パスにする"""
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    app_root = str(Path(__file__).resolve().parent.parent) + os.sep
+    return filename[len(app_root):] if filename.startswith(app_root) else filename
+
+def _collapse(frame) -> str:
+    labels: List[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+_profile_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+# ----------------------------------------------------
+# 💡 保存形式
+# ----------------------------------------------------
+
+def to_collapsed(session: ProfileSession) -> str:
+    """スレッド名をルートにした collapsed-stack 形式（1行 = 'frame;frame;... 件数'）"""
+    lines = []
+    for thread_name, counter in session.samples.items():
+        for stack, count in counter.most_common():
+            lines.append(f"{thread_name};{stack} {count}")
+    return "\n".join(lines) + "\n"
+
+def to_speedscope(session: ProfileSession, name: str) -> Dict[str, Any]:
+    """speedscope の sampled 形式（スレッドごとに1プロファイル）"""
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[str, int] = {}
+    profiles = []
+    interval_ms = session.interval_sec * 1000
+
+    for thread_name, counter in session.samples.items():
+        samples, weights = [], []
+        for stack, count in counter.most_common():
+            indices = []
+            for label in stack.split(";"):
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    func, _, location = label.partition(" (")
+                    file, _, line = location.rstrip(")").rpartition(":")
+                    frames.append({"name": func, "file": file, "line": int(line) if line.isdigit() else None})
+                indices.append(frame_index[label])
+            samples.append(indices)
+            weights.append(count * interval_ms)
+        profiles.append({
+            "type": "sampled",
+            "name": thread_name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        })
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "app.profiling",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
+
+def _profile_dir() -> Path:
+    path = Path(profiling_settings.profile_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def save_profile(session: ProfileSession, metadata: Dict[str, Any]) -> str:
+    """プロファイルとメタデータを保存し、古いものを削除する"""
+    directory = _profile_dir()
+    profile_id = metadata["profile_id"]
+    name = f"{metadata['method']} {metadata['path']} ({metadata['duration_ms']}ms)"
+
+    (directory / f"{profile_id}.collapsed.txt").write_text(to_collapsed(session), encoding="utf-8")
+    (directory / f"{profile_id}.speedscope.json").write_text(json.dumps(to_speedscope(session, name)), encoding="utf-8")
+    # メタデータは最後に書き、一覧には書き込みが完了したものだけが載るようにする
+    (directory / f"{profile_id}.meta.json").write_text(json.dumps(metadata, ensure_ascii=False), encoding="utf-8")
+
+    _prune(directory)
+    return profile_id
+
+def _sorted_metas(directory: Path) -> List[Path]:
+    """メタデータファイルを新しい順に返す"""
+    def mtime(path: Path) -> float:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return 0.0
+    return sorted(directory.glob("*.meta.json"), key=mtime, reverse=True)
+
+def _prune(directory: Path):
+    metas = _sorted_metas(directory)
+    for meta in metas[profiling_settings.profile_keep:]:
+        profile_id = meta.name[: -len(".meta.json")]
+        for path in directory.glob(f"{profile_id}.*"):
+            path.unlink(missing_ok=True)
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """保存済みプロファイルのメタデータを新しい順に返す"""
+    directory = Path(profiling_settings.profile_dir)
+    if not directory.exists():
+        return []
+    results = []
+    for meta in _sorted_metas(directory)[:limit]:
+        try:
+            results.append(json.loads(meta.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return results
+
+PROFILE_FORMATS = {
+    "speedscope": ("speedscope.json", "application/json"),
+    "collapsed": ("collapsed.txt", "text/plain; charset=utf-8"),
+}
+
+def get_profile_path(profile_id: str, format: str) -> Optional[Tuple[Path, str]]:
+    """プロファイルファイルのパスとメディアタイプ（存在しない・不正なIDは None）"""
+    if not PROFILE_ID_PATTERN.match(profile_id) or format not in PROFILE_FORMATS:
+        return None
+    suffix, media_type = PROFILE_FORMATS[format]
+    path = Path(profiling_settings.profile_dir) / f"{profile_id}.{suffix}"
+    return (path, media_type) if path.exists() else None
+
+# 保存（形式の変換とファイル書き込み）は別スレッドで行い、計測したリクエストとイベントループを待たせない
+_profile_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+
+def _save_profile_in_background(session: ProfileSession, metadata: Dict[str, Any]):
+    try:
+        save_profile(session, metadata)
+    except OSError as e:
+        logger.warning("⚠️ Failed to save profile %s: %s", metadata["profile_id"], e, extra={"trace_id": metadata["trace_id"]})
+
+# ----------------------------------------------------
+# 💡 ミドルウェアとルート
+# ----------------------------------------------------
+
+def _should_profile(scope) -> Optional[str]:
+    """計測するなら理由（'header' / 'sampled'）を返す"""
+    token = profiling_settings.profile_token
+    if token:
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER and value.decode("latin-1") == token:
+                return "header"
+    if profiling_settings.profile_sample_rate > 0 and random.random() < profiling_settings.profile_sample_rate:
+        return "sampled"
+    return None
+
+class ProfilingMiddleware:
+    """対象のリクエストだけサンプラーを起動し、終了時にプロファイルを保存する"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        trigger = _should_profile(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        session = ProfileSession(profiling_settings.profile_interval_ms / 1000)
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode())]}
+            await send(message)
+
+        token = _profile_session.set(session)
+        session.register_thread("event-loop")
+        session.start()
+        started_at = datetime.now()
+        trace_id = current_trace_id()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            session.stop()
+            session.unregister_thread()
+            _profile_session.reset(token)
+
+            route = scope.get("route")
+            db_stats = current_db_stats()
+            metadata = {
+                "profile_id": profile_id,
+                "trigger": trigger,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "trace_id": trace_id,
+                "status": status_holder["status"],
+                "started_at": started_at.isoformat(),
+                "duration_ms": duration_ms,
+                "interval_ms": profiling_settings.profile_interval_ms,
+                "samples": {name: sum(counter.values()) for name, counter in session.samples.items()},
+                "db_statements": db_stats.statements if db_stats else None,
+                "db_time_ms": round(db_stats.seconds * 1000, 2) if db_stats else None,
+            }
+            _profile_writer.submit(_save_profile_in_background, session, metadata)
+
+def _profiled(endpoint):
+    """エンドポイント実行中のスレッドを、計測中のリクエストのサンプリング対象に登録する"""
+    if inspect.iscoroutinefunction(endpoint):
+        # 非同期エンドポイントはイベントループのスレッドで動くため、登録は不要
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        session = _profile_session.get()
+        if session is None:
+            return endpoint(*args, **kwargs)
+        session.register_thread("worker")
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            session.unregister_thread()
+
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """プロファイリングが有効な場合だけ、同期エンドポイントを _profiled でラップするルート"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if profiling_settings.enabled:
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
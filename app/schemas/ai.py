@@ -1,7 +1,7 @@
 # app/schemas/ai.py
 
 from pydantic import BaseModel, Field, ConfigDict # type: ignore
-from typing import List, Optional
+from typing import Any, List, Literal, Optional
 
 # --- AIが生成する質問リストの各項目 ---
 class DiscussionQuestion(BaseModel):
@@ -42,4 +42,27 @@ class ProjectSummary(BaseModel):
     habit_improvement_suggestion: str = Field(..., description="習慣化を促進するための具体的な行動提案（例: 収録作業は午前中に実施する、休憩を定期的に取るなど）")
 
     # 💡 Pydantic v2 エラー対策の継続
-    model_config = ConfigDict(extra='ignore')
\ No newline at end of file
+    model_config = ConfigDict(extra='ignore')
+
+# --- 骨子の部分更新（JSON Patch の1操作）---
+class ScaffoldPatchOperation(BaseModel):
+    """RFC 6902 の add / remove / replace / test（path は scaffold_data の中の JSON Pointer）"""
+    op: Literal["add", "remove", "replace", "test"]
+    path: str = Field(..., description="例: /discussion_flow/2/question_text")
+    value: Any = Field(None, description="add / replace / test で使う値")
+
+# --- 質問1問のフィールド単位の更新 ---
+class DiscussionQuestionPatch(BaseModel):
+    question_text: Optional[str] = None
+    target_time_min: Optional[float] = Field(None, gt=0)
+    angle_type: Optional[str] = None
+
+# --- 質問1問の再生成 ---
+class QuestionRegenerateRequest(BaseModel):
+    instruction: str = Field("", max_length=500, description="AIへの追加の指示（例: もっと具体的な体験を聞く質問に）")
+
+# --- 部分更新の結果 ---
+class ScaffoldPatchResult(BaseModel):
+    project_id: int
+    version: int = Field(..., description="更新後のバージョン（次の更新の If-Match には ETag ヘッダーの値を使う）")
+    question: Optional[DiscussionQuestion] = Field(None, description="再生成した質問（再生成のときだけ）")
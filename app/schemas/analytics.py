@@ -0,0 +1,45 @@
+# app/schemas/analytics.py
+
+from pydantic import BaseModel, Field # type: ignore
+from typing import Optional
+from datetime import date, datetime
+
+# --- 日別の計測時間 ---
+class TimeByDay(BaseModel):
+    day: date
+    minutes: float
+    log_count: int
+
+# --- カテゴリ別の計測時間 ---
+class TimeByCategory(BaseModel):
+    task_category: str
+    minutes: float
+    log_count: int
+
+# --- タスクテンプレート別の計測時間 ---
+class TimeByTemplate(BaseModel):
+    task_template_id: int
+    task_name: str
+    task_category: str
+    minutes: float
+    log_count: int
+
+# --- 期間内の計測時間の内訳 ---
+class TimeBreakdown(BaseModel):
+    date_from: date = Field(..., description="集計期間の開始日（含む）")
+    date_to: date = Field(..., description="集計期間の終了日（含まない）")
+    total_min: float = Field(..., description="期間内の計測時間の合計（分）")
+    log_count: int
+    by_day: list[TimeByDay]
+    by_category: list[TimeByCategory] = Field(..., description="計測時間の多い順")
+    by_template: list[TimeByTemplate] = Field(..., description="計測時間の多い順")
+
+# --- プロジェクトごとの見積/実績 ---
+class ProjectTimeComparison(BaseModel):
+    project_id: int
+    theme: str
+    created_at: datetime
+    est_total_min: int = Field(..., description="見積時間の合計（分）")
+    actual_total_min: float = Field(..., description="実績時間の合計（分）")
+    diff_min: float = Field(..., description="実績 - 見積（分）")
+    actual_ratio: Optional[float] = Field(None, description="実績 / 見積（見積が0の場合は null）")
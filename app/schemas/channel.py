@@ -0,0 +1,65 @@
+# app/schemas/channel.py
+
+from pydantic import BaseModel, Field, model_validator # type: ignore
+from typing import Optional, Literal
+from datetime import date
+
+# --- 入力スキーマ (チャンネル成長指標の1期間分) ---
+class ChannelGrowthIn(BaseModel):
+    start_date: date
+    end_date: date = Field(..., description="期間の最終日（含む）。日次データなら start_date と同じ日")
+    views_count: int = Field(..., ge=0)
+    subscriber_gain: int = Field(..., description="登録者の増減（解除が多ければ負）")
+    watch_time_min: int = Field(..., ge=0, description="総再生時間（分）")
+    impression_count: int = Field(..., ge=0)
+    avg_ctr: float = Field(..., ge=0, le=99.99, description="インプレッションのクリック率（%）。NUMERIC(4, 2) に収まる範囲")
+    improvements_made: Optional[str] = Field(None, description="その期間に行った改善施策のメモ")
+
+    @model_validator(mode="after")
+    def check_period(self):
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be earlier than start_date")
+        return self
+
+# --- 取り込み結果 ---
+class ChannelGrowthIngestResult(BaseModel):
+    received: int = Field(..., description="受け取った行数")
+    inserted: int
+    updated: int = Field(..., description="同じ期間の既存行を上書きした件数")
+
+# --- 時系列の1区間 ---
+class ChannelGrowthMetrics(BaseModel):
+    views: int
+    subscribers: int = Field(..., description="登録者の増減の合計")
+    watch_time_min: int
+    impressions: int
+    ctr: Optional[float] = Field(None, description="インプレッション数で重み付けしたクリック率（%）")
+
+class ChannelGrowthAverages(BaseModel):
+    views: Optional[float] = None
+    subscribers: Optional[float] = None
+    watch_time_min: Optional[float] = None
+    impressions: Optional[float] = None
+    ctr: Optional[float] = None
+
+class ChannelGrowthPoint(BaseModel):
+    period: date = Field(..., description="区間の初日（bucket ごとに日・週の月曜日・月初）")
+    row_count: int = Field(..., description="区間に含まれる取り込み行の数")
+    metrics: ChannelGrowthMetrics
+    moving_avg: ChannelGrowthAverages = Field(..., description="直近 window 区間の移動平均（ctr は重み付き）")
+    delta: Optional[ChannelGrowthMetrics] = Field(None, description="1つ前の区間との差")
+
+# --- 期間全体の比較 ---
+class ChannelGrowthComparison(BaseModel):
+    current: ChannelGrowthMetrics
+    previous: ChannelGrowthMetrics = Field(..., description="同じ長さの直前の期間")
+    delta: ChannelGrowthMetrics
+    change_rate: ChannelGrowthAverages = Field(..., description="直前の期間からの増減率（直前が0の項目は null）")
+
+class ChannelGrowthSeries(BaseModel):
+    date_from: date
+    date_to: date
+    bucket: Literal["day", "week", "month"]
+    window: int
+    points: list[ChannelGrowthPoint]
+    summary: ChannelGrowthComparison
@@ -0,0 +1,36 @@
+# app/schemas/dashboard.py
+
+from pydantic import BaseModel, Field # type: ignore
+from typing import Optional
+from datetime import datetime
+
+# --- 計測中タイマー ---
+class DashboardActiveTimer(BaseModel):
+    task_id: int = Field(..., description="計測中のタスクテンプレートID")
+    start_time: datetime
+
+# --- AI生成物の有無 ---
+class DashboardArtifacts(BaseModel):
+    scaffold: bool = Field(..., description="トーク骨子が生成済みか")
+    thumbnail: bool = Field(..., description="サムネイルコンセプトが生成済みか")
+    summary: bool = Field(..., description="サマリーが生成済みか")
+
+# --- プロジェクトごとの集計 ---
+class DashboardProject(BaseModel):
+    project_id: int
+    theme: str
+    current_status_id: int
+    status_name: str
+    progress_rate: int
+    version: int
+    task_count: int
+    completed_task_count: int
+    est_total_min: int = Field(..., description="見積時間の合計（分）")
+    actual_total_min: float = Field(..., description="実績時間の合計（分）")
+    active_timer: Optional[DashboardActiveTimer] = None
+    artifacts: DashboardArtifacts
+
+# --- ダッシュボード全体 ---
+class Dashboard(BaseModel):
+    generated_at: datetime
+    projects: list[DashboardProject]
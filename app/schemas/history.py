@@ -0,0 +1,37 @@
+# app/schemas/history.py
+
+from pydantic import BaseModel, Field # type: ignore
+from typing import Any, List, Literal, Optional
+from datetime import datetime
+
+ArtifactName = Literal["scaffold", "thumbnail", "summary"]
+
+# --- 版のメタデータ（一覧用。中身は含まない）---
+class ArtifactRevisionInfo(BaseModel):
+    revision: int
+    is_snapshot: bool = Field(..., description="全体を保存した版か（false は直前の版からの差分）")
+    source: str = Field(..., description="版を作った操作 (baseline, generate, patch, regenerate_question, revert)")
+    size_bytes: int = Field(..., description="この版の全体の JSON のサイズ（圧縮前）")
+    stored_bytes: int = Field(..., description="実際に保存しているサイズ（圧縮後）")
+    created_at: datetime
+
+class ArtifactHistoryPage(BaseModel):
+    artifact: ArtifactName
+    items: List[ArtifactRevisionInfo]
+    next_before_revision: Optional[int] = Field(None, description="さらに古い版を取得するときに before_revision に渡す値")
+
+# --- 復元した版 ---
+class ArtifactRevision(BaseModel):
+    artifact: ArtifactName
+    revision: int
+    document: Any
+
+# --- 巻き戻し ---
+class ArtifactRevertRequest(BaseModel):
+    revision: int = Field(..., ge=1, description="戻す版")
+
+class ArtifactRevertResult(BaseModel):
+    artifact: ArtifactName
+    reverted_to: int
+    revision: int = Field(..., description="巻き戻しとして追加した版")
+    document: Any
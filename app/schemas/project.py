@@ -1,7 +1,7 @@
 # app/schemas/project.py
 
 from pydantic import BaseModel, Field, ConfigDict # type: ignore
-from typing import Optional, Any
+from typing import Optional, Any, Literal
 from datetime import datetime, timedelta
 
 # --- 入力スキーマ (プロジェクト作成時) ---
@@ -33,11 +33,40 @@ class Project(BaseModel):
     progress_rate: int = Field(0, description="プロジェクトの全体進捗率 (0-100)")
     scaffold_data: Any # JSONBフィールドはAnyで受け取る
     created_at: datetime
+    version: int = Field(1, description="書き込みごとに加算されるバージョン")
     tasks: list[ProjectTask] = [] # 紐づくサブタスクのリスト
     tasks: list[ProjectTask] = [] # 💡 ProjectTask スキーマを使用
     
     model_config = ConfigDict(from_attributes=True, extra='ignore') # 不要なフィールドを無視する設定
 
+# --- 出力スキーマ (タイマー集計) ---
+class TimerSummary(BaseModel):
+    """プロジェクト全体のタイマー集計"""
+    total_est_min: int = Field(..., description="見積時間の合計（分）")
+    total_actual_min: float = Field(..., description="実績時間の合計（分）")
+    log_count: int = Field(..., description="タイマーログの件数")
+    running_task_ids: list[int] = Field(..., description="計測中のタスクテンプレートID")
+    last_activity_at: Optional[datetime] = Field(None, description="最後にタイマーが開始・停止された時刻")
+
+# --- 出力スキーマ (fields / include 指定時のプロジェクト) ---
+class ProjectView(BaseModel):
+    """fields / include で要求された項目だけを返すプロジェクトのレスポンス"""
+    project_id: int
+    current_status_id: Optional[int] = None
+    theme: Optional[str] = None
+    input_angle_id: Optional[int] = None
+    progress_rate: Optional[int] = None
+    created_at: Optional[datetime] = None
+    version: Optional[int] = None
+    final_title: Optional[str] = None
+    final_description: Optional[str] = None
+    published_at: Optional[datetime] = None
+    scaffold_data: Any = None
+    thumbnail_concept: Any = None
+    summary_data: Any = None
+    tasks: Optional[list[ProjectTask]] = None
+    timer_summary: Optional[TimerSummary] = None
+
 # --- タイマー操作用のスキーマ ---
 class TimerStart(BaseModel):
     """タイマー開始時のレスポンス"""
@@ -53,6 +82,28 @@ class TimerStop(BaseModel):
     duration_min: float
     message: str = "Timer stopped and log saved."
 
+# --- オフライン送信用タイマーイベントのスキーマ ---
+class TimerEventIn(BaseModel):
+    """クライアントがローカルにキューイングしたタイマーイベント1件"""
+    event_id: str = Field(..., min_length=1, max_length=64, description="クライアント生成の冪等ID (UUID推奨)")
+    task_id: int = Field(..., description="タスクテンプレートID")
+    event_type: Literal['start', 'stop', 'lap'] = Field(..., description="イベント種別 (lap は停止と同時に次の計測を開始)")
+    client_ts: datetime = Field(..., description="クライアント側でイベントが発生した時刻")
+    section_index: Optional[int] = Field(None, description="収録セクション（質問）のインデックス")
+    memo: Optional[str] = None
+
+class TimerEventBatch(BaseModel):
+    """タイマーイベントのバッチ送信"""
+    events: list[TimerEventIn] = Field(..., max_length=1000)
+
+class TimerEventAck(BaseModel):
+    """タイマーイベント受付時のレスポンス"""
+    accepted: int = Field(..., description="新たに受け付けたイベント数")
+    duplicates: int = Field(..., description="送信済み（重複）として無視したイベント数")
+    pending: int = Field(..., description="書き込み待ちのイベント数")
+    pending_event_ids: list[str] = Field(default_factory=list, description="このバッチのうち、まだDBに書き込まれていない（メモリ上のバッファにしかない）イベントの event_id")
+    message: str = "Timer events queued."
+
 # --- タスクテンプレートのマスタデータ用スキーマ ---
 class TaskTemplateBase(BaseModel):
     task_name: str = Field(..., description="タスクテンプレート名 (例: 企画・構成案作成)")
@@ -67,4 +118,17 @@ class TaskTemplateCreate(TaskTemplateBase):
 
 class TaskTemplate(TaskTemplateBase):
     """DBからの読み取り・レスポンス用スキーマ"""
-    task_template_id: int
\ No newline at end of file
+    task_template_id: int
+
+class TaskEstimate(BaseModel):
+    """タスクテンプレートごとの実績時間の統計（見積もりエンジン）"""
+    task_template_id: int
+    task_name: str
+    default_est_time_min: int = Field(..., description="テンプレートの既定の見積もり時間（分）")
+    seed_est_time_min: int = Field(..., description="新規プロジェクトで使う見積もり時間（分）")
+    sample_count: int = Field(..., description="統計に使った実績の件数（直近のみ）")
+    median_min: Optional[float] = None
+    p80_min: Optional[float] = None
+    mean_min: Optional[float] = None
+    trend_min_per_task: Optional[float] = Field(None, description="完了1件ごとの実績時間の変化（分）。負なら短縮傾向")
+    updated_at: Optional[datetime] = None
\ No newline at end of file
@@ -0,0 +1,33 @@
+# app/schemas/quality.py
+
+from pydantic import BaseModel, Field # type: ignore
+from typing import List, Optional
+from datetime import datetime
+
+# --- チェック項目と結果 ---
+class QualityCheckItem(BaseModel):
+    check_id: int
+    check_item: str
+    target_task_id: Optional[int] = Field(None, description="このタスクを含むプロジェクトに適用される項目（NULL は全プロジェクト）")
+    target_task_name: Optional[str] = None
+    is_required: bool
+    is_checked: bool
+    checked_at: Optional[datetime] = None
+    memo: Optional[str] = None
+
+# --- プロジェクトのチェックリスト ---
+class QualityChecklist(BaseModel):
+    project_id: int
+    items: List[QualityCheckItem]
+    checked_count: int
+    pending_required_count: int = Field(..., description="まだ済んでいない必須項目の数（0 で品質チェックを条件にした遷移が可能）")
+    status_changed: bool = Field(False, description="保存によってプロジェクトのステータスが遷移したか")
+
+# --- 結果の一括保存 ---
+class QualityCheckResultIn(BaseModel):
+    check_id: int
+    is_checked: bool
+    memo: Optional[str] = Field(None, description="省略時は既存のメモを残す")
+
+class QualityCheckResultBatch(BaseModel):
+    results: List[QualityCheckResultIn] = Field(..., min_length=1, max_length=500)
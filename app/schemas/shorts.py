@@ -0,0 +1,43 @@
+# app/schemas/shorts.py
+
+from pydantic import BaseModel, Field, ConfigDict # type: ignore
+from typing import List, Literal, Optional
+from datetime import datetime
+
+ShortsStatus = Literal["未作成", "編集済", "公開済"]
+
+# --- Shorts 候補・制作状況 ---
+class Shorts(BaseModel):
+    shorts_id: int
+    vod_project_id: int
+    source_timestamp_sec: int = Field(..., description="VOD 内の切り出し開始位置（秒）")
+    shorts_theme: str
+    status: ShortsStatus
+    is_high_hook: bool = Field(..., description="目標より長く話した区間（フックが強い候補）")
+    published_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class ShortsPage(BaseModel):
+    items: List[Shorts]
+    next_after_id: Optional[int] = Field(None, description="次のページを取得するときに after_id に渡す値（最後のページでは null）")
+
+# --- 候補の抽出 ---
+class ShortsExtractRequest(BaseModel):
+    vod_project_ids: List[int] = Field(..., min_length=1, max_length=1000, description="候補を抽出する VOD プロジェクトのID")
+
+class ShortsExtractResult(BaseModel):
+    removed: int = Field(..., description="作り直したため削除した未作成の候補の数")
+    inserted: int
+    candidates: List[Shorts]
+
+# --- 状態の遷移 ---
+class ShortsStatusUpdate(BaseModel):
+    status: ShortsStatus
+    published_at: Optional[datetime] = Field(None, description="公開済にするときの公開日時（省略時は現在時刻）")
+
+class ShortsBulkStatusUpdate(ShortsStatusUpdate):
+    shorts_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class ShortsBulkStatusResult(BaseModel):
+    updated: List[Shorts]
+    skipped_ids: List[int] = Field(..., description="存在しないか、現在の状態から遷移できなかったID")
@@ -3,32 +3,113 @@
 from google import genai
 from google.genai import types # type: ignore
 from google.genai.errors import APIError # type: ignore
+from sqlalchemy import text # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 from ..models.master import DBAngle, DBTaskTemplate
 from ..models.project import DBProject, DBProjectTask
-from ..schemas.ai import ProjectSummary, TalkScaffold
+from ..schemas.ai import DiscussionQuestion, ProjectSummary, TalkScaffold
+from .artifact_history import record_artifact_revision
+from .events import publish_project_event
+from .scaffold_patch import VersionConflictError
+from .summary_context import get_summary_context_json
+from ..tracing import traced_span
 from pydantic_settings import BaseSettings # type: ignore
 import os
 import json
-from typing import Dict, Any, List
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 # 環境変数を読み込むための設定
 class AISettings(BaseSettings):
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "DUMMY_KEY")
+    # 💡 "fake" にすると Gemini を呼ばずに疑似LLM（services/fake_llm.py）を使う（負荷試験・ローカル開発用）
+    ai_backend: str = "gemini"
+    fake_llm_latency_ms: int = 0 # 疑似LLMの応答待ち時間（ミリ秒）
 
 ai_settings = AISettings()
 
-# 💡 修正1: APIキーが設定されているかチェック
-if not ai_settings.gemini_api_key or ai_settings.gemini_api_key == "DUMMY_KEY":
-    # キーがない場合は、接続を試みずにエラーを発生させる
-    raise ValueError("GEMINI_API_KEY environment variable is not set or is invalid.")
+def create_ai_client():
+    """設定に応じて Gemini クライアントか疑似クライアントを作成する"""
+    if ai_settings.ai_backend == "fake":
+        from .fake_llm import FakeGenAIClient
+        return FakeGenAIClient(latency_ms=ai_settings.fake_llm_latency_ms)
+
+    # 💡 修正1: APIキーが設定されているかチェック
+    if not ai_settings.gemini_api_key or ai_settings.gemini_api_key == "DUMMY_KEY":
+        # キーがない場合は、接続を試みずにエラーを発生させる
+        raise ValueError("GEMINI_API_KEY environment variable is not set or is invalid.")
+
+    # 💡 修正2: クライアント初期化時にAPIキーの有効性を確認
+    try:
+        return genai.Client(api_key=ai_settings.gemini_api_key)
+    except Exception as e:
+        # 初期化時の致命的なエラーを捕捉
+        raise RuntimeError(f"Failed to initialize Gemini Client: {e}")
 
-# 💡 修正2: クライアント初期化時にAPIキーの有効性を確認
-try:
-    client = genai.Client(api_key=ai_settings.gemini_api_key)
-except Exception as e:
-    # 初期化時の致命的なエラーを捕捉
-    raise RuntimeError(f"Failed to initialize Gemini Client: {e}")
+client = create_ai_client()
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+def generate_content(prompt: str, temperature: float, operation: str):
+    """
+    Gemini の generate_content を呼び出す（各生成関数で共通）。
+    トレーシング有効時はプロンプトと応答のサイズを属性に持つスパンを作る。
+    """
+    with traced_span(
+        "gemini.generate_content",
+        **{
+            "gen_ai.system": "gemini",
+            "gen_ai.operation.name": operation,
+            "gen_ai.request.model": GEMINI_MODEL,
+            "gen_ai.request.temperature": temperature,
+            "llm.prompt.chars": len(prompt),
+            "llm.prompt.bytes": len(prompt.encode("utf-8")),
+        }
+    ) as span:
+        response = client.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                temperature=temperature,
+                response_mime_type="application/json",
+            )
+        )
+        if span is not None:
+            span.set_attribute("llm.response.chars", len(response.text or ""))
+        return response
+
+# ----------------------------------------------------
+# 💡 AI応答のJSONパース（各生成関数で共通）
+# ----------------------------------------------------
+
+def extract_json_text(response_text: str) -> str:
+    """
+    AIの応答テキストからJSON部分を取り出す。
+    応答が "```json\n{...}\n```" のようなMarkdownブロックで囲まれている場合は、最初と最後の ``` の間を返す。
+    """
+    cleaned_text = response_text.strip()
+    if not cleaned_text.startswith('```'):
+        return cleaned_text
+
+    start_index = 3
+    # その後の 'json' などの言語指定や改行をスキップ
+    if cleaned_text[start_index:].lstrip().lower().startswith('json'):
+        start_index = cleaned_text.lower().index('json', start_index) + len('json')
+    end_index = cleaned_text.rfind('```')
+    if end_index > start_index:
+        return cleaned_text[start_index:end_index].strip()
+    # ラッパーが不完全な場合は開始の ``` 以降をすべて使う
+    return cleaned_text[start_index:].strip()
+
+def parse_ai_json(response_text: str) -> Dict[str, Any]:
+    """AIの応答テキストをJSONとしてパースし、dict を返す（dict 以外は ValueError）"""
+    with traced_span("ai.parse_json", **{"llm.response.chars": len(response_text)}):
+        raw_data = json.loads(extract_json_text(response_text))
+    if not isinstance(raw_data, dict):
+        raise ValueError(f"AI output is not a JSON object: {type(raw_data).__name__}")
+    return raw_data
 
 # ----------------------------------------------------
 # 💡 トーク骨子生成のメイン関数
@@ -71,19 +152,10 @@ def generate_talk_scaffold(db: Session, project_id: int) -> Dict[str, Any]:
     
     # 3. API呼び出し設定
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=system_prompt,
-            config=types.GenerateContentConfig(
-                temperature=temperature,
-                response_mime_type="application/json",
-            )
-        )
+        response = generate_content(system_prompt, temperature, operation="talk_scaffold")
     # 💡 修正3: API通信エラーを捕捉し、詳細をログに出力
     except APIError as e:
-        print(f"--- GEMINI API CALL FAILED ---")
-        print(f"Error Code: {e.code}, Message: {e.message}")
-        print("------------------------------")
+        logger.error("Gemini API call failed. Error Code: %s, Message: %s", e.code, e.message)
         raise ValueError(f"Gemini API通信エラーが発生しました: {e.message}")
     except Exception as e:
         # その他の予期せぬエラー
@@ -91,24 +163,14 @@ def generate_talk_scaffold(db: Session, project_id: int) -> Dict[str, Any]:
     
     # 4. JSONデータのパースとバリデーション (👈 ここを修正)
     try:
-        # 💡 修正: 応答テキストから不要な空白・改行を一時的に除去し、JSONとしてロードする
-        # この処理は、AIが生成したJSON文字列の前後や内部に予期せぬ空白・改行がある場合に有効
-        cleaned_text = response.text.strip()
-        
-        # 応答が "```json\n{...}\n```" のようなMarkdownブロックで囲まれている場合を想定
-        # これを除去する処理を組み込みます。
-        if cleaned_text.startswith('```') and cleaned_text.endswith('```'):
-            cleaned_text = cleaned_text.strip('```').strip()
-            if cleaned_text.startswith('json'):
-                cleaned_text = cleaned_text[len('json'):].strip()
-
-        raw_data = json.loads(cleaned_text)
+        # 💡 Markdownブロックの除去とパースは parse_ai_json に共通化
+        raw_data = parse_ai_json(response.text)
         
         # 💡 標準の辞書をそのまま返す
         return raw_data
     
     except Exception as e:
-        print(f"AI出力のパースに失敗しました: {e}")
+        logger.warning("AI出力のパースに失敗しました: %s", e)
         # APIキーが空の場合、ここでエラーになる可能性が高い
         raise ValueError(f"AIからの純粋なJSONパースに失敗しました。エラー: {e}")
 
@@ -116,17 +178,89 @@ def generate_talk_scaffold(db: Session, project_id: int) -> Dict[str, Any]:
 # 💡 骨子のDB更新関数
 # ----------------------------------------------------
 
+def _get_project_for_update(db: Session, project_id: int) -> Optional[DBProject]:
+    """
+    更新前の内容を行ロック（FOR UPDATE）を取ってから読み直す。
+    版の履歴の差分は更新前の内容から作るため、同時に保存されたときに同じ古い内容を基準にしないようにする。
+    """
+    return db.get(DBProject, project_id, with_for_update=True, populate_existing=True)
+
 def update_scaffold_in_project(db: Session, project_id: int, scaffold: Dict[str, Any]): # 👈 引数の型を dict に変更
     """生成された骨子データをプロジェクトテーブルに保存する"""
-    db_project: DBProject = db.get(DBProject, project_id)
+    db_project: DBProject = _get_project_for_update(db, project_id)
     if not db_project:
         raise ValueError("Project not found for update.")
 
     # 💡 修正: scaffold は既に dict なので、そのまま代入する
+    previous = db_project.scaffold_data # 版の履歴の差分に使う
     db_project.scaffold_data = scaffold # .model_dump() を削除
     db.add(db_project)
+    publish_project_event(db, project_id, "artifact_ready", artifact="scaffold")
+    record_artifact_revision(db, project_id, "scaffold", "generate", document=db_project.scaffold_data, previous=previous)
     db.commit()
 
+# ----------------------------------------------------
+# 💡 質問1問の再生成（その質問の前後だけを文脈にする）
+# ----------------------------------------------------
+
+# 再生成の指示（疑似LLMはこの語句で1問分の応答を返す）
+QUESTION_REGENERATION_MARKER = "質問を1つだけ作り直して"
+
+def generate_discussion_question(db: Session, project_id: int, index: int, instruction: str = "",
+                                 expected_version: Optional[int] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    discussion_flow の index 番目の質問をAIに作り直させ、(新しい質問, 読み込んだ時点のバージョン) を返す。
+    骨子全体ではなく、テーマ・アングル・対象の質問と前後の質問文だけをプロンプトに含める。
+    expected_version（If-Match のバージョン）が読み込んだバージョンと違えば、AIを呼ばずに VersionConflictError を投げる。
+    """
+    row = db.execute(text("""
+        SELECT p.theme, p.version, a.prompt_instruction,
+               p.scaffold_data::jsonb -> 'discussion_flow' -> :index AS question,
+               -- 負の添字は末尾から数えるため、先頭の質問には直前の質問を付けない
+               CASE WHEN :index > 0 THEN p.scaffold_data::jsonb -> 'discussion_flow' -> (:index - 1) ->> 'question_text' END AS previous_text,
+               p.scaffold_data::jsonb -> 'discussion_flow' -> (:index + 1) ->> 'question_text' AS next_text
+        FROM t_project p
+        JOIN m_personal_angle a ON a.angle_id = p.input_angle_id
+        WHERE p.project_id = :project_id
+    """), {"project_id": project_id, "index": index}).mappings().first()
+    if not row:
+        raise LookupError("Project not found.")
+    if index < 0 or not isinstance(row["question"], dict):
+        raise ValueError(f"discussion_flow[{index}] does not exist. Generate talk scaffold first.")
+    if expected_version is not None and row["version"] != expected_version:
+        raise VersionConflictError(row["version"])
+
+    db.rollback() # AIの応答を待つ間、読み込みのトランザクションを開いたままにしない
+
+    current = row["question"]
+    neighbours = "\n".join(
+        f"    - {label}: {neighbour}" for label, neighbour in (("直前の質問", row["previous_text"]), ("直後の質問", row["next_text"])) if neighbour
+    )
+    system_prompt = f"""
+    あなたは、人気YouTubeクリエイターのトーク構成アシスタントです。
+    トーク骨子の中の{QUESTION_REGENERATION_MARKER}ください。前後の質問とのつながりを保ち、内容が重複しないようにしてください。
+
+    # 制約条件
+    1. {row["prompt_instruction"]}というアングルの指示を厳守すること。
+    2. target_time_min は現在の値（{current.get("target_time_min")}分）に近づけること。
+    3. question_text・target_time_min・angle_type だけを持つJSONオブジェクトを1つ返し、それ以外は一切含めないこと。
+    {f"4. 追加の指示: {instruction}" if instruction else ""}
+
+    # 入力データ
+    - トークテーマ: {row["theme"]}
+    - 作り直す質問: {current.get("question_text", "")}（角度: {current.get("angle_type", "")}）
+{neighbours}
+    """
+
+    try:
+        response = generate_content(system_prompt, 0.7, operation="discussion_question")
+        question = DiscussionQuestion.model_validate(parse_ai_json(response.text))
+    except APIError as e:
+        raise ValueError(f"Gemini API通信エラーが発生しました: {e.message}")
+    except Exception as e:
+        raise ValueError(f"AI出力のパースに失敗しました: {e}")
+    return question.model_dump(), row["version"]
+
 # ----------------------------------------------------
 # 💡 サムネイルコンセプト生成のメイン関数
 # ----------------------------------------------------
@@ -169,23 +303,9 @@ def generate_thumbnail_concept(db: Session, project_id: int) -> Dict[str, Any]:
     
     # API呼び出し
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=system_prompt,
-            config=types.GenerateContentConfig(
-                temperature=temperature,
-                response_mime_type="application/json",
-            )
-        )
+        response = generate_content(system_prompt, temperature, operation="thumbnail_concept")
 
-        cleaned_text = response.text.strip()
-        # ... (Markdownブロックのクリーンアップ処理は generate_talk_scaffold から流用) ...
-        if cleaned_text.startswith('```') and cleaned_text.endswith('```'):
-            cleaned_text = cleaned_text.strip('```').strip()
-            if cleaned_text.startswith('json'):
-                cleaned_text = cleaned_text[len('json'):].strip()
-                
-        raw_data = json.loads(cleaned_text)
+        raw_data = parse_ai_json(response.text)
         
         # 💡 ここでは、生成された辞書が最低限の構造を持っているかを確認する
         if not all(key in raw_data for key in ['visual_theme', 'required_elements', 'emotion_target']):
@@ -204,13 +324,16 @@ def generate_thumbnail_concept(db: Session, project_id: int) -> Dict[str, Any]:
 
 def update_thumbnail_in_project(db: Session, project_id: int, thumbnail_concept: Dict[str, Any]):
     """生成されたサムネイルコンセプトをプロジェクトテーブルに保存する"""
-    db_project: DBProject = db.get(DBProject, project_id)
+    db_project: DBProject = _get_project_for_update(db, project_id)
     if not db_project:
         raise ValueError("Project not found for update.")
 
     # 辞書をJSONBとしてそのまま保存
-    db_project.thumbnail_data = thumbnail_concept
+    previous = db_project.thumbnail_concept # 版の履歴の差分に使う
+    db_project.thumbnail_concept = thumbnail_concept
     db.add(db_project)
+    publish_project_event(db, project_id, "artifact_ready", artifact="thumbnail")
+    record_artifact_revision(db, project_id, "thumbnail", "generate", document=db_project.thumbnail_concept, previous=previous)
     db.commit()
 
 # ----------------------------------------------------
@@ -281,40 +404,9 @@ def update_thumbnail_in_project(db: Session, project_id: int, thumbnail_concept:
 #     """
 
 def generate_project_summary(db: Session, project_id: int) -> Dict[str, Any]:
-    db_project: DBProject = db.get(DBProject, project_id)
-    if not db_project:
-        raise ValueError("Project not found.")
-
-    # 1. 必要な情報の収集（マスタからタスク名を取得）
-    theme = db_project.theme
-    progress_rate = db_project.progress_rate
-    
-    # タスクとテンプレート名を結合して取得
-    # 💡 修正: タスク名を取得することでAIが「何をしたか」理解できるようにする
-    tasks_with_names = db.query(
-        DBProjectTask, DBTaskTemplate.task_name
-    ).join(
-        DBTaskTemplate, DBProjectTask.task_template_id == DBTaskTemplate.task_template_id
-    ).filter(
-        DBProjectTask.project_id == project_id
-    ).all()
-
-    task_data_list = []
-    for task, task_name in tasks_with_names:
-        # 乖離率の計算
-        diff = task.actual_time_min - task.est_time_min
-        status_label = "✅完了" if task.status == "完了" else f"⚠️{task.status}"
-        
-        task_data_list.append({
-            "作業名": task_name,
-            "ステータス": status_label,
-            "見積(分)": task.est_time_min,
-            "実績(分)": round(task.actual_time_min, 1),
-            "乖離(分)": round(diff, 1)
-        })
-    
-    if not task_data_list:
-        raise ValueError("No tasks found for this project.")
+    # 1. 実績データの集計（タスク別・カテゴリ別・全体と、テンプレートごとの過去の中央値との比較）
+    # 💡 1クエリで集計し、プロジェクトのバージョンごとにキャッシュする（services/summary_context.py）
+    context_json = get_summary_context_json(db, project_id)
     
     # ターゲット温度設定: 分析と創造性を兼ねるため 0.7 を適用
     temperature = 0.7 
@@ -327,15 +419,14 @@ def generate_project_summary(db: Session, project_id: int) -> Dict[str, Any]:
     以下のプロジェクト実績データを分析し、次回の制作をより楽に、効率的にするための「戦略的振り返り」を生成してください。
 
     # データ
-    - テーマ: {theme}
-    - 完了率: {progress_rate}%
-    - 詳細データ: {json.dumps(task_data_list, ensure_ascii=False, indent=2)}
+    {context_json}
 
     # 分析の極意
     1. 【時間管理】見積もりより20%以上オーバーしたタスクを特定し、その原因（技術不足、集中力、外的要因など）を推論して。
-    2. 【達成度】未完了のタスクがある場合、ボトルネックがどこにあったか指摘して。
-    3. 【称賛】予定通り、あるいは予定より早く終わったタスクはしっかり褒めて。
-    4. 【具体策】次回、同じテーマで動画を作るなら「どのタスクの見積もりを増やすべきか」「どの工程を自動化すべきか」提案して。
+    2. 【過去との比較】「過去の中央値」は全プロジェクトでの同じ作業の実績の中央値です。今回だけ遅かったのか、いつも見積もりが甘いのかを区別して。
+    3. 【達成度】未完了のタスクがある場合、ボトルネックがどこにあったか指摘して。カテゴリ別の合計も参考にして。
+    4. 【称賛】予定通り、あるいは予定より早く終わったタスクはしっかり褒めて。
+    5. 【具体策】次回、同じテーマで動画を作るなら「どのタスクの見積もりを増やすべきか」「どの工程を自動化すべきか」提案して。
 
     # 制約
     - 指定のJSONスキーマに完全準拠すること。
@@ -344,41 +435,10 @@ def generate_project_summary(db: Session, project_id: int) -> Dict[str, Any]:
     
     # 3. API呼び出し
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=system_prompt,
-            config=types.GenerateContentConfig(
-                temperature=temperature,
-                response_mime_type="application/json",
-            )
-        )
+        response = generate_content(system_prompt, temperature, operation="project_summary")
 
         # 4. JSONのパースと検証
-        cleaned_text = response.text.strip()
-        if cleaned_text.startswith('```'):
-            # 最初に見つかった '```' と最後の '```' の間を抽出する
-            try:
-                # 最初の '```' 以降の文字列を取得
-                start_index = cleaned_text.find('```') + 3
-                # その後の 'json' や改行をスキップ
-                if cleaned_text[start_index:].strip().startswith('json'):
-                    start_index += len('json')
-                
-                # 最後の '```' の位置を取得
-                end_index = cleaned_text.rfind('```')
-                
-                # 有効なJSON部分を抽出
-                if end_index > start_index:
-                    json_string = cleaned_text[start_index:end_index].strip()
-                else:
-                    json_string = cleaned_text.strip() # ラッパーが不完全な場合は全体を試す
-            except:
-                json_string = cleaned_text.strip() # エラー時は全体を試す
-        else:
-            json_string = cleaned_text
-            
-        # 最終的なJSON文字列をパース
-        raw_data = json.loads(json_string)
+        raw_data = parse_ai_json(response.text)
         
         # 構造の検証 (最低限のキーが存在するか)
         # 💡 検証するキーをより絞り込み、確実に存在すると期待されるキーに限定
@@ -400,11 +460,14 @@ def generate_project_summary(db: Session, project_id: int) -> Dict[str, Any]:
 
 def update_summary_in_project(db: Session, project_id: int, summary_data: Dict[str, Any]):
     """生成されたサマリーをプロジェクトテーブルに保存する"""
-    db_project: DBProject = db.get(DBProject, project_id)
+    db_project: DBProject = _get_project_for_update(db, project_id)
     if not db_project:
         raise ValueError("Project not found for update.")
 
     # 辞書をJSONBとしてそのまま保存
+    previous = db_project.summary_data # 版の履歴の差分に使う
     db_project.summary_data = summary_data
     db.add(db_project)
+    publish_project_event(db, project_id, "artifact_ready", artifact="summary")
+    record_artifact_revision(db, project_id, "summary", "generate", document=db_project.summary_data, previous=previous)
     db.commit()
\ No newline at end of file
@@ -0,0 +1,281 @@
+# app/services/artifact_history.py
+#
+# 骨子・サムネイル・サマリー（t_project の JSONB 列）の版の履歴 (t_artifact_history)
+#
+#   - 書き込みのたびに1版を追加する。通常は直前の版からの JSON Patch（差分）を、ARTIFACT_SNAPSHOT_INTERVAL 版ごと
+#     （と差分のほうが大きくなるとき）は全体を保存する。どちらも zlib で圧縮する
+#   - 履歴がまだない成果物に初めて書き込むときは、書き込み前の内容を版1（baseline）として残す
+#   - 版の復元: 直前のスナップショットから対象の版までを1クエリで読み、差分を順に当てる（最大 INTERVAL - 1 個）
+#   - 一覧はメタデータだけを返し、payload は読まない
+#
+# 版番号の採番は t_project の行を更新した後（行ロックを持った状態）で行うため、同じプロジェクトへの書き込みが並行しても重複しない。
+
+import copy
+import json
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from .events import publish_project_event
+from .project_read import PROJECT_VIEW_JSONB
+
+# 版の履歴の設定 (環境変数で上書き可能)
+class ArtifactHistorySettings(BaseSettings):
+    artifact_snapshot_interval: int = 10 # 何版ごとに全体を保存するか（復元時に当てる差分はこれより少ない）
+    artifact_history_compress_level: int = 6 # zlib の圧縮レベル
+
+artifact_history_settings = ArtifactHistorySettings()
+
+# 成果物の名前 → t_project の列
+ARTIFACT_COLUMNS = PROJECT_VIEW_JSONB
+
+def artifact_column(artifact: str) -> str:
+    if artifact not in ARTIFACT_COLUMNS:
+        raise ValueError(f"Unknown artifact '{artifact}'. Choose from: {', '.join(ARTIFACT_COLUMNS)}")
+    return ARTIFACT_COLUMNS[artifact]
+
+# ----------------------------------------------------
+# 💡 圧縮と JSON の差分
+# ----------------------------------------------------
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _compress(value: Any) -> bytes:
+    return zlib.compress(_dumps(value), artifact_history_settings.artifact_history_compress_level)
+
+def _decompress(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload))
+
+# 数値に見えるパス要素（配列の番号として扱われうるもの）
+_NUMERIC_TOKEN = re.compile(r"-?[0-9]+")
+
+def parse_pointer(pointer: str) -> List[str]:
+    """
+    JSON Pointer（/discussion_flow/0/question_text）をパス要素のリストにする。骨子全体（""）は対象外。
+    負の番号（-1）や先頭が0の番号（01）は拒否する（Postgres の #> / jsonb_set は負の番号を末尾から数えるため、
+    別の要素を書き換えてしまう。RFC 6902 でも配列の番号は 0 か先頭が0でない正の整数だけ）
+    """
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON Pointer '{pointer}': must start with '/'")
+    tokens = [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+    if any(token == "" for token in tokens):
+        raise ValueError(f"Invalid JSON Pointer '{pointer}': empty path segment")
+    for token in tokens:
+        if _NUMERIC_TOKEN.fullmatch(token) and (token.startswith("-") or (token.startswith("0") and token != "0")):
+            raise ValueError(f"Invalid JSON Pointer '{pointer}': array index '{token}' must be a non-negative integer without leading zeros")
+    return tokens
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+def _same(a: Any, b: Any) -> bool:
+    """型まで一致するか（Python では True == 1 == 1.0 になるため）"""
+    return type(a) is type(b) and a == b
+
+def json_diff(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """old を new にする JSON Patch（add / remove / replace）を返す"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[Dict[str, Any]] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, child))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        common = min(len(old), len(new))
+        for index in range(common):
+            ops.extend(json_diff(old[index], new[index], f"{path}/{index}"))
+        for value in new[common:]:
+            ops.append({"op": "add", "path": f"{path}/-", "value": value})
+        for index in range(len(old) - 1, common - 1, -1): # 後ろから消して番号をずらさない
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+        return ops
+    if _same(old, new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+def apply_json_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
+    """JSON Patch を当てた新しい document を返す（add / remove / replace。test は無視する）"""
+    document = copy.deepcopy(document)
+    for operation in operations:
+        op = operation["op"]
+        if op == "test":
+            continue
+        if operation["path"] == "":
+            document = copy.deepcopy(operation.get("value"))
+            continue
+        tokens = parse_pointer(operation["path"])
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            if op == "add":
+                position = len(parent) if last == "-" else int(last)
+                parent.insert(position, copy.deepcopy(operation["value"]))
+            elif op == "remove":
+                del parent[int(last)]
+            else:
+                parent[int(last)] = copy.deepcopy(operation["value"])
+        elif op == "remove":
+            del parent[last]
+        else:
+            parent[last] = copy.deepcopy(operation["value"])
+    return document
+
+# ----------------------------------------------------
+# 💡 版の追加（書き込みの経路から呼ばれる）
+# ----------------------------------------------------
+
+def has_artifact_history(db: Session, project_id: int, artifact: str) -> bool:
+    return db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM t_artifact_history WHERE project_id = :project_id AND artifact = :artifact)"
+    ), {"project_id": project_id, "artifact": artifact}).scalar()
+
+def _insert_revision(db: Session, project_id: int, artifact: str, revision: int, is_snapshot: bool,
+                     payload: bytes, size_bytes: int, source: str):
+    db.execute(text("""
+        INSERT INTO t_artifact_history (project_id, artifact, revision, is_snapshot, payload, size_bytes, source)
+        VALUES (:project_id, :artifact, :revision, :is_snapshot, :payload, :size_bytes, :source)
+    """), {
+        "project_id": project_id, "artifact": artifact, "revision": revision, "is_snapshot": is_snapshot,
+        "payload": payload, "size_bytes": size_bytes, "source": source,
+    })
+
+def record_artifact_revision(db: Session, project_id: int, artifact: str, source: str,
+                             document: Any = None, previous: Any = None,
+                             operations: Optional[List[Dict[str, Any]]] = None, size_bytes: Optional[int] = None) -> int:
+    """
+    t_project の列を更新した後（同じトランザクション内）に呼び、追加した版番号を返す。
+      - document   : 更新後の内容（operations を渡す場合は省略可。全体を保存するときはDBから読む）
+      - previous   : 更新前の内容（履歴がまだないときの版1と、差分の計算に使う）
+      - operations : 更新前 → 更新後の JSON Patch（部分更新の経路。差分の計算を省く）
+    """
+    column = artifact_column(artifact)
+    head = db.execute(text("""
+        SELECT MAX(revision) AS revision, MAX(revision) FILTER (WHERE is_snapshot) AS snapshot_revision
+        FROM t_artifact_history
+        WHERE project_id = :project_id AND artifact = :artifact
+    """), {"project_id": project_id, "artifact": artifact}).mappings().one()
+    revision, snapshot_revision = head["revision"] or 0, head["snapshot_revision"] or 0
+
+    # 履歴がまだなければ、書き込み前の内容を版1として残す
+    if revision == 0 and previous:
+        raw = _dumps(previous)
+        _insert_revision(db, project_id, artifact, 1, True, zlib.compress(raw, artifact_history_settings.artifact_history_compress_level),
+                         len(raw), "baseline")
+        revision = snapshot_revision = 1
+
+    revision += 1
+    if operations is not None:
+        operations = [operation for operation in operations if operation["op"] != "test"]
+    elif revision > 1:
+        operations = json_diff(previous, document)
+
+    diff_payload = _compress(operations) if operations is not None and revision > 1 else None
+    if document is None and (diff_payload is None or revision - snapshot_revision >= artifact_history_settings.artifact_snapshot_interval):
+        document = db.execute(
+            text(f"SELECT {column} FROM t_project WHERE project_id = :project_id"), {"project_id": project_id}
+        ).scalar()
+
+    snapshot_payload = None
+    if document is not None:
+        raw = _dumps(document)
+        size_bytes = len(raw)
+        snapshot_payload = zlib.compress(raw, artifact_history_settings.artifact_history_compress_level)
+
+    # スナップショットの間隔に達したとき・差分のほうが大きいときは全体を保存する
+    use_snapshot = (
+        diff_payload is None
+        or revision - snapshot_revision >= artifact_history_settings.artifact_snapshot_interval
+        or (snapshot_payload is not None and len(snapshot_payload) <= len(diff_payload))
+    )
+    payload = snapshot_payload if use_snapshot else diff_payload
+    _insert_revision(db, project_id, artifact, revision, use_snapshot, payload, size_bytes or 0, source)
+    return revision
+
+# ----------------------------------------------------
+# 💡 一覧・復元・巻き戻し
+# ----------------------------------------------------
+
+def list_artifact_history(db: Session, project_id: int, artifact: str,
+                          before_revision: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    """新しい版から順にメタデータだけを返す（payload の中身は読まない）"""
+    artifact_column(artifact)
+    rows = db.execute(text("""
+        SELECT revision, is_snapshot, source, size_bytes, octet_length(payload) AS stored_bytes, created_at
+        FROM t_artifact_history
+        WHERE project_id = :project_id AND artifact = :artifact AND revision < :before_revision
+        ORDER BY revision DESC
+        LIMIT :limit
+    """), {
+        "project_id": project_id, "artifact": artifact,
+        "before_revision": before_revision or 2**31 - 1, "limit": limit,
+    }).mappings().all()
+    return [dict(row) for row in rows]
+
+def load_artifact_revision(db: Session, project_id: int, artifact: str, revision: int) -> Any:
+    """直前のスナップショットから revision までを1クエリで読み、差分を当てて復元する（版がなければ LookupError）"""
+    artifact_column(artifact)
+    rows = db.execute(text("""
+        SELECT revision, is_snapshot, payload
+        FROM t_artifact_history
+        WHERE project_id = :project_id AND artifact = :artifact
+          AND revision <= :revision
+          AND revision >= (
+              SELECT MAX(revision) FROM t_artifact_history
+              WHERE project_id = :project_id AND artifact = :artifact AND is_snapshot AND revision <= :revision
+          )
+        ORDER BY revision
+    """), {"project_id": project_id, "artifact": artifact, "revision": revision}).mappings().all()
+    if not rows or rows[-1]["revision"] != revision:
+        raise LookupError(f"Revision {revision} of {artifact} not found.")
+
+    document = _decompress(rows[0]["payload"])
+    for row in rows[1:]:
+        document = apply_json_patch(document, _decompress(row["payload"]))
+    return document
+
+def revert_artifact(db: Session, project_id: int, artifact: str, revision: int,
+                    expected_version: Optional[int] = None) -> Optional[Tuple[Any, int]]:
+    """
+    成果物を revision の内容に戻し、(戻した内容, 追加した版番号) を返す。巻き戻しも1版として記録する。
+    expected_version を指定した場合、プロジェクトのバージョンが一致しなければ何も更新せず None を返す。
+    版がなければ LookupError を送出する。
+    """
+    column = artifact_column(artifact)
+    document = load_artifact_revision(db, project_id, artifact, revision)
+
+    previous = db.execute(text(f"""
+        UPDATE t_project p
+        SET {column} = CAST(:document AS JSONB)
+        FROM (
+            SELECT project_id, {column} AS previous FROM t_project
+            WHERE project_id = :project_id AND (CAST(:expected_version AS INT) IS NULL OR version = :expected_version)
+            FOR UPDATE
+        ) old
+        WHERE p.project_id = old.project_id
+        RETURNING TRUE AS updated, old.previous
+    """), {
+        "project_id": project_id, "expected_version": expected_version,
+        "document": _dumps(document).decode("utf-8"),
+    }).mappings().first()
+    if previous is None:
+        db.rollback()
+        return None
+
+    new_revision = record_artifact_revision(db, project_id, artifact, "revert", document=document, previous=previous["previous"])
+    publish_project_event(db, project_id, "artifact_reverted", artifact=artifact, revision=revision)
+    db.commit()
+    return document, new_revision
@@ -0,0 +1,519 @@
+# app/services/bulk_import.py
+#
+# 過去の制作履歴（プロジェクト・タスク・タイマーログ）の一括インポート
+#
+#   1. CSV / NDJSON をチャンクごとに読みながら1行ずつ検証し、正しい行だけを COPY で一時テーブルに投入する
+#   2. ステータス名・アングル名・タスク名をマスタと突き合わせて ID に変換する（名前でもIDでも指定できる）
+#   3. 集合演算で本テーブルにマージする
+#        projects   : source_key（元データ側の識別子）で UPSERT
+#        tasks      : (プロジェクト, タスクテンプレート) が既にあれば更新、無ければ追加
+#        timer_logs : (タスク, 開始日時) が同じログは追加しない（同じファイルを再実行しても重複しない）
+#                     タスクが無い場合はテンプレートの既定値でタスクを作成する
+#                     archive に切り離した月のログは受け付けない（restore してから取り込む）
+#   4. 追加したログの時間をタスクの actual_time_min に加算し（切り離した月の分は t_timer_log に無いため、
+#      ログから合計し直さない）、影響を受けたプロジェクトの progress_rate をまとめて再計算して、
+#      見積もりの統計（t_task_estimate）と分析用のロールアップ（t_time_rollup_*）を作り直す
+#
+# すべて1つのトランザクションで実行し、途中で失敗した場合は何も反映しない。
+# 実行は python -m app.cli import から行う（--dry-run で検証とマージ件数の確認だけを行う）。
+#
+# 入力ファイルの列（* は必須、名前/ID の列はどちらでも可）:
+#   projects   : source_key*, theme*, status*（m_status の名前/ID）, angle（m_personal_angle の名前/ID、省略時は最小ID）,
+#                type_id, created_at, published_at, final_title, final_description
+#   tasks      : project_key*（projects の source_key）, task*（m_task_template の名前/ID）, status, est_time_min,
+#                actual_time_min, completed_at
+#   timer_logs : project_key*, task*, start_time*, end_time*, duration_min（省略時は開始・終了から計算）, section_index, memo
+
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import SessionLocal
+from .dashboard import COMPLETED_TASK_STATUSES
+from .estimate import rebuild_estimates
+from .partitions import ensure_timer_log_partitions, list_timer_log_partitions
+from .rollups import rebuild_time_rollups
+from .project_cache import mark_project_changed
+
+# インポートの設定 (環境変数で上書き可能)
+class ImportSettings(BaseSettings):
+    import_chunk_rows: int = 50000 # 検証して COPY する1チャンクの行数
+    import_max_errors: int = 100 # レポートに残すエラーの最大件数（件数自体はすべて数える）
+
+import_settings = ImportSettings()
+
+# インポートを同時に実行しないためのアドバイザリロックID
+IMPORT_LOCK_ID = 7346120002
+
+# タスクとして受け付けるステータス
+TASK_STATUSES = ('未着手', '進行中') + COMPLETED_TASK_STATUSES
+
+# 新規プロジェクトのトーク骨子（create_initial_project と同じ空の骨子）
+EMPTY_SCAFFOLD = {"title_options": [], "script_intro": {"text": "", "core_emotion": ""}, "discussion_flow": []}
+
+# ----------------------------------------------------
+# 💡 入力ファイルの列と一時テーブル
+# ----------------------------------------------------
+
+# (列名, 型, 必須) 型は str / int / float / datetime
+IMPORT_COLUMNS: Dict[str, List[Tuple[str, str, bool]]] = {
+    "projects": [
+        ("source_key", "str", True),
+        ("theme", "str", True),
+        ("status", "str", True),
+        ("angle", "str", False),
+        ("type_id", "int", False),
+        ("created_at", "datetime", False),
+        ("published_at", "datetime", False),
+        ("final_title", "str", False),
+        ("final_description", "str", False),
+    ],
+    "tasks": [
+        ("project_key", "str", True),
+        ("task", "str", True),
+        ("status", "str", False),
+        ("est_time_min", "int", False),
+        ("actual_time_min", "float", False),
+        ("completed_at", "datetime", False),
+    ],
+    "timer_logs": [
+        ("project_key", "str", True),
+        ("task", "str", True),
+        ("start_time", "datetime", True),
+        ("end_time", "datetime", True),
+        ("duration_min", "float", False),
+        ("section_index", "int", False),
+        ("memo", "str", False),
+    ],
+}
+
+IMPORT_DATASETS = list(IMPORT_COLUMNS)
+
+_SQL_TYPES = {"str": "TEXT", "int": "INT", "float": "FLOAT8", "datetime": "TIMESTAMP"}
+
+# マスタとの突き合わせ結果を入れる列
+_RESOLVED_COLUMNS = {
+    "projects": "status_id INT, angle_id INT",
+    "tasks": "project_id BIGINT, task_template_id INT",
+    "timer_logs": "project_id BIGINT, task_template_id INT, project_task_id BIGINT",
+}
+
+def _staging_table(dataset: str) -> str:
+    return f"_import_{dataset}"
+
+def _create_staging_tables(db: Session):
+    for dataset, columns in IMPORT_COLUMNS.items():
+        column_defs = ", ".join(f"{name} {_SQL_TYPES[kind]}" for name, kind, _ in columns)
+        db.execute(text(f"""
+            CREATE TEMP TABLE {_staging_table(dataset)} (
+                line_no INT NOT NULL, {column_defs}, {_RESOLVED_COLUMNS[dataset]}
+            ) ON COMMIT DROP
+        """))
+
+# ----------------------------------------------------
+# 💡 レポート
+# ----------------------------------------------------
+
+@dataclass
+class DatasetReport:
+    read: int = 0 # 読み込んだ行数
+    invalid: int = 0 # 検証で除外した行数
+    unresolved: int = 0 # マスタ・プロジェクトと突き合わせられなかった行数
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0 # 既に取り込み済み・ファイル内で重複していた行数
+
+@dataclass
+class ImportReport:
+    datasets: Dict[str, DatasetReport] = field(default_factory=lambda: {name: DatasetReport() for name in IMPORT_DATASETS})
+    errors: List[str] = field(default_factory=list)
+    error_count: int = 0
+    created_tasks: int = 0 # タイマーログのために作成したタスク
+    recomputed_tasks: int = 0
+    recomputed_projects: int = 0
+    dry_run: bool = False
+    elapsed_sec: float = 0.0
+
+    def add_error(self, message: str):
+        self.error_count += 1
+        if len(self.errors) < import_settings.import_max_errors:
+            self.errors.append(message)
+
+# ----------------------------------------------------
+# 💡 読み込みと検証
+# ----------------------------------------------------
+
+def read_records(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """CSV（ヘッダー付き）/ NDJSON を1行ずつ (行番号, dict) で返す。形式は拡張子から判定する"""
+    fmt = fmt or ("csv" if Path(path).suffix.lower() == ".csv" else "ndjson")
+    # utf-8-sig: 表計算ソフトが付ける BOM を読み飛ばす
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield line_no, record
+
+def _convert(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "":
+            return None
+    if kind == "str":
+        return str(value)
+    if kind == "int":
+        return int(value)
+    if kind == "float":
+        return float(value)
+    if isinstance(value, datetime):
+        return value
+    # 表計算ソフトの '2024/01/31 10:00' 形式も受け付ける
+    return datetime.fromisoformat(str(value).replace("/", "-"))
+
+def validate_record(dataset: str, record: Dict[str, Any]) -> Tuple[Optional[tuple], Optional[str]]:
+    """1行を検証して (COPY する値のタプル, None) か (None, エラーメッセージ) を返す"""
+    if not isinstance(record, dict):
+        return None, "not a JSON object"
+    values = {}
+    for name, kind, required in IMPORT_COLUMNS[dataset]:
+        try:
+            value = _convert(record.get(name), kind)
+        except (TypeError, ValueError):
+            return None, f"invalid {kind} for '{name}': {record.get(name)!r}"
+        if required and value is None:
+            return None, f"'{name}' is required"
+        values[name] = value
+
+    if dataset == "tasks" and values["status"] is not None and values["status"] not in TASK_STATUSES:
+        return None, f"unknown task status {values['status']!r} (expected one of {', '.join(TASK_STATUSES)})"
+    if dataset == "timer_logs":
+        if values["end_time"] < values["start_time"]:
+            return None, "end_time is earlier than start_time"
+        if values["duration_min"] is not None and values["duration_min"] < 0:
+            return None, "duration_min must not be negative"
+    return tuple(values.values()), None
+
+def _copy_rows(db: Session, dataset: str, rows: List[tuple]):
+    """検証済みの行を COPY で一時テーブルに投入する（None は空欄 = NULL として書き出す）"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    buffer.seek(0)
+    columns = ", ".join(["line_no"] + [name for name, _, _ in IMPORT_COLUMNS[dataset]])
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {_staging_table(dataset)} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+def stage_file(db: Session, dataset: str, path: str, report: ImportReport, fmt: Optional[str] = None,
+               chunk_rows: Optional[int] = None):
+    """ファイルを読みながら検証し、chunk_rows 行ずつ一時テーブルに COPY する"""
+    chunk_rows = chunk_rows or import_settings.import_chunk_rows
+    dataset_report = report.datasets[dataset]
+    chunk: List[tuple] = []
+    for line_no, record in read_records(path, fmt):
+        dataset_report.read += 1
+        values, error = validate_record(dataset, record)
+        if error:
+            dataset_report.invalid += 1
+            report.add_error(f"{dataset} line {line_no}: {error}")
+            continue
+        chunk.append((line_no,) + values)
+        if len(chunk) >= chunk_rows:
+            _copy_rows(db, dataset, chunk)
+            chunk = []
+    if chunk:
+        _copy_rows(db, dataset, chunk)
+    # マージの実行計画のため、一時テーブルの統計を取る
+    db.execute(text(f"ANALYZE {_staging_table(dataset)}"))
+
+# ----------------------------------------------------
+# 💡 マスタとの突き合わせとマージ（集合演算）
+# ----------------------------------------------------
+
+# タスクテンプレートを名前とIDの両方で引けるようにする
+_TEMPLATE_KEYS_SQL = """
+    WITH template_keys AS (
+        SELECT task_name AS key, MIN(task_template_id) AS task_template_id FROM m_task_template GROUP BY task_name
+        UNION ALL
+        SELECT task_template_id::text, task_template_id FROM m_task_template
+    )
+"""
+
+def _report_unresolved(db: Session, dataset: str, condition: str, message: str, report: ImportReport,
+                       params: Optional[Dict[str, Any]] = None):
+    """突き合わせできなかった行を数えてエラーに記録する"""
+    rows = db.execute(text(f"""
+        SELECT line_no, COUNT(*) OVER () FROM {_staging_table(dataset)}
+        WHERE {condition} ORDER BY line_no LIMIT :limit
+    """), {**(params or {}), "limit": import_settings.import_max_errors}).all()
+    if not rows:
+        return
+    total = rows[0][1]
+    report.datasets[dataset].unresolved += total
+    for line_no, _ in rows:
+        report.add_error(f"{dataset} line {line_no}: {message}")
+    report.error_count += total - len(rows)
+
+def merge_projects(db: Session, report: ImportReport):
+    db.execute(text("""
+        UPDATE _import_projects ip SET status_id = s.status_id
+        FROM m_status s WHERE s.status_name = ip.status OR s.status_id::text = ip.status
+    """))
+    db.execute(text("""
+        UPDATE _import_projects ip SET angle_id = a.angle_id
+        FROM m_personal_angle a WHERE a.angle_name = ip.angle OR a.angle_id::text = ip.angle
+    """))
+    db.execute(text("UPDATE _import_projects SET angle_id = (SELECT MIN(angle_id) FROM m_personal_angle) WHERE angle IS NULL"))
+    _report_unresolved(db, "projects", "status_id IS NULL", "unknown status", report)
+    _report_unresolved(db, "projects", "status_id IS NOT NULL AND angle_id IS NULL", "unknown angle", report)
+
+    # 作成日時が空欄の場合、既存プロジェクトは元の値を保ち、新規は現在日時にする
+    db.execute(text("""
+        UPDATE _import_projects ip
+        SET created_at = COALESCE((SELECT p.created_at FROM t_project p WHERE p.source_key = ip.source_key), now())
+        WHERE ip.created_at IS NULL
+    """))
+
+    # 同じ source_key が複数行ある場合は後の行を採用する
+    results = db.execute(text("""
+        INSERT INTO t_project (source_key, type_id, current_status_id, theme, input_angle_id, scaffold_data,
+                               final_title, final_description, created_at, published_at, progress_rate, version)
+        SELECT DISTINCT ON (source_key)
+               source_key, COALESCE(type_id, 1), status_id, theme, angle_id, CAST(:scaffold AS jsonb),
+               final_title, final_description, created_at, published_at, 0, 1
+        FROM _import_projects
+        WHERE status_id IS NOT NULL AND angle_id IS NOT NULL
+        ORDER BY source_key, line_no DESC
+        ON CONFLICT (source_key) DO UPDATE SET
+            type_id = EXCLUDED.type_id,
+            current_status_id = EXCLUDED.current_status_id,
+            theme = EXCLUDED.theme,
+            input_angle_id = EXCLUDED.input_angle_id,
+            final_title = COALESCE(EXCLUDED.final_title, t_project.final_title),
+            final_description = COALESCE(EXCLUDED.final_description, t_project.final_description),
+            created_at = EXCLUDED.created_at,
+            published_at = COALESCE(EXCLUDED.published_at, t_project.published_at),
+            version = t_project.version + 1
+        RETURNING (xmax = 0) AS inserted
+    """), {"scaffold": json.dumps(EMPTY_SCAFFOLD, ensure_ascii=False)}).scalars().all()
+
+    dataset_report = report.datasets["projects"]
+    dataset_report.inserted = sum(1 for inserted in results if inserted)
+    dataset_report.updated = len(results) - dataset_report.inserted
+    dataset_report.skipped = dataset_report.read - dataset_report.invalid - dataset_report.unresolved - len(results)
+
+def _resolve_project_and_template(db: Session, dataset: str, report: ImportReport):
+    table = _staging_table(dataset)
+    db.execute(text(f"UPDATE {table} s SET project_id = p.project_id FROM t_project p WHERE p.source_key = s.project_key"))
+    db.execute(text(f"""
+        {_TEMPLATE_KEYS_SQL}
+        UPDATE {table} s SET task_template_id = k.task_template_id FROM template_keys k WHERE k.key = s.task
+    """))
+    _report_unresolved(db, dataset, "project_id IS NULL", "unknown project_key", report)
+    _report_unresolved(db, dataset, "project_id IS NOT NULL AND task_template_id IS NULL", "unknown task", report)
+    # 突き合わせ結果の列は COPY 直後の統計では空のため、取り直さないと後続の結合が入れ子ループになる
+    db.execute(text(f"ANALYZE {table}"))
+
+def merge_tasks(db: Session, report: ImportReport):
+    _resolve_project_and_template(db, "tasks", report)
+    inserted, updated = db.execute(text("""
+        WITH src AS (
+            SELECT DISTINCT ON (project_id, task_template_id) *
+            FROM _import_tasks
+            WHERE project_id IS NOT NULL AND task_template_id IS NOT NULL
+            ORDER BY project_id, task_template_id, line_no DESC
+        ),
+        updated AS (
+            UPDATE t_project_task t
+            SET status = COALESCE(src.status, t.status),
+                est_time_min = COALESCE(src.est_time_min, t.est_time_min),
+                actual_time_min = COALESCE(src.actual_time_min, t.actual_time_min),
+                completed_at = COALESCE(src.completed_at, t.completed_at)
+            FROM src
+            WHERE t.project_id = src.project_id AND t.task_template_id = src.task_template_id
+            RETURNING 1
+        ),
+        inserted AS (
+            INSERT INTO t_project_task (project_id, task_template_id, status, est_time_min, actual_time_min, completed_at)
+            SELECT src.project_id, src.task_template_id, COALESCE(src.status, tt.default_status),
+                   COALESCE(src.est_time_min, tt.est_time_min), COALESCE(src.actual_time_min, 0), src.completed_at
+            FROM src
+            JOIN m_task_template tt ON tt.task_template_id = src.task_template_id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM t_project_task t WHERE t.project_id = src.project_id AND t.task_template_id = src.task_template_id
+            )
+            RETURNING 1
+        )
+        SELECT (SELECT COUNT(*) FROM inserted), (SELECT COUNT(*) FROM updated)
+    """)).one()
+    dataset_report = report.datasets["tasks"]
+    dataset_report.inserted, dataset_report.updated = inserted, updated
+    dataset_report.skipped = dataset_report.read - dataset_report.invalid - dataset_report.unresolved - inserted - updated
+
+def merge_timer_logs(db: Session, report: ImportReport):
+    _resolve_project_and_template(db, "timer_logs", report)
+
+    # archive に切り離した月のログは取り込まない（default パーティションに入り、切り離した月と重複する可能性があるため）
+    archived = [p["month"] for p in list_timer_log_partitions(db) if p["month"] is not None and not p["attached"]]
+    if archived:
+        condition = "project_id IS NOT NULL AND date_trunc('month', start_time)::date = ANY(CAST(:archived AS DATE[]))"
+        _report_unresolved(db, "timer_logs", condition, "month is archived (restore the partition first)", report,
+                           {"archived": archived})
+        db.execute(text(f"UPDATE _import_timer_logs SET project_id = NULL WHERE {condition}"), {"archived": archived})
+
+    # ログだけがあるタスクはテンプレートの既定値で作成する
+    report.created_tasks = db.execute(text("""
+        INSERT INTO t_project_task (project_id, task_template_id, status, est_time_min, actual_time_min)
+        SELECT pairs.project_id, pairs.task_template_id, tt.default_status, tt.est_time_min, 0
+        FROM (
+            SELECT DISTINCT project_id, task_template_id FROM _import_timer_logs
+            WHERE project_id IS NOT NULL AND task_template_id IS NOT NULL
+        ) pairs
+        JOIN m_task_template tt ON tt.task_template_id = pairs.task_template_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM t_project_task t WHERE t.project_id = pairs.project_id AND t.task_template_id = pairs.task_template_id
+        )
+    """)).rowcount
+
+    db.execute(text("""
+        UPDATE _import_timer_logs l SET project_task_id = t.project_task_id
+        FROM (
+            SELECT project_id, task_template_id, MIN(project_task_id) AS project_task_id
+            FROM t_project_task
+            WHERE project_id IN (SELECT DISTINCT project_id FROM _import_timer_logs WHERE project_id IS NOT NULL)
+            GROUP BY project_id, task_template_id
+        ) t
+        WHERE t.project_id = l.project_id AND t.task_template_id = l.task_template_id
+    """))
+    db.execute(text("ANALYZE _import_timer_logs"))
+
+    # 過去の月のパーティションを先に作っておく（無い月の行は default パーティションに入ってしまうため）
+    months = db.execute(text("""
+        SELECT DISTINCT date_trunc('month', start_time)::date FROM _import_timer_logs WHERE project_task_id IS NOT NULL
+    """)).scalars().all()
+    ensure_timer_log_partitions(db, months)
+
+    # 追加したログの時間だけをタスクの実績時間に加算する（tasks で actual_time_min を指定したタスクはその値を合計として扱う）
+    inserted, report.recomputed_tasks = db.execute(text("""
+        WITH inserted AS (
+            INSERT INTO t_timer_log (project_task_id, start_time, end_time, duration_min, section_index, memo)
+            SELECT DISTINCT ON (l.project_task_id, l.start_time)
+                   l.project_task_id, l.start_time, l.end_time,
+                   COALESCE(l.duration_min, EXTRACT(EPOCH FROM (l.end_time - l.start_time)) / 60.0),
+                   l.section_index, l.memo
+            FROM _import_timer_logs l
+            WHERE l.project_task_id IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM t_timer_log x WHERE x.project_task_id = l.project_task_id AND x.start_time = l.start_time
+              )
+            ORDER BY l.project_task_id, l.start_time, l.line_no DESC
+            RETURNING project_task_id, duration_min
+        ),
+        updated AS (
+            UPDATE t_project_task t SET actual_time_min = t.actual_time_min + agg.total
+            FROM (SELECT project_task_id, SUM(duration_min) AS total FROM inserted GROUP BY project_task_id) agg
+            WHERE t.project_task_id = agg.project_task_id
+              AND NOT EXISTS (
+                  SELECT 1 FROM _import_tasks it
+                  WHERE it.project_id = t.project_id AND it.task_template_id = t.task_template_id
+                    AND it.actual_time_min IS NOT NULL
+              )
+            RETURNING 1
+        )
+        SELECT (SELECT COUNT(*) FROM inserted), (SELECT COUNT(*) FROM updated)
+    """)).one()
+    dataset_report = report.datasets["timer_logs"]
+    dataset_report.inserted = inserted
+    dataset_report.skipped = dataset_report.read - dataset_report.invalid - dataset_report.unresolved - inserted
+
+def recompute_totals(db: Session, report: ImportReport) -> List[int]:
+    """
+    影響を受けたプロジェクトの進捗率を再計算する。影響を受けた project_id を返す。
+    タスクの実績時間は merge_timer_logs で追加分を加算済み（切り離した月のログを失わないよう、合計し直さない）。
+    """
+    project_ids = db.execute(text("""
+        WITH affected AS (
+            SELECT p.project_id FROM _import_projects ip JOIN t_project p ON p.source_key = ip.source_key
+            UNION SELECT project_id FROM _import_tasks WHERE project_id IS NOT NULL
+            UNION SELECT project_id FROM _import_timer_logs WHERE project_id IS NOT NULL
+        )
+        UPDATE t_project p
+        SET progress_rate = agg.rate, version = p.version + 1
+        FROM (
+            SELECT t.project_id, (100 * COUNT(*) FILTER (WHERE t.status = ANY(:completed_statuses)) / COUNT(*))::int AS rate
+            FROM t_project_task t
+            WHERE t.project_id IN (SELECT project_id FROM affected)
+            GROUP BY t.project_id
+        ) agg
+        WHERE p.project_id = agg.project_id
+        RETURNING p.project_id
+    """), {"completed_statuses": list(COMPLETED_TASK_STATUSES)}).scalars().all()
+    report.recomputed_projects = len(project_ids)
+    return project_ids
+
+# ----------------------------------------------------
+# 💡 インポートの入口
+# ----------------------------------------------------
+
+def run_import(sources: Dict[str, str], dry_run: bool = False, fmt: Optional[str] = None,
+               chunk_rows: Optional[int] = None) -> ImportReport:
+    """
+    sources（データセット名 → ファイルパス）を1つのトランザクションで取り込む。
+    dry_run=True の場合は最後にロールバックし、件数とエラーだけを返す。
+    """
+    unknown = set(sources) - set(IMPORT_DATASETS)
+    if unknown:
+        raise ValueError(f"Unknown dataset(s): {', '.join(sorted(unknown))}")
+
+    report = ImportReport(dry_run=dry_run)
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": IMPORT_LOCK_ID})
+        _create_staging_tables(db)
+        for dataset in IMPORT_DATASETS:
+            if dataset in sources:
+                stage_file(db, dataset, sources[dataset], report, fmt, chunk_rows)
+
+        merge_projects(db, report)
+        merge_tasks(db, report)
+        merge_timer_logs(db, report)
+        project_ids = recompute_totals(db, report)
+        # 取り込んだ実績を見積もりの統計と分析用のロールアップに反映する
+        rebuild_estimates(db)
+        rebuild_time_rollups(db)
+
+        if dry_run:
+            db.rollback()
+        else:
+            # コミット後にダッシュボードなどのキャッシュを無効化する
+            for project_id in project_ids:
+                mark_project_changed(db, project_id)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    report.elapsed_sec = round(time.perf_counter() - started, 2)
+    return report
@@ -0,0 +1,258 @@
+# app/services/channel_growth.py
+#
+# チャンネル成長指標 (t_channel_growth) の取り込みと時系列集計
+#
+#   - 取り込み: CSV / JSON の行をまとめて検証し、1つの INSERT ... ON CONFLICT (start_date, end_date) で UPSERT する
+#     （同じ期間を取り込み直すと上書き）
+#   - 時系列: 日・週・月ごとに集計し、ウィンドウ関数で移動平均と前の区間との差を計算する。
+#     CTR はインプレッション数で重み付けする（単純平均だとインプレッションの少ない日に引きずられるため）
+#   - 期間比較: 指定期間と、同じ長さの直前の期間の合計を1クエリで比べる
+#
+# どのクエリも ux_channel_growth_period (start_date, end_date) の範囲検索で対象の行だけを読む。
+
+import csv
+import io
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+import orjson # type: ignore
+from pydantic import ValidationError # type: ignore
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..schemas.channel import ChannelGrowthIn
+from .partitions import add_months
+
+# チャンネル成長指標の設定 (環境変数で上書き可能)
+class ChannelGrowthSettings(BaseSettings):
+    channel_growth_max_batch: int = 10000 # 1回の取り込みで受け付ける行数の上限
+    channel_growth_max_errors: int = 20 # エラー応答に含める行の数
+
+channel_growth_settings = ChannelGrowthSettings()
+
+METRICS = ("views", "subscribers", "watch_time_min", "impressions", "ctr")
+
+# ----------------------------------------------------
+# 💡 取り込み
+# ----------------------------------------------------
+
+def parse_growth_payload(body: bytes, content_type: str) -> List[ChannelGrowthIn]:
+    """
+    CSV（ヘッダー行付き）または JSON（行の配列か {"rows": [...]}）を検証して返す。
+    不正な行があれば、行番号付きのメッセージで ValueError を送出する（1行も取り込まない）。
+    """
+    if "csv" in content_type:
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        records = ((reader.line_num, {key: (value or None) for key, value in row.items()}) for row in reader)
+    else:
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if isinstance(payload, dict):
+            payload = payload.get("rows")
+        if not isinstance(payload, list):
+            raise ValueError('Expected a JSON array of rows or {"rows": [...]}')
+        records = enumerate(payload, start=1)
+
+    rows, errors = [], []
+    for line_no, record in records:
+        if len(rows) + len(errors) >= channel_growth_settings.channel_growth_max_batch:
+            raise ValueError(f"Too many rows (max {channel_growth_settings.channel_growth_max_batch} per request)")
+        try:
+            rows.append(ChannelGrowthIn.model_validate(record))
+        except ValidationError as e:
+            errors.append(f"row {line_no}: " + "; ".join(
+                f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()
+            ))
+    if errors:
+        shown = errors[:channel_growth_settings.channel_growth_max_errors]
+        more = f" (and {len(errors) - len(shown)} more)" if len(errors) > len(shown) else ""
+        raise ValueError(" / ".join(shown) + more)
+    return rows
+
+def upsert_channel_growth(db: Session, rows: List[ChannelGrowthIn]) -> Tuple[int, int]:
+    """
+    行を1文で UPSERT し、(追加した件数, 上書きした件数) を返す。
+    同じ期間の行が1回の取り込みに複数あれば最後の行を使う。
+    """
+    latest: Dict[Tuple[date, date], ChannelGrowthIn] = {}
+    for row in rows:
+        latest[(row.start_date, row.end_date)] = row
+    if not latest:
+        return 0, 0
+
+    values = list(latest.values())
+    flags = db.execute(text("""
+        INSERT INTO t_channel_growth (start_date, end_date, views_count, subscriber_gain, watch_time_min,
+                                      impression_count, avg_ctr, improvements_made, recorded_at)
+        SELECT u.*, now()
+        FROM unnest(CAST(:start_dates AS DATE[]), CAST(:end_dates AS DATE[]), CAST(:views AS BIGINT[]),
+                    CAST(:subscribers AS INT[]), CAST(:watch_times AS BIGINT[]), CAST(:impressions AS BIGINT[]),
+                    CAST(:ctrs AS NUMERIC[]), CAST(:notes AS TEXT[])) AS u
+        ON CONFLICT (start_date, end_date) DO UPDATE SET
+            views_count = EXCLUDED.views_count,
+            subscriber_gain = EXCLUDED.subscriber_gain,
+            watch_time_min = EXCLUDED.watch_time_min,
+            impression_count = EXCLUDED.impression_count,
+            avg_ctr = EXCLUDED.avg_ctr,
+            improvements_made = COALESCE(EXCLUDED.improvements_made, t_channel_growth.improvements_made),
+            recorded_at = EXCLUDED.recorded_at
+        RETURNING (xmax = 0) AS inserted
+    """), {
+        "start_dates": [row.start_date for row in values],
+        "end_dates": [row.end_date for row in values],
+        "views": [row.views_count for row in values],
+        "subscribers": [row.subscriber_gain for row in values],
+        "watch_times": [row.watch_time_min for row in values],
+        "impressions": [row.impression_count for row in values],
+        "ctrs": [round(row.avg_ctr, 2) for row in values],
+        "notes": [row.improvements_made for row in values],
+    }).scalars().all()
+    inserted = sum(1 for flag in flags if flag)
+    return inserted, len(flags) - inserted
+
+# ----------------------------------------------------
+# 💡 時系列（ウィンドウ関数）
+# ----------------------------------------------------
+
+BUCKETS = ("day", "week", "month")
+
+def bucket_start(value: date, bucket: str) -> date:
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+def shift_buckets(value: date, bucket: str, count: int) -> date:
+    """value（区間の初日）から count 区間ずらした区間の初日"""
+    if bucket == "month":
+        return add_months(value, count)
+    return value + timedelta(days=count * (7 if bucket == "week" else 1))
+
+GROWTH_SERIES_SQL = """
+    WITH buckets AS (
+        SELECT date_trunc(:bucket, start_date::timestamp)::date AS period,
+               COUNT(*) AS row_count,
+               SUM(views_count) AS views,
+               SUM(subscriber_gain) AS subscribers,
+               SUM(watch_time_min) AS watch_time_min,
+               SUM(impression_count) AS impressions,
+               SUM(avg_ctr * impression_count)::float8 AS ctr_weighted
+        FROM t_channel_growth
+        WHERE start_date >= :lookback_from AND start_date < :date_to
+        GROUP BY 1
+    )
+    SELECT period, row_count, views, subscribers, watch_time_min, impressions,
+           ctr_weighted / NULLIF(impressions, 0) AS ctr,
+           AVG(views) OVER w AS views_ma,
+           AVG(subscribers) OVER w AS subscribers_ma,
+           AVG(watch_time_min) OVER w AS watch_time_min_ma,
+           AVG(impressions) OVER w AS impressions_ma,
+           SUM(ctr_weighted) OVER w / NULLIF(SUM(impressions) OVER w, 0) AS ctr_ma,
+           LAG(views) OVER o AS views_prev,
+           LAG(subscribers) OVER o AS subscribers_prev,
+           LAG(watch_time_min) OVER o AS watch_time_min_prev,
+           LAG(impressions) OVER o AS impressions_prev,
+           LAG(ctr_weighted / NULLIF(impressions, 0)) OVER o AS ctr_prev,
+           LAG(period) OVER o IS NOT NULL AS has_prev
+    FROM buckets
+    WINDOW w AS (ORDER BY period RANGE BETWEEN CAST(:ma_offset AS interval) PRECEDING AND CURRENT ROW),
+           o AS (ORDER BY period)
+    ORDER BY period
+"""
+
+GROWTH_COMPARISON_SQL = """
+    SELECT COALESCE(SUM(views_count) FILTER (WHERE cur), 0) AS views,
+           COALESCE(SUM(subscriber_gain) FILTER (WHERE cur), 0) AS subscribers,
+           COALESCE(SUM(watch_time_min) FILTER (WHERE cur), 0) AS watch_time_min,
+           COALESCE(SUM(impression_count) FILTER (WHERE cur), 0) AS impressions,
+           (SUM(avg_ctr * impression_count) FILTER (WHERE cur) / NULLIF(SUM(impression_count) FILTER (WHERE cur), 0))::float8 AS ctr,
+           COALESCE(SUM(views_count) FILTER (WHERE NOT cur), 0) AS views_prev,
+           COALESCE(SUM(subscriber_gain) FILTER (WHERE NOT cur), 0) AS subscribers_prev,
+           COALESCE(SUM(watch_time_min) FILTER (WHERE NOT cur), 0) AS watch_time_min_prev,
+           COALESCE(SUM(impression_count) FILTER (WHERE NOT cur), 0) AS impressions_prev,
+           (SUM(avg_ctr * impression_count) FILTER (WHERE NOT cur)
+               / NULLIF(SUM(impression_count) FILTER (WHERE NOT cur), 0))::float8 AS ctr_prev
+    FROM (
+        SELECT *, start_date >= :date_from AS cur
+        FROM t_channel_growth
+        WHERE start_date >= :previous_from AND start_date < :date_to
+    ) r
+"""
+
+def _metrics(row: Dict[str, Any], suffix: str = "") -> Dict[str, Any]:
+    values = {}
+    for name in METRICS:
+        value = row[name + suffix]
+        if value is not None:
+            value = round(float(value), 4) if name == "ctr" or suffix == "_ma" else int(value)
+        values[name] = value
+    return values
+
+def _delta(current: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        name: None if current[name] is None or previous[name] is None else round(current[name] - previous[name], 4)
+        for name in METRICS
+    }
+
+def _change_rate(current: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        name: None if not previous[name] or current[name] is None else round((current[name] - previous[name]) / abs(previous[name]), 4)
+        for name in METRICS
+    }
+
+def get_growth_series(db: Session, date_from: date, date_to: date, bucket: str, window: int) -> Dict[str, Any]:
+    """
+    [date_from, date_to) の指標を bucket ごとに集計し、window 区間の移動平均と前の区間との差を付けて返す。
+    date_from は区間の初日にそろえる。移動平均と差の計算に必要な分だけ、date_from より前の行も読む。
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket '{bucket}'. Choose from: {', '.join(BUCKETS)}")
+    date_from = bucket_start(date_from, bucket)
+    if date_from >= date_to:
+        raise ValueError("date_from must be earlier than date_to")
+
+    rows = db.execute(text(GROWTH_SERIES_SQL), {
+        "bucket": bucket,
+        "lookback_from": shift_buckets(date_from, bucket, -window),
+        "date_to": date_to,
+        "ma_offset": f"{window - 1} {bucket}s",
+    }).mappings().all()
+
+    points = []
+    for row in rows:
+        if row["period"] < date_from:
+            continue
+        metrics = _metrics(row)
+        points.append({
+            "period": row["period"],
+            "row_count": row["row_count"],
+            "metrics": metrics,
+            "moving_avg": _metrics(row, "_ma"),
+            "delta": _delta(metrics, _metrics(row, "_prev")) if row["has_prev"] else None,
+        })
+
+    # 直前の同じ長さの期間と比べる
+    comparison = db.execute(text(GROWTH_COMPARISON_SQL), {
+        "date_from": date_from,
+        "date_to": date_to,
+        "previous_from": date_from - (date_to - date_from),
+    }).mappings().one()
+    current, previous = _metrics(comparison), _metrics(comparison, "_prev")
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "bucket": bucket,
+        "window": window,
+        "points": points,
+        "summary": {
+            "current": current,
+            "previous": previous,
+            "delta": _delta(current, previous),
+            "change_rate": _change_rate(current, previous),
+        },
+    }
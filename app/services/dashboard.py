@@ -0,0 +1,108 @@
+# app/services/dashboard.py
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from .project_cache import TTLCache, on_projects_changed, project_cache_settings
+
+# 完了とみなすタスクステータス（画面・API経由の両方の表記を許容する）
+COMPLETED_TASK_STATUSES = ('完了', 'completed')
+# 完了ステータス (m_status)
+COMPLETED_PROJECT_STATUS_ID = 6
+
+# ダッシュボード集計のキャッシュ。同一プロセス内の書き込みはコミット時に破棄する
+dashboard_cache = TTLCache(project_cache_settings.dashboard_cache_ttl_sec)
+on_projects_changed(dashboard_cache.clear)
+
+# ----------------------------------------------------
+# 💡 ダッシュボード集計（1クエリ）
+# ----------------------------------------------------
+
+DASHBOARD_SQL = """
+    WITH p AS (
+        SELECT project_id, theme, current_status_id, progress_rate, version, created_at,
+               COALESCE(scaffold_data::jsonb -> 'discussion_flow', '[]'::jsonb) NOT IN ('[]'::jsonb, 'null'::jsonb) AS has_scaffold,
+               COALESCE(thumbnail_concept::jsonb, 'null'::jsonb) <> 'null'::jsonb AS has_thumbnail,
+               COALESCE(summary_data::jsonb, 'null'::jsonb) <> 'null'::jsonb AS has_summary
+        FROM t_project
+        WHERE (:include_completed OR current_status_id <> :completed_status_id)
+        ORDER BY created_at DESC, project_id DESC
+        LIMIT :limit
+    ),
+    task_agg AS (
+        SELECT t.project_id,
+               COUNT(*) AS task_count,
+               COUNT(*) FILTER (WHERE t.status = ANY(:completed_statuses)) AS completed_task_count,
+               COALESCE(SUM(t.est_time_min), 0) AS est_total_min,
+               COALESCE(SUM(t.actual_time_min), 0) AS actual_total_min
+        FROM t_project_task t
+        JOIN p ON p.project_id = t.project_id
+        GROUP BY t.project_id
+    ),
+    timer_agg AS (
+        SELECT t.project_id,
+               (ARRAY_AGG(t.task_template_id ORDER BY l.start_time DESC))[1] AS active_task_id,
+               MAX(l.start_time) AS active_start_time
+        FROM t_timer_log l
+        JOIN t_project_task t ON t.project_task_id = l.project_task_id
+        JOIN p ON p.project_id = t.project_id
+        WHERE l.end_time IS NULL
+        GROUP BY t.project_id
+    )
+    SELECT p.project_id, p.theme, p.current_status_id, s.status_name, p.progress_rate, p.version,
+           COALESCE(ta.task_count, 0)::int AS task_count,
+           COALESCE(ta.completed_task_count, 0)::int AS completed_task_count,
+           COALESCE(ta.est_total_min, 0)::int AS est_total_min,
+           COALESCE(ta.actual_total_min, 0)::float8 AS actual_total_min,
+           tm.active_task_id, tm.active_start_time,
+           p.has_scaffold, p.has_thumbnail, p.has_summary
+    FROM p
+    JOIN m_status s ON s.status_id = p.current_status_id
+    LEFT JOIN task_agg ta ON ta.project_id = p.project_id
+    LEFT JOIN timer_agg tm ON tm.project_id = p.project_id
+    ORDER BY p.created_at DESC, p.project_id DESC
+"""
+
+def get_dashboard(db: Session, limit: int = 50, include_completed: bool = False) -> Dict[str, Any]:
+    """
+    進行中プロジェクトのステータス・進捗・見積/実績・計測中タイマー・AI生成物の有無を
+    1回のクエリでまとめて取得する。
+    """
+    rows = db.execute(
+        text(DASHBOARD_SQL),
+        {
+            "limit": limit,
+            "include_completed": include_completed,
+            "completed_status_id": COMPLETED_PROJECT_STATUS_ID,
+            "completed_statuses": list(COMPLETED_TASK_STATUSES),
+        }
+    ).mappings().all()
+
+    projects: List[Dict[str, Any]] = []
+    for row in rows:
+        projects.append({
+            "project_id": row["project_id"],
+            "theme": row["theme"],
+            "current_status_id": row["current_status_id"],
+            "status_name": row["status_name"],
+            "progress_rate": row["progress_rate"],
+            "version": row["version"],
+            "task_count": row["task_count"],
+            "completed_task_count": row["completed_task_count"],
+            "est_total_min": row["est_total_min"],
+            "actual_total_min": row["actual_total_min"],
+            "active_timer": (
+                {"task_id": row["active_task_id"], "start_time": row["active_start_time"]}
+                if row["active_task_id"] is not None else None
+            ),
+            "artifacts": {
+                "scaffold": row["has_scaffold"],
+                "thumbnail": row["has_thumbnail"],
+                "summary": row["has_summary"],
+            },
+        })
+
+    return {"generated_at": datetime.now(), "projects": projects}
@@ -0,0 +1,188 @@
+# app/services/estimate.py
+#
+# 実績から学習する見積もりエンジン
+#
+#   - タスクテンプレートごとに、完了タスクの actual_time_min の直近 ESTIMATE_WINDOW 件を t_task_estimate に保持し、
+#     中央値・80パーセンタイル・平均・トレンド（Theil-Sen 推定の傾き）を NumPy で計算しておく
+#   - タスクの完了時・完了済みタスクのタイマー停止時に、そのテンプレートの行だけを更新する（履歴は読み直さない）
+#   - 新規プロジェクトの est_time_min は t_task_estimate から1クエリで決める
+#     （実績が ESTIMATE_MIN_SAMPLES 件未満のテンプレートは m_task_template.est_time_min を使う）
+#
+# 全件の再計算は python -m app.cli rebuild-estimates で行う（初回・一括インポート後）。
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np # type: ignore
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from .dashboard import COMPLETED_TASK_STATUSES
+
+# 見積もりの設定 (環境変数で上書き可能)
+class EstimateSettings(BaseSettings):
+    estimate_window: int = 200 # 統計に使う直近の実績件数（テンプレートごと）
+    estimate_min_samples: int = 5 # これ未満の実績しかない場合はテンプレートの既定値を使う
+    estimate_seed: str = "median" # 新規タスクの見積もりに使う統計量 (median / p80)
+
+estimate_settings = EstimateSettings()
+
+# ----------------------------------------------------
+# 💡 統計量の計算（NumPy）
+# ----------------------------------------------------
+
+def compute_estimate_stats(values: np.ndarray) -> Dict[str, Optional[float]]:
+    """
+    完了順に並んだ実績時間から統計量を計算する。
+    トレンドは全ペアの傾きの中央値（Theil-Sen 推定）で、外れ値（止め忘れのタイマーなど）に引きずられにくい。
+    """
+    if values.size == 0:
+        return {"median_min": None, "p80_min": None, "mean_min": None, "trend_min_per_task": None}
+
+    median, p80 = np.percentile(values, [50, 80])
+    trend = None
+    if values.size >= 2:
+        i, j = np.triu_indices(values.size, k=1)
+        trend = float(np.median((values[j] - values[i]) / (j - i)))
+    return {
+        "median_min": float(median),
+        "p80_min": float(p80),
+        "mean_min": float(values.mean()),
+        "trend_min_per_task": trend,
+    }
+
+def _save_estimate(db: Session, task_template_id: int, task_ids: List[int], values: List[float]):
+    stats = compute_estimate_stats(np.asarray(values, dtype=np.float64))
+    db.execute(text("""
+        INSERT INTO t_task_estimate (task_template_id, sample_count, median_min, p80_min, mean_min, trend_min_per_task,
+                                     sample_task_ids, sample_values, updated_at)
+        VALUES (:task_template_id, :sample_count, :median_min, :p80_min, :mean_min, :trend_min_per_task,
+                :sample_task_ids, :sample_values, :updated_at)
+        ON CONFLICT (task_template_id) DO UPDATE SET
+            sample_count = EXCLUDED.sample_count,
+            median_min = EXCLUDED.median_min,
+            p80_min = EXCLUDED.p80_min,
+            mean_min = EXCLUDED.mean_min,
+            trend_min_per_task = EXCLUDED.trend_min_per_task,
+            sample_task_ids = EXCLUDED.sample_task_ids,
+            sample_values = EXCLUDED.sample_values,
+            updated_at = EXCLUDED.updated_at
+    """), {
+        "task_template_id": task_template_id,
+        "sample_count": len(values),
+        "sample_task_ids": task_ids,
+        "sample_values": values,
+        "updated_at": datetime.now(),
+        **stats,
+    })
+
+# ----------------------------------------------------
+# 💡 増分更新（完了・タイマー停止時）
+# ----------------------------------------------------
+
+def record_task_actuals(db: Session, project_task_ids: Iterable[int]):
+    """
+    完了済みタスクの実績時間を、テンプレートごとの直近の実績に追加（既にあれば置き換え）して統計を更新する。
+    未完了・実績0分のタスクは無視する。呼び出し元のトランザクション内で実行され、コミットは呼び出し元で行う。
+    """
+    ids = list(project_task_ids)
+    if not ids:
+        return
+    db.flush() # 未反映のステータス・実績時間を読めるようにする
+    rows = db.execute(text("""
+        SELECT task_template_id, project_task_id, actual_time_min
+        FROM t_project_task
+        WHERE project_task_id = ANY(:ids) AND status = ANY(:completed_statuses) AND actual_time_min > 0
+        ORDER BY completed_at NULLS FIRST, project_task_id
+    """), {"ids": ids, "completed_statuses": list(COMPLETED_TASK_STATUSES)}).all()
+
+    by_template: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+    for task_template_id, project_task_id, actual in rows:
+        by_template[task_template_id].append((project_task_id, float(actual)))
+
+    window = estimate_settings.estimate_window
+    # 行ロックはテンプレートIDの順に取る（完了日時の順だと、同時に複数テンプレートを更新する処理どうしでデッドロックする）
+    for task_template_id, samples in sorted(by_template.items()):
+        # 同じテンプレートの同時更新で実績を取りこぼさないよう、行ロックしてから読み書きする
+        db.execute(text("""
+            INSERT INTO t_task_estimate (task_template_id) VALUES (:task_template_id)
+            ON CONFLICT (task_template_id) DO NOTHING
+        """), {"task_template_id": task_template_id})
+        task_ids, values = db.execute(text("""
+            SELECT sample_task_ids, sample_values FROM t_task_estimate
+            WHERE task_template_id = :task_template_id FOR UPDATE
+        """), {"task_template_id": task_template_id}).one()
+
+        positions = {task_id: index for index, task_id in enumerate(task_ids)}
+        for project_task_id, actual in samples:
+            if project_task_id in positions:
+                values[positions[project_task_id]] = actual
+            else:
+                positions[project_task_id] = len(task_ids)
+                task_ids.append(project_task_id)
+                values.append(actual)
+        _save_estimate(db, task_template_id, task_ids[-window:], values[-window:])
+
+# ----------------------------------------------------
+# 💡 全件の再計算
+# ----------------------------------------------------
+
+def rebuild_estimates(db: Session) -> int:
+    """過去の完了タスクから全テンプレートの統計を作り直し、更新したテンプレート数を返す"""
+    rows = db.execute(text("""
+        SELECT task_template_id,
+               ARRAY_AGG(project_task_id ORDER BY completed_at NULLS FIRST, project_task_id) AS task_ids,
+               ARRAY_AGG(actual_time_min ORDER BY completed_at NULLS FIRST, project_task_id) AS sample_values
+        FROM (
+            SELECT task_template_id, project_task_id, actual_time_min, completed_at,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY task_template_id ORDER BY completed_at DESC NULLS LAST, project_task_id DESC
+                   ) AS rn
+            FROM t_project_task
+            WHERE status = ANY(:completed_statuses) AND actual_time_min > 0
+        ) recent
+        WHERE rn <= :window
+        GROUP BY task_template_id
+    """), {"completed_statuses": list(COMPLETED_TASK_STATUSES), "window": estimate_settings.estimate_window}).all()
+
+    db.execute(text("DELETE FROM t_task_estimate"))
+    for task_template_id, task_ids, values in rows:
+        _save_estimate(db, task_template_id, task_ids, [float(v) for v in values])
+    return len(rows)
+
+# ----------------------------------------------------
+# 💡 見積もりの参照
+# ----------------------------------------------------
+
+def get_seed_estimates(db: Session, task_template_ids: List[int]) -> Dict[int, int]:
+    """新規タスクの est_time_min をテンプレートごとに返す（統計が十分でなければテンプレートの既定値）"""
+    rows = db.execute(text("""
+        SELECT tt.task_template_id, tt.est_time_min, e.sample_count, e.median_min, e.p80_min
+        FROM m_task_template tt
+        LEFT JOIN t_task_estimate e ON e.task_template_id = tt.task_template_id
+        WHERE tt.task_template_id = ANY(:ids)
+    """), {"ids": list(task_template_ids)}).all()
+
+    estimates = {}
+    for task_template_id, default_min, sample_count, median_min, p80_min in rows:
+        learned = p80_min if estimate_settings.estimate_seed == "p80" else median_min
+        if sample_count is not None and sample_count >= estimate_settings.estimate_min_samples and learned is not None:
+            estimates[task_template_id] = max(1, int(round(learned)))
+        else:
+            estimates[task_template_id] = default_min
+    return estimates
+
+def list_estimates(db: Session) -> List[Dict]:
+    """全テンプレートの見積もり統計（実績が無いテンプレートも含む）"""
+    rows = db.execute(text("""
+        SELECT tt.task_template_id, tt.task_name, tt.est_time_min AS default_est_time_min,
+               COALESCE(e.sample_count, 0) AS sample_count, e.median_min, e.p80_min, e.mean_min,
+               e.trend_min_per_task, e.updated_at
+        FROM m_task_template tt
+        LEFT JOIN t_task_estimate e ON e.task_template_id = tt.task_template_id
+        ORDER BY tt.task_template_id
+    """)).mappings().all()
+    seeds = get_seed_estimates(db, [row["task_template_id"] for row in rows])
+    return [{**row, "seed_est_time_min": seeds.get(row["task_template_id"])} for row in rows]
@@ -0,0 +1,166 @@
+# app/services/events.py
+
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import engine
+from ..models.project import DBProject, DBProjectTask, DBTimerLog
+from .project_cache import bump_project_version
+
+logger = logging.getLogger(__name__)
+
+# プロジェクトの変更通知に使う Postgres の NOTIFY チャンネル名
+PROJECT_EVENT_CHANNEL = "project_events"
+
+# ----------------------------------------------------
+# 💡 書き込み側: NOTIFY の発行
+# ----------------------------------------------------
+
+def publish_project_event(db: Session, project_id: int, event: str, **data: Any):
+    """
+    プロジェクトの変更を記録し、NOTIFY で通知する。
+    すべての書き込み経路から呼ばれるため、ここでプロジェクトのバージョンも進める（ETag・キャッシュの無効化）。
+    通知は呼び出し元のトランザクションがコミットされた時点で配信され、ロールバック時は破棄される。
+    ペイロードは購読者へそのまま転送するため、差分だけのコンパクトなJSONにする。
+    """
+    version = bump_project_version(db, project_id)
+    payload = {"p": project_id, "v": version, "e": event, **data}
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": PROJECT_EVENT_CHANNEL,
+            "payload": json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str),
+        }
+    )
+
+def get_project_live_snapshot(db: Session, project_id: int) -> Optional[Dict[str, Any]]:
+    """購読開始時にクライアントへ送る、ステータス・進捗・計測中タスクの最小スナップショット"""
+    row = db.query(DBProject.current_status_id, DBProject.progress_rate, DBProject.version).filter(
+        DBProject.project_id == project_id
+    ).first()
+    if not row:
+        return None
+
+    running = db.query(DBProjectTask.task_template_id, DBTimerLog.start_time).join(
+        DBTimerLog, DBTimerLog.project_task_id == DBProjectTask.project_task_id
+    ).filter(
+        DBProjectTask.project_id == project_id,
+        DBTimerLog.end_time.is_(None)
+    ).all()
+
+    return {
+        "p": project_id,
+        "v": row[2],
+        "e": "snapshot",
+        "status_id": row[0],
+        "progress_rate": row[1],
+        "running": [{"task_id": task_id, "start_time": start.isoformat()} for task_id, start in running],
+    }
+
+# ----------------------------------------------------
+# 💡 購読側: 1本の LISTEN 接続から購読者へ配信するハブ
+# ----------------------------------------------------
+
+class ProjectEventHub:
+    """
+    ワーカープロセスごとに LISTEN 接続を1本だけ持ち、受信した通知を
+    プロジェクトIDごとの購読者キューへ振り分ける。
+    ペイロード文字列は解析を1回だけ行い、購読者にはそのまま転送する。
+    """
+
+    def __init__(self, channel: str, queue_size: int = 100, poll_timeout_sec: float = 5.0):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.poll_timeout_sec = poll_timeout_sec
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def subscribe(self, project_id: int) -> asyncio.Queue:
+        """イベントループ上から呼び出し、通知を受け取るキューを返す"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[project_id].add((asyncio.get_running_loop(), queue))
+        self._ensure_listener()
+        return queue
+
+    def unsubscribe(self, project_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(project_id)
+            if not subscribers:
+                return
+            subscribers.difference_update({item for item in subscribers if item[1] is queue})
+            if not subscribers:
+                del self._subscribers[project_id]
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_timeout_sec * 2)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._listen_forever, name="project-event-listener", daemon=True)
+            self._thread.start()
+
+    def _listen_forever(self):
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning("⚠️ Project event listener disconnected, reconnecting: %s", e)
+                self._stopped.wait(3)
+
+    def _listen(self):
+        # プールから切り離した専用接続で LISTEN する
+        raw_conn = engine.raw_connection()
+        conn = raw_conn.driver_connection
+        raw_conn.detach()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self.channel}"')
+
+            while not self._stopped.is_set():
+                ready, _, _ = select.select([conn], [], [], self.poll_timeout_sec)
+                if not ready:
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._dispatch(conn.notifies.pop(0).payload)
+        finally:
+            raw_conn.close()
+
+    def _dispatch(self, payload: str):
+        try:
+            project_id = int(json.loads(payload)["p"])
+        except (ValueError, KeyError, TypeError):
+            return
+
+        with self._lock:
+            targets = list(self._subscribers.get(project_id, ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_offer, queue, payload)
+
+def _offer(queue: asyncio.Queue, payload: str):
+    """キューが溢れている遅い購読者は、古い通知から捨てる"""
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(payload)
+
+project_event_hub = ProjectEventHub(PROJECT_EVENT_CHANNEL)
@@ -0,0 +1,285 @@
+# app/services/export.py
+#
+# プロジェクト・タスク・タイマーログの一括エクスポート（オフライン分析用）
+#
+#   - サーバーサイドカーソル（stream_results + yield_per）で EXPORT_CHUNK_ROWS 行ずつ読み、
+#     チャンクごとに NDJSON / CSV / Parquet のバイト列にして返す。
+#     件数が1千件でも1千万件でも、メモリに載るのは常に1チャンク分だけ
+#   - 作成日時・開始日時の範囲、プロジェクトのステータス、タスクのステータスで絞り込める
+#   - Parquet は pyarrow が入っている場合だけ使える（1チャンク = 1行グループ）
+#
+# HTTP（/export/{dataset}）と CLI（python -m app.cli export）の両方から使う。
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson # type: ignore
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+
+from ..database import engine
+
+# エクスポートの設定 (環境変数で上書き可能)
+class ExportSettings(BaseSettings):
+    export_chunk_rows: int = 5000 # サーバーサイドカーソルから一度に取り出す行数（= Parquet の行グループの行数）
+
+export_settings = ExportSettings()
+
+class ExportUnavailableError(RuntimeError):
+    """指定の形式に必要なライブラリが入っていない"""
+
+# ----------------------------------------------------
+# 💡 データセットの定義
+# ----------------------------------------------------
+
+@dataclass(frozen=True)
+class ExportDataset:
+    name: str
+    from_clause: str
+    # (列名, SQL式, 型) 型は int / float / str / datetime
+    columns: List[Tuple[str, str, str]]
+    # マスタの名称列（with_names=True のときだけ追加）とそのための JOIN
+    name_columns: List[Tuple[str, str, str]]
+    name_joins: str
+    date_column: str # 日付範囲で絞り込む列
+    order_by: str
+    task_status_column: Optional[str] = None
+
+    def select_columns(self, with_names: bool) -> List[Tuple[str, str, str]]:
+        return self.columns + (self.name_columns if with_names else [])
+
+EXPORT_DATASETS: Dict[str, ExportDataset] = {
+    "projects": ExportDataset(
+        name="projects",
+        from_clause="t_project p",
+        columns=[
+            ("project_id", "p.project_id", "int"),
+            ("type_id", "p.type_id", "int"),
+            ("current_status_id", "p.current_status_id", "int"),
+            ("theme", "p.theme", "str"),
+            ("input_angle_id", "p.input_angle_id", "int"),
+            ("final_title", "p.final_title", "str"),
+            ("created_at", "p.created_at", "datetime"),
+            ("published_at", "p.published_at", "datetime"),
+            ("progress_rate", "p.progress_rate", "int"),
+            ("version", "p.version", "int"),
+        ],
+        name_columns=[
+            ("status_name", "s.status_name", "str"),
+            ("angle_name", "a.angle_name", "str"),
+        ],
+        name_joins="""
+            LEFT JOIN m_status s ON s.status_id = p.current_status_id
+            LEFT JOIN m_personal_angle a ON a.angle_id = p.input_angle_id
+        """,
+        date_column="p.created_at",
+        order_by="p.project_id",
+    ),
+    "tasks": ExportDataset(
+        name="tasks",
+        from_clause="t_project_task t JOIN t_project p ON p.project_id = t.project_id",
+        columns=[
+            ("project_task_id", "t.project_task_id", "int"),
+            ("project_id", "t.project_id", "int"),
+            ("task_template_id", "t.task_template_id", "int"),
+            ("status", "t.status", "str"),
+            ("est_time_min", "t.est_time_min", "int"),
+            ("actual_time_min", "t.actual_time_min", "float"),
+            ("completed_at", "t.completed_at", "datetime"),
+            ("project_created_at", "p.created_at", "datetime"),
+            ("project_status_id", "p.current_status_id", "int"),
+        ],
+        name_columns=[
+            ("task_name", "tt.task_name", "str"),
+            ("task_category", "tt.task_category", "str"),
+            ("project_status_name", "s.status_name", "str"),
+        ],
+        name_joins="""
+            LEFT JOIN m_task_template tt ON tt.task_template_id = t.task_template_id
+            LEFT JOIN m_status s ON s.status_id = p.current_status_id
+        """,
+        date_column="p.created_at",
+        order_by="t.project_task_id",
+        task_status_column="t.status",
+    ),
+    "timer_logs": ExportDataset(
+        name="timer_logs",
+        from_clause="""
+            t_timer_log l
+            JOIN t_project_task t ON t.project_task_id = l.project_task_id
+            JOIN t_project p ON p.project_id = t.project_id
+        """,
+        columns=[
+            ("log_id", "l.log_id", "int"),
+            ("project_task_id", "l.project_task_id", "int"),
+            ("project_id", "t.project_id", "int"),
+            ("task_template_id", "t.task_template_id", "int"),
+            ("start_time", "l.start_time", "datetime"),
+            ("end_time", "l.end_time", "datetime"),
+            ("duration_min", "l.duration_min", "float"),
+            ("section_index", "l.section_index", "int"),
+            ("memo", "l.memo", "str"),
+        ],
+        name_columns=[
+            ("task_name", "tt.task_name", "str"),
+            ("project_status_name", "s.status_name", "str"),
+        ],
+        name_joins="""
+            LEFT JOIN m_task_template tt ON tt.task_template_id = t.task_template_id
+            LEFT JOIN m_status s ON s.status_id = p.current_status_id
+        """,
+        date_column="l.start_time",
+        order_by="l.log_id",
+        task_status_column="t.status",
+    ),
+}
+
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    # 形式: (Content-Type, 拡張子)
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+@dataclass
+class ExportFilters:
+    date_from: Optional[datetime] = None # この日時以降（含む）
+    date_to: Optional[datetime] = None # この日時より前（含まない）
+    status_ids: List[int] = field(default_factory=list) # プロジェクトのステータス (m_status)
+    task_statuses: List[str] = field(default_factory=list) # タスクのステータス（tasks / timer_logs のみ）
+
+def build_export_query(dataset: ExportDataset, filters: ExportFilters, with_names: bool) -> Tuple[str, Dict[str, Any]]:
+    """データセットと絞り込み条件から SELECT 文とパラメータを組み立てる"""
+    conditions, params = [], {}
+    if filters.date_from is not None:
+        conditions.append(f"{dataset.date_column} >= :date_from")
+        params["date_from"] = filters.date_from
+    if filters.date_to is not None:
+        conditions.append(f"{dataset.date_column} < :date_to")
+        params["date_to"] = filters.date_to
+    if filters.status_ids:
+        conditions.append("p.current_status_id = ANY(:status_ids)")
+        params["status_ids"] = list(filters.status_ids)
+    if filters.task_statuses:
+        if dataset.task_status_column is None:
+            raise ValueError(f"task_status filter is not supported for '{dataset.name}'")
+        conditions.append(f"{dataset.task_status_column} = ANY(:task_statuses)")
+        params["task_statuses"] = list(filters.task_statuses)
+
+    select_list = ", ".join(f"{expression} AS {name}" for name, expression, _ in dataset.select_columns(with_names))
+    sql = f"""
+        SELECT {select_list}
+        FROM {dataset.from_clause}
+        {dataset.name_joins if with_names else ""}
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY {dataset.order_by}
+    """
+    return sql, params
+
+def iter_export_rows(sql: str, params: Dict[str, Any], chunk_rows: int) -> Iterator[List[tuple]]:
+    """サーバーサイドカーソルで chunk_rows 行ずつ読み出す（接続は読み終わるか中断されたら返却される）"""
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_rows).execute(text(sql), params)
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+# ----------------------------------------------------
+# 💡 形式ごとの書き出し（チャンクごとに bytes を返す）
+# ----------------------------------------------------
+
+def ndjson_chunks(names: List[str], partitions: Iterator[List[tuple]]) -> Iterator[bytes]:
+    for rows in partitions:
+        yield b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in rows)
+
+def csv_chunks(names: List[str], partitions: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(names)
+    yield buffer.getvalue().encode("utf-8")
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+class _ChunkSink:
+    """ParquetWriter の書き込み先。書かれたバイト列を溜めておき、チャンクごとに取り出す"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+def _import_pyarrow():
+    try:
+        import pyarrow # type: ignore
+        import pyarrow.parquet # type: ignore
+    except ImportError:
+        raise ExportUnavailableError("Parquet export requires pyarrow. Install it with `pip install pyarrow`.")
+    return pyarrow, pyarrow.parquet
+
+def parquet_chunks(columns: List[Tuple[str, str, str]], partitions: Iterator[List[tuple]]) -> Iterator[bytes]:
+    pa, pq = _import_pyarrow()
+    arrow_types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "datetime": pa.timestamp("us")}
+    schema = pa.schema([(name, arrow_types[kind]) for name, _, kind in columns])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in partitions:
+            arrays = [pa.array(values, type=schema.field(i).type) for i, values in enumerate(zip(*rows))]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+# ----------------------------------------------------
+# 💡 エクスポートの入口
+# ----------------------------------------------------
+
+def export_stream(dataset_name: str, fmt: str, filters: ExportFilters, with_names: bool = True,
+                  chunk_rows: Optional[int] = None) -> Iterator[bytes]:
+    """
+    エクスポートのバイト列をチャンクごとに返すイテレーターを作る。
+    引数の検証（不明なデータセット・形式、pyarrow の有無）はここで行い、DBへの問い合わせは最初のチャンクを読んだときに始まる。
+    """
+    dataset = EXPORT_DATASETS.get(dataset_name)
+    if dataset is None:
+        raise ValueError(f"Unknown dataset '{dataset_name}'. Choose from: {', '.join(EXPORT_DATASETS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet":
+        _import_pyarrow()
+
+    sql, params = build_export_query(dataset, filters, with_names)
+    columns = dataset.select_columns(with_names)
+    partitions = iter_export_rows(sql, params, chunk_rows or export_settings.export_chunk_rows)
+    if fmt == "ndjson":
+        return ndjson_chunks([name for name, _, _ in columns], partitions)
+    if fmt == "csv":
+        return csv_chunks([name for name, _, _ in columns], partitions)
+    return parquet_chunks(columns, partitions)
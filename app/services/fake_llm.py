@@ -0,0 +1,70 @@
+# app/services/fake_llm.py
+#
+# 負荷試験・ローカル開発用の疑似LLMクライアント（AI_BACKEND=fake で有効になる）。
+# genai.Client と同じ client.models.generate_content(...) の呼び出し形を持ち、
+# プロンプトの内容から骨子・サムネイル・サマリーのどれかを判定して、スキーマに沿ったJSONを返す。
+
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Dict
+
+# プロンプト中の目印（ai_generator.py のプロンプトに含まれる語句）
+THUMBNAIL_MARKER = "サムネイルデザイナー"
+SUMMARY_MARKER = "生産性コンサルタント"
+QUESTION_MARKER = "質問を1つだけ作り直して"
+
+def _scaffold(prompt: str) -> Dict[str, Any]:
+    return {
+        "suggested_title": "【疑似生成】テーマを深掘りするトーク",
+        "script_intro_text": "これは負荷試験用の疑似LLMが生成した導入フックです。",
+        "discussion_flow": [
+            {"question_text": f"疑似質問{i + 1}: 具体的な体験を教えてください。", "target_time_min": 1.5, "angle_type": "具体的体験"}
+            for i in range(8)
+        ],
+    }
+
+def _question(prompt: str) -> Dict[str, Any]:
+    return {"question_text": "疑似質問（再生成）: その時どう感じましたか？", "target_time_min": 1.5, "angle_type": "共感"}
+
+def _thumbnail(prompt: str) -> Dict[str, Any]:
+    return {
+        "visual_theme": "衝撃的な対比",
+        "required_elements": ["視聴者を挑発する一文", "主要なキービジュアル"],
+        "emotion_target": "疑問",
+        "concept_description": "負荷試験用の疑似サムネイルコンセプトです。",
+    }
+
+def _summary(prompt: str) -> Dict[str, Any]:
+    return {
+        "overall_assessment": "疑似サマリー: 予定どおりに進行しました。",
+        "key_achievements": ["全工程の計測"],
+        "time_management_reflection": "見積もりとの乖離は小さく、大きな問題はありません。",
+        "habit_improvement_suggestion": "収録作業は午前中に実施しましょう。",
+    }
+
+class _FakeModels:
+    def __init__(self, latency_ms: int):
+        self.latency_ms = latency_ms
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> SimpleNamespace:
+        prompt = contents if isinstance(contents, str) else str(contents)
+        if THUMBNAIL_MARKER in prompt:
+            data = _thumbnail(prompt)
+        elif SUMMARY_MARKER in prompt:
+            data = _summary(prompt)
+        elif QUESTION_MARKER in prompt:
+            data = _question(prompt)
+        else:
+            data = _scaffold(prompt)
+
+        # 💡 実際のAPI呼び出しの待ち時間を模擬する（ワーカーのスレッドを占有する点も本番と同じ）
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        return SimpleNamespace(text=json.dumps(data, ensure_ascii=False))
+
+class FakeGenAIClient:
+    """genai.Client の代わりに使う疑似クライアント"""
+
+    def __init__(self, latency_ms: int = 0):
+        self.models = _FakeModels(latency_ms)
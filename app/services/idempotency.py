@@ -0,0 +1,144 @@
+# app/services/idempotency.py
+
+import hashlib
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException # type: ignore
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+
+from ..database import engine
+
+# 冪等キーの設定 (環境変数で上書き可能)
+class IdempotencySettings(BaseSettings):
+    idempotency_ttl_hours: float = 24.0 # 保存したレスポンスを再利用できる期間
+    idempotency_processing_timeout_sec: int = 300 # processing のまま残った記録を、前の処理が異常終了したとみなして引き継ぐまでの時間
+    idempotency_wait_timeout_sec: float = 60.0 # 同じキーの処理の完了を待つ最大時間（超えたら 409）
+    idempotency_poll_interval_sec: float = 0.1 # 完了待ちの最初のポーリング間隔（待つたびに倍にする）
+    idempotency_poll_max_interval_sec: float = 2.0 # ポーリング間隔の上限
+
+idempotency_settings = IdempotencySettings()
+
+# ----------------------------------------------------
+# 💡 補助関数
+# ----------------------------------------------------
+
+def request_fingerprint(method: str, path: str, body: Any = None) -> str:
+    """メソッド・パス・ボディから、同一リクエストか判定するためのハッシュを作る"""
+    canonical = json.dumps([method.upper(), path, body], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+# ----------------------------------------------------
+# 💡 冪等実行
+# ----------------------------------------------------
+
+# 記録の取得（新しいキー・期限切れの記録・異常終了した処理の記録だけを processing にして取得する）
+CLAIM_SQL = """
+    INSERT INTO t_idempotency_key (idempotency_key, request_fingerprint, status, created_at, expires_at)
+    VALUES (:key, :fingerprint, 'processing', :now, :expires_at)
+    ON CONFLICT (idempotency_key) DO UPDATE
+    SET request_fingerprint = EXCLUDED.request_fingerprint,
+        status = 'processing', response_status = NULL, response_body = NULL,
+        created_at = EXCLUDED.created_at, expires_at = EXCLUDED.expires_at
+    WHERE t_idempotency_key.expires_at < :now
+       OR (t_idempotency_key.status = 'processing'
+           AND t_idempotency_key.request_fingerprint = EXCLUDED.request_fingerprint
+           AND t_idempotency_key.created_at < :stale_before)
+    RETURNING created_at
+"""
+
+def _claim(key: str, fingerprint: str) -> Tuple[Optional[datetime], Optional[Any]]:
+    """
+    キーの記録を取得する。取得できた場合は (取得した時刻, None)、
+    既に記録がある場合は (None, 記録) を返す。各文は短いトランザクションで確定させ、接続を持ち続けない。
+    """
+    now = datetime.now()
+    with engine.begin() as conn:
+        # 期限切れの記録はときどきまとめて掃除する
+        if random.random() < 0.01:
+            conn.execute(text("DELETE FROM t_idempotency_key WHERE expires_at < now()"))
+        claimed = conn.execute(text(CLAIM_SQL), {
+            "key": key,
+            "fingerprint": fingerprint,
+            "now": now,
+            "expires_at": now + timedelta(hours=idempotency_settings.idempotency_ttl_hours),
+            "stale_before": now - timedelta(seconds=idempotency_settings.idempotency_processing_timeout_sec),
+        }).scalar()
+        if claimed is not None:
+            return claimed, None
+        row = conn.execute(
+            text("""
+                SELECT request_fingerprint, status, response_status, response_body
+                FROM t_idempotency_key WHERE idempotency_key = :key
+            """),
+            {"key": key}
+        ).mappings().first()
+    return None, row
+
+def run_idempotent(
+    key: Optional[str],
+    fingerprint: str,
+    work: Callable[[], Tuple[int, Any]]
+) -> Tuple[int, Any, bool]:
+    """
+    Idempotency-Key 付きのリクエストを1回だけ実行する。
+    work は (HTTPステータス, JSON化可能なレスポンス) を返す関数。
+    戻り値は (HTTPステータス, レスポンス, 保存済みレスポンスの再送かどうか)。
+
+    - 同じキーで処理が完了済みなら、work を呼ばずに保存済みのレスポンスを返す
+    - 同じキーの処理が実行中なら、完了を待ってから保存済みのレスポンスを返す。待つ間は記録の行を
+      間隔を延ばしながらポーリングし、トランザクションも接続も持ち続けない。
+      IDEMPOTENCY_WAIT_TIMEOUT_SEC を過ぎても完了しなければ 409 を返す
+    - IDEMPOTENCY_PROCESSING_TIMEOUT_SEC を過ぎても processing のままの記録は、前の処理が異常終了したとみなして引き継ぐ
+    - 同じキーで異なる内容のリクエストが来た場合は 422
+    - work が例外を投げた場合は記録を削除し、再送で再実行できるようにする
+    """
+    if not key:
+        status_code, body = work()
+        return status_code, body, False
+
+    deadline = time.monotonic() + idempotency_settings.idempotency_wait_timeout_sec
+    interval = idempotency_settings.idempotency_poll_interval_sec
+    while True:
+        # 記録が消えていた（先の処理が失敗した）場合は、次の _claim で自分が取得して実行する
+        claimed_at, row = _claim(key, fingerprint)
+        if claimed_at is not None:
+            break
+        if row is not None:
+            if row["request_fingerprint"] != fingerprint:
+                raise HTTPException(status_code=422, detail="この Idempotency-Key は別の内容のリクエストで使用済みです。")
+            if row["status"] == "completed":
+                return row["response_status"], row["response_body"], True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=409,
+                detail="同じ Idempotency-Key のリクエストが処理中です。時間をおいて再送してください。",
+                headers={"Retry-After": "5"}
+            )
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, idempotency_settings.idempotency_poll_max_interval_sec)
+
+    # 更新・削除は自分が取得した記録（created_at が一致するもの）だけを対象にする
+    claim = {"key": key, "claimed_at": claimed_at}
+    try:
+        status_code, body = work()
+    except Exception:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM t_idempotency_key WHERE idempotency_key = :key AND created_at = :claimed_at"), claim)
+        raise
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                UPDATE t_idempotency_key
+                SET status = 'completed', response_status = :status_code, response_body = CAST(:body AS JSONB)
+                WHERE idempotency_key = :key AND created_at = :claimed_at
+            """),
+            {**claim, "status_code": status_code, "body": json.dumps(body, ensure_ascii=False, default=str)}
+        )
+    return status_code, body, False
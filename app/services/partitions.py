@@ -0,0 +1,188 @@
+# app/services/partitions.py
+#
+# t_timer_log の月別パーティションの管理
+#
+#   - t_timer_log は start_time の月ごとにレンジパーティション（t_timer_log_pYYYYMM）に分かれている。
+#     どの月にも当たらない行は t_timer_log_default に入る（パーティションの作成漏れでINSERTが失敗しないように）
+#   - ensure  : 今月の前後（前月〜 TIMER_LOG_PARTITIONS_AHEAD か月先）と、default に入っている月のパーティションを作り、
+#               default の行を移す。init_db と python -m app.cli partitions ensure から呼ばれる
+#   - archive : TIMER_LOG_RETENTION_MONTHS より古い月を切り離し（DETACH）、archive スキーマへ移す。
+#               計測中のログが残っている月は切り離さない
+#   - restore : archive スキーマの月を t_timer_log に付け直す
+#
+# 実績時間（t_project_task.actual_time_min）とロールアップ（t_time_rollup_*）は停止時に加算済みのため、
+# 古い月を切り離しても集計値は変わらない。
+
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+
+# パーティション管理の設定 (環境変数で上書き可能)
+class PartitionSettings(BaseSettings):
+    timer_log_partitions_ahead: int = 3 # 何か月先までパーティションを作っておくか
+    timer_log_retention_months: int = 12 # t_timer_log に付けたままにする月数（今月を含む）
+    timer_log_archive_schema: str = "archive" # 切り離したパーティションの移動先
+
+partition_settings = PartitionSettings()
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "t_timer_log"
+DEFAULT_PARTITION = "t_timer_log_default"
+
+# ----------------------------------------------------
+# 💡 月とパーティション名
+# ----------------------------------------------------
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+def parse_partition_month(name: str) -> Optional[date]:
+    """t_timer_log_pYYYYMM から月を取り出す（default などは None）"""
+    prefix = f"{PARENT_TABLE}_p"
+    suffix = name[len(prefix):]
+    if not name.startswith(prefix) or len(suffix) != 6 or not suffix.isdigit():
+        return None
+    return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+# ----------------------------------------------------
+# 💡 一覧
+# ----------------------------------------------------
+
+def list_timer_log_partitions(conn) -> List[Dict[str, Any]]:
+    """付いているパーティションと archive スキーマのパーティションを、月・行数（推定）・サイズと一緒に返す"""
+    rows = conn.execute(text("""
+        SELECT c.relname AS name, n.nspname AS schema, i.inhparent IS NOT NULL AS attached,
+               c.reltuples::bigint AS estimated_rows,
+               pg_total_relation_size(c.oid) AS total_bytes,
+               pg_indexes_size(c.oid) AS index_bytes
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_inherits i ON i.inhrelid = c.oid AND i.inhparent = CAST(:parent AS regclass)
+        WHERE c.relkind = 'r'
+          AND (i.inhparent IS NOT NULL OR (n.nspname = :archive_schema AND c.relname LIKE :pattern))
+        ORDER BY c.relname
+    """), {
+        "parent": PARENT_TABLE,
+        "archive_schema": partition_settings.timer_log_archive_schema,
+        "pattern": f"{PARENT_TABLE}_p%",
+    }).mappings().all()
+    return [{**row, "month": parse_partition_month(row["name"])} for row in rows]
+
+def timer_log_history_start(conn) -> Optional[date]:
+    """
+    古い月を archive に切り離している場合は、t_timer_log に残っている最も古い月の初日を返す（切り離していなければ None）。
+    ロールアップの作り直しなど、ログ全体を読み直す処理はこの日より前を対象外にする。
+    """
+    partitions = [p for p in list_timer_log_partitions(conn) if p["month"] is not None]
+    if not any(not p["attached"] for p in partitions):
+        return None
+    attached = [p["month"] for p in partitions if p["attached"]]
+    return min(attached) if attached else None
+
+# ----------------------------------------------------
+# 💡 作成（今後の月・default に入った月）
+# ----------------------------------------------------
+
+def _attach_month(conn, month: date):
+    """月のパーティションを作り、default に入っている同じ月の行を移してから付ける"""
+    name, upper = partition_name(month), add_months(month, 1)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE start_time >= :lower AND start_time < :upper RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), {"lower": month, "upper": upper})
+    conn.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    ))
+
+def ensure_timer_log_partitions(conn, months: Iterable[date] = (), today: Optional[date] = None) -> List[str]:
+    """
+    default パーティションと、前月〜 TIMER_LOG_PARTITIONS_AHEAD か月先・months・default に行がある月のパーティションを作る。
+    作成したパーティション名を返す。呼び出し元のトランザクション内で実行される。
+    """
+    created: List[str] = []
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is None:
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+        created.append(DEFAULT_PARTITION)
+
+    current = month_start(today or date.today())
+    wanted = {add_months(current, offset) for offset in range(-1, partition_settings.timer_log_partitions_ahead + 1)}
+    wanted.update(month_start(month) for month in months)
+    wanted.update(conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', start_time)::date FROM {DEFAULT_PARTITION}"
+    )).scalars())
+
+    existing = {p["month"]: p for p in list_timer_log_partitions(conn) if p["month"] is not None}
+    for month in sorted(wanted):
+        partition = existing.get(month)
+        if partition is None:
+            _attach_month(conn, month)
+            created.append(partition_name(month))
+        elif not partition["attached"]:
+            # 切り離した月の行は default に残す（restore で付け直すと移る）
+            logger.warning("⚠️ %s is archived; rows for that month stay in %s until it is restored.", partition_name(month), DEFAULT_PARTITION)
+    return created
+
+# ----------------------------------------------------
+# 💡 切り離し（archive スキーマへ）と付け直し
+# ----------------------------------------------------
+
+def archive_timer_log_partitions(conn, keep_months: Optional[int] = None, today: Optional[date] = None,
+                                 dry_run: bool = False) -> Dict[str, List[str]]:
+    """
+    今月から keep_months か月より前の月を t_timer_log から切り離し、archive スキーマへ移す。
+    計測中（end_time が NULL）のログが残っている月はスキップする。
+    """
+    keep_months = partition_settings.timer_log_retention_months if keep_months is None else keep_months
+    cutoff = add_months(month_start(today or date.today()), -(keep_months - 1))
+    schema = partition_settings.timer_log_archive_schema
+    result: Dict[str, List[str]] = {"archived": [], "skipped": []}
+
+    for partition in list_timer_log_partitions(conn):
+        month = partition["month"]
+        if not partition["attached"] or month is None or month >= cutoff:
+            continue
+        name = partition["name"]
+        has_open = conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE end_time IS NULL)")).scalar()
+        if has_open:
+            result["skipped"].append(name)
+            continue
+        if not dry_run:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+        result["archived"].append(name)
+    return result
+
+def restore_timer_log_partition(conn, month: date) -> str:
+    """archive スキーマの月を t_timer_log に付け直す（default に入っていた同じ月の行も移す）"""
+    month = month_start(month)
+    name, upper = partition_name(month), add_months(month, 1)
+    schema = partition_settings.timer_log_archive_schema
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": f"{schema}.{name}"}).scalar() is None:
+        raise ValueError(f"{schema}.{name} does not exist")
+
+    conn.execute(text(f"ALTER TABLE {schema}.{name} SET SCHEMA public"))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE start_time >= :lower AND start_time < :upper RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), {"lower": month, "upper": upper})
+    conn.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    ))
+    return name
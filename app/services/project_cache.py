@@ -0,0 +1,158 @@
+# app/services/project_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import event, text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import SessionLocal
+from ..models.project import DBProject
+
+# レスポンスキャッシュの設定 (環境変数で上書き可能)
+class ProjectCacheSettings(BaseSettings):
+    project_response_cache_size: int = 256 # 保持するシリアライズ済みレスポンスの件数
+    dashboard_cache_ttl_sec: float = 5.0 # ダッシュボード集計のキャッシュ有効期間（秒）
+
+project_cache_settings = ProjectCacheSettings()
+
+# ----------------------------------------------------
+# 💡 プロジェクトのバージョン管理
+# ----------------------------------------------------
+
+def bump_project_version(db: Session, project_id: int) -> Optional[int]:
+    """
+    プロジェクトのバージョンを1つ進め、新しいバージョンを返す。
+    呼び出し元のトランザクション内で実行されるため、コミットされた時点で反映される。
+    """
+    version = db.execute(
+        text("UPDATE t_project SET version = version + 1 WHERE project_id = :project_id RETURNING version"),
+        {"project_id": project_id}
+    ).scalar()
+    mark_project_changed(db, project_id)
+    return version
+
+def mark_project_changed(db: Session, project_id: int):
+    """コミット後に無効化リスナーへ通知するため、変更したプロジェクトをセッションに記録する"""
+    db.info.setdefault("changed_project_ids", set()).add(project_id)
+
+def get_project_version(db: Session, project_id: int) -> Optional[int]:
+    """プロジェクトの現在のバージョンだけを取得する（存在しない場合は None）"""
+    return db.query(DBProject.version).filter(DBProject.project_id == project_id).scalar()
+
+# ----------------------------------------------------
+# 💡 コミット後の無効化通知
+#    バージョンで管理できない集計キャッシュ（ダッシュボードなど）は、
+#    コミットが確定した時点でここに登録したリスナーが無効化する。
+# ----------------------------------------------------
+
+_invalidation_listeners: List[Callable[[Set[int]], None]] = []
+
+def on_projects_changed(listener: Callable[[Set[int]], None]):
+    """プロジェクトの変更がコミットされたときに呼ばれるリスナーを登録する"""
+    _invalidation_listeners.append(listener)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _notify_projects_changed(session: Session):
+    changed = session.info.pop("changed_project_ids", None)
+    if not changed:
+        return
+    for listener in _invalidation_listeners:
+        listener(changed)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_projects_changed(session: Session):
+    session.info.pop("changed_project_ids", None)
+
+# ----------------------------------------------------
+# 💡 ETag
+# ----------------------------------------------------
+
+def make_project_etag(project_id: int, version: int, variant: str = "") -> str:
+    """プロジェクトIDとバージョン（とレスポンスの種類）から強いETagを作る"""
+    suffix = f"-{variant}" if variant else ""
+    return f'"p{project_id}-v{version}{suffix}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダーが現在のETagに一致するか判定する"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+# ----------------------------------------------------
+# 💡 シリアライズ済みレスポンスのLRUキャッシュ
+# ----------------------------------------------------
+
+class ResponseLRUCache:
+    """
+    (project_id, version, ...) をキーに、シリアライズ済みのレスポンス（bytes）を保持する。
+    キーにバージョンを含むため、書き込み後の古いエントリは参照されずに自然に追い出される。
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Hashable, body: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+project_response_cache = ResponseLRUCache(project_cache_settings.project_response_cache_size)
+
+# ----------------------------------------------------
+# 💡 短期間のTTLキャッシュ（集計結果用）
+# ----------------------------------------------------
+
+class TTLCache:
+    """
+    集計結果のように複数プロジェクトにまたがるレスポンスを短時間だけ保持する。
+    同一プロセス内の書き込みは on_projects_changed で即座に無効化され、
+    他のワーカーの書き込みは TTL の経過で反映される。
+    """
+
+    def __init__(self, ttl_sec: float):
+        self.ttl_sec = ttl_sec
+        self._entries: Dict[Hashable, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, body = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return body
+
+    def put(self, key: Hashable, body: bytes):
+        if self.ttl_sec <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_sec, body)
+
+    def clear(self, *_args):
+        with self._lock:
+            self._entries.clear()
@@ -1,9 +1,13 @@
 from http.client import HTTPException
 from sqlalchemy.orm import Session # type: ignore
-from sqlalchemy import func, select # type: ignore
+from sqlalchemy import func, select, text # type: ignore
 from ..models.project import DBProject, DBProjectTask, DBTimerLog, DBTaskTemplate
-from ..models.master import DBTransitionRule
 from ..schemas.project import ProjectCreate, TimerStart, TimerStop, TaskTemplateCreate
+from .events import publish_project_event
+from .project_cache import mark_project_changed
+from .estimate import get_seed_estimates
+from .rollups import init_project_rollup
+from .quality import PENDING_REQUIRED_CHECKS_SQL
 from datetime import datetime
 from typing import Any, Dict, List
 
@@ -37,16 +41,21 @@ def create_initial_project(db: Session, project_in: ProjectCreate) -> DBProject:
     
     # 3. 初期サブタスクを生成し、DBに登録
     # ※ 本来はm_task_templateから情報を取得しますが、ここではタスクIDを仮定します
-    #    また、est_time_minもm_task_templateから取得する必要がありますが、ここでは仮定値を使用します
+    # 💡 見積もり時間は過去の実績から学習した値（t_task_estimate）を1クエリで取得する（履歴は走査しない）
+    estimates = get_seed_estimates(db, INITIAL_TASK_IDS)
+    est_times = {task_id: estimates.get(task_id, 30) for task_id in INITIAL_TASK_IDS} # テンプレートが無い場合は仮の見積もり時間
     for task_id in INITIAL_TASK_IDS:
         db_task = DBProjectTask(
             project_id=project_id,
             task_template_id=task_id,
             status="未着手",
-            est_time_min=30 # 仮の見積もり時間
+            est_time_min=est_times[task_id]
         )
         db.add(db_task)
+    # 分析用のプロジェクト別ロールアップに見積時間の合計を登録する
+    init_project_rollup(db, project_id, sum(est_times.values()))
     
+    mark_project_changed(db, project_id)
     db.commit()
     db.refresh(db_project)
     
@@ -56,48 +65,56 @@ def get_project_by_id(db: Session, project_id: int) -> DBProject:
     """プロジェクトIDからプロジェクトとそのサブタスクを取得する"""
     return db.query(DBProject).filter(DBProject.project_id == project_id).first()
 
+# 1回のチェックで続けて遷移する最大の段数（ルールが循環していても止まるように）
+MAX_TRANSITION_STEPS = 6
+
+# 遷移条件（必要なタスクがすべて完了、require_quality_checks のルールは必須の品質チェックも完了）を満たす
+# 最初のルールで、現在のステータスのまま変わっていなければ遷移する（判定と更新を1文で行う）
+TRANSITION_SQL = f"""
+    WITH rule AS (
+        SELECT p.project_id, p.current_status_id AS from_status_id, r.next_status_id
+        FROM t_project p
+        JOIN m_transition_rule r ON r.current_status_id = p.current_status_id AND r.is_active
+        WHERE p.project_id = :project_id
+          AND p.current_status_id <> :completed_status_id
+          AND r.required_task_ids <@ ARRAY(
+              SELECT t.task_template_id FROM t_project_task t
+              WHERE t.project_id = p.project_id AND t.status = '完了'
+          )
+          AND (NOT r.require_quality_checks OR NOT {PENDING_REQUIRED_CHECKS_SQL})
+        ORDER BY r.rule_id
+        LIMIT 1
+    )
+    UPDATE t_project p
+    SET current_status_id = rule.next_status_id
+    FROM rule
+    WHERE p.project_id = rule.project_id AND p.current_status_id = rule.from_status_id
+    RETURNING rule.from_status_id, rule.next_status_id
+"""
+
 def check_and_transition_status(db: Session, project_id: int):
     """
-    プロジェクトの現在のステータスと完了タスクに基づき、
+    プロジェクトの現在のステータスと完了タスク（と品質チェック）に基づき、
     次のステータスへ自動遷移するかどうかをチェックし、実行する。
+    タスクが順番どおりに完了しなかった場合も追いつけるよう、条件を満たすルールがなくなるまで続けて遷移する。
     """
-    project = get_project_by_id(db, project_id)
-    if not project or project.current_status_id == 6: # 完了ステータスはスキップ
-        return False
-
-    current_status_id = project.current_status_id
-
-    # 1. 現在のステータスからの遷移ルールを取得
-    rules: List[DBTransitionRule] = db.query(DBTransitionRule).filter(
-        DBTransitionRule.current_status_id == current_status_id,
-        DBTransitionRule.is_active == True
-    ).all()
-
-    if not rules:
-        return False # 遷移ルールなし
-
-    # 2. 完了しているタスクIDのリストを取得
-    completed_task_ids = db.query(DBProjectTask.task_template_id).filter(
-        DBProjectTask.project_id == project_id,
-        DBProjectTask.status == '完了'
-    ).all()
-    # 結果を単純なIDリストに変換
-    completed_ids_set = {id[0] for id in completed_task_ids}
-
-    # 3. 各ルールに対して遷移条件をチェック
-    for rule in rules:
-        required_ids_set = set(rule.required_task_ids)
-
-        # 遷移条件: 必要なタスクIDが、完了済みタスクIDに全て含まれているか
-        if required_ids_set.issubset(completed_ids_set):
-            
-            # 4. 遷移実行
-            project.current_status_id = rule.next_status_id
-            db.add(project)
-            db.commit()
-            return True  # 遷移が実行されました
-            
-    return False # 遷移なし
+    transitioned = False
+    for _ in range(MAX_TRANSITION_STEPS):
+        transition = db.execute(text(TRANSITION_SQL), {
+            "project_id": project_id,
+            "completed_status_id": 6, # 完了ステータスはスキップ
+        }).first()
+        if transition is None:
+            break # 遷移ルールなし・条件を満たさない
+
+        publish_project_event(
+            db, project_id, "status_changed",
+            from_status_id=transition.from_status_id, status_id=transition.next_status_id
+        )
+        transitioned = True
+    if transitioned:
+        db.commit()
+    return transitioned  # 遷移が実行されたか
 
 # ----------------------------------------------------
 # 💡 プロジェクト進捗率更新処理
@@ -131,6 +148,7 @@ def update_project_progress(db: Session, project_id: int):
     # 3. DBProjectのprogress_rateを更新
     db_project.progress_rate = progress_rate
     db.add(db_project)
+    publish_project_event(db, project_id, "progress_changed", progress_rate=progress_rate)
     db.commit()
     db.refresh(db_project)
 
@@ -148,5 +166,6 @@ def update_summary_in_project(db: Session, project_id: int, summary_data: Dict[s
     # 辞書をJSONBとしてそのまま保存
     db_project.summary_data = summary_data
     db.add(db_project)
+    publish_project_event(db, project_id, "artifact_ready", artifact="summary")
     db.commit()
     db.refresh(db_project)
\ No newline at end of file
@@ -0,0 +1,174 @@
+# app/services/project_read.py
+
+import hashlib
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional
+
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..api.responses import jsonb_fragment
+
+# ----------------------------------------------------
+# 💡 高速シリアライズ用の読み取り関数
+#    ORMオブジェクトやPydanticモデルを経由せず、必要な列だけを dict で取得する。
+#    キーの並びは schemas.project の Project / ProjectTask と揃えている。
+# ----------------------------------------------------
+
+def load_project_tasks(db: Session, project_id: int, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """プロジェクトのタスク一覧を ProjectTask と同じ形の dict で取得する"""
+    sql = """
+        SELECT project_task_id, task_template_id, status, est_time_min,
+               COALESCE(actual_time_min, 0)::float8 AS actual_time_min, completed_at
+        FROM t_project_task
+        WHERE project_id = :project_id
+    """
+    params: Dict[str, Any] = {"project_id": project_id}
+    if status:
+        sql += " AND status = :status"
+        params["status"] = status
+    sql += " ORDER BY project_task_id"
+    return [dict(row) for row in db.execute(text(sql), params).mappings()]
+
+def load_project_document(db: Session, project_id: int, jsonb_passthrough: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    プロジェクトとタスクを Project と同じ形の dict で取得する。
+    jsonb_passthrough=True の場合、scaffold_data はDBのテキスト表現のまま orjson.Fragment として埋め込む。
+    """
+    scaffold_column = "scaffold_data::text" if jsonb_passthrough else "scaffold_data"
+    row = db.execute(
+        text(f"""
+            SELECT project_id, current_status_id, theme, input_angle_id, progress_rate,
+                   {scaffold_column} AS scaffold_data, created_at, version
+            FROM t_project
+            WHERE project_id = :project_id
+        """),
+        {"project_id": project_id}
+    ).mappings().first()
+    if not row:
+        return None
+
+    document = dict(row)
+    if jsonb_passthrough:
+        document["scaffold_data"] = jsonb_fragment(document["scaffold_data"])
+    document["tasks"] = load_project_tasks(db, project_id)
+    return document
+
+# ----------------------------------------------------
+# 💡 fields / include による部分取得
+# ----------------------------------------------------
+
+# fields で選べるスカラー列（project_id は常に返す）
+PROJECT_VIEW_FIELDS = (
+    "current_status_id", "theme", "input_angle_id", "progress_rate", "created_at", "version",
+    "final_title", "final_description", "published_at",
+)
+# fields 未指定時に返す列（Project スキーマと同じ）
+DEFAULT_VIEW_FIELDS = ("current_status_id", "theme", "input_angle_id", "progress_rate", "created_at", "version")
+
+# include で選べる展開項目と、対応するJSONB列
+PROJECT_VIEW_JSONB = {
+    "scaffold": "scaffold_data",
+    "thumbnail": "thumbnail_concept",
+    "summary": "summary_data",
+}
+PROJECT_VIEW_INCLUDES = ("tasks", "timers") + tuple(PROJECT_VIEW_JSONB.keys())
+
+class ProjectViewSpec(NamedTuple):
+    """部分取得で返す列と展開項目"""
+    fields: FrozenSet[str]
+    include: FrozenSet[str]
+
+    @property
+    def key(self) -> str:
+        """キャッシュキー・ETag に使う、指定内容の短い識別子"""
+        canonical = ",".join(sorted(self.fields)) + ";" + ",".join(sorted(self.include))
+        return hashlib.sha1(canonical.encode()).hexdigest()[:10]
+
+def _split_param(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+def parse_project_view(fields: Optional[str], include: Optional[str]) -> Optional[ProjectViewSpec]:
+    """
+    クエリパラメータ fields / include を解釈する。
+    どちらも未指定なら None（従来どおりの完全なレスポンス）を返す。未知の項目は ValueError。
+    """
+    if fields is None and include is None:
+        return None
+
+    field_list = _split_param(fields) if fields is not None else list(DEFAULT_VIEW_FIELDS)
+    include_list = _split_param(include)
+
+    unknown = [f for f in field_list if f not in PROJECT_VIEW_FIELDS and f != "project_id"]
+    unknown += [i for i in include_list if i not in PROJECT_VIEW_INCLUDES]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)}. "
+            f"fields: {', '.join(PROJECT_VIEW_FIELDS)} / include: {', '.join(PROJECT_VIEW_INCLUDES)}"
+        )
+
+    return ProjectViewSpec(
+        fields=frozenset(f for f in field_list if f != "project_id"),
+        include=frozenset(include_list),
+    )
+
+def load_timer_summary(db: Session, project_id: int) -> Dict[str, Any]:
+    """プロジェクトのタイマー集計を1クエリで取得する"""
+    row = db.execute(
+        text("""
+            WITH tasks AS (
+                SELECT project_task_id, task_template_id, est_time_min, actual_time_min
+                FROM t_project_task
+                WHERE project_id = :project_id
+            ),
+            logs AS (
+                SELECT l.project_task_id,
+                       COUNT(*) AS log_count,
+                       MAX(COALESCE(l.end_time, l.start_time)) AS last_activity_at,
+                       BOOL_OR(l.end_time IS NULL) AS running
+                FROM t_timer_log l
+                JOIN tasks ON tasks.project_task_id = l.project_task_id
+                GROUP BY l.project_task_id
+            )
+            SELECT COALESCE(SUM(tasks.est_time_min), 0)::int AS total_est_min,
+                   COALESCE(SUM(tasks.actual_time_min), 0)::float8 AS total_actual_min,
+                   COALESCE(SUM(logs.log_count), 0)::int AS log_count,
+                   COALESCE(ARRAY_AGG(tasks.task_template_id ORDER BY tasks.task_template_id)
+                            FILTER (WHERE logs.running), '{}') AS running_task_ids,
+                   MAX(logs.last_activity_at) AS last_activity_at
+            FROM tasks
+            LEFT JOIN logs ON logs.project_task_id = tasks.project_task_id
+        """),
+        {"project_id": project_id}
+    ).mappings().first()
+    return dict(row)
+
+def load_project_view(
+    db: Session, project_id: int, spec: ProjectViewSpec, jsonb_passthrough: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    要求された列だけを SELECT し、要求された展開項目だけを追加で取得する。
+    JSONB列は include で指定されたときだけ読み込み、tasks / timers のクエリも指定時のみ実行する。
+    """
+    columns = ["project_id"] + [f for f in PROJECT_VIEW_FIELDS if f in spec.fields]
+    jsonb_columns = [column for name, column in PROJECT_VIEW_JSONB.items() if name in spec.include]
+    select_list = columns + [
+        f"{column}::text AS {column}" if jsonb_passthrough else column
+        for column in jsonb_columns
+    ]
+
+    row = db.execute(
+        text(f"SELECT {', '.join(select_list)} FROM t_project WHERE project_id = :project_id"),
+        {"project_id": project_id}
+    ).mappings().first()
+    if not row:
+        return None
+
+    document = dict(row)
+    if jsonb_passthrough:
+        for column in jsonb_columns:
+            document[column] = jsonb_fragment(document[column])
+    if "tasks" in spec.include:
+        document["tasks"] = load_project_tasks(db, project_id)
+    if "timers" in spec.include:
+        document["timer_summary"] = load_timer_summary(db, project_id)
+    return document
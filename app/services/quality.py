@@ -0,0 +1,103 @@
+# app/services/quality.py
+#
+# 品質チェックリスト（m_quality_checklist / t_quality_check_result）
+#
+#   - 適用されるチェック: 有効な項目のうち、target_task_id が NULL か、そのタスクをプロジェクトが含む項目。
+#     結果と合わせて1クエリで組み立てる
+#   - 結果の保存: チェックリスト全体を1つの INSERT ... ON CONFLICT (project_id, check_id) DO UPDATE で保存する
+#   - 遷移条件: require_quality_checks のルールは、必須のチェックがすべて済んでいることも条件にする。
+#     判定は PENDING_REQUIRED_CHECKS_SQL を遷移判定のクエリ（project_main.check_and_transition_status）に埋め込んで行う
+
+from typing import Any, Dict, List
+
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+# プロジェクト p に適用される有効なチェック項目 c の条件（p.project_id を参照する）
+APPLICABLE_CHECK_CONDITION = """
+    c.is_active
+    AND (c.target_task_id IS NULL OR EXISTS (
+        SELECT 1 FROM t_project_task t
+        WHERE t.project_id = p.project_id AND t.task_template_id = c.target_task_id
+    ))
+"""
+
+# 必須のチェックのうち、まだ済んでいないものがあるか（p.project_id を参照する）
+PENDING_REQUIRED_CHECKS_SQL = f"""
+    EXISTS (
+        SELECT 1 FROM m_quality_checklist c
+        LEFT JOIN t_quality_check_result r ON r.project_id = p.project_id AND r.check_id = c.check_id
+        WHERE c.is_required AND {APPLICABLE_CHECK_CONDITION}
+          AND COALESCE(r.is_checked, FALSE) = FALSE
+    )
+"""
+
+# ----------------------------------------------------
+# 💡 チェックリストの取得（1クエリ）
+# ----------------------------------------------------
+
+CHECKLIST_SQL = f"""
+    SELECT c.check_id, c.check_item, c.target_task_id, mt.task_name AS target_task_name, c.is_required,
+           COALESCE(r.is_checked, FALSE) AS is_checked, r.checked_at, r.memo
+    FROM t_project p
+    JOIN m_quality_checklist c ON {APPLICABLE_CHECK_CONDITION}
+    LEFT JOIN m_task_template mt ON mt.task_template_id = c.target_task_id
+    LEFT JOIN t_quality_check_result r ON r.project_id = p.project_id AND r.check_id = c.check_id
+    WHERE p.project_id = :project_id
+    ORDER BY c.check_id
+"""
+
+def get_project_checklist(db: Session, project_id: int) -> Dict[str, Any]:
+    """プロジェクトに適用されるチェック項目と結果、必須項目の残り件数を返す"""
+    items = [dict(row) for row in db.execute(text(CHECKLIST_SQL), {"project_id": project_id}).mappings()]
+    return {
+        "project_id": project_id,
+        "items": items,
+        "checked_count": sum(1 for item in items if item["is_checked"]),
+        "pending_required_count": sum(1 for item in items if item["is_required"] and not item["is_checked"]),
+    }
+
+# ----------------------------------------------------
+# 💡 結果の一括保存（1文）
+# ----------------------------------------------------
+
+def save_check_results(db: Session, project_id: int, results: List[Dict[str, Any]]) -> List[int]:
+    """
+    チェック結果 {check_id, is_checked, memo} をまとめて保存し、保存した check_id を返す。
+    プロジェクトに適用されない check_id が含まれていれば ValueError を送出する（呼び出し元でロールバックする）。
+    チェックを付けた日時は、外れていた項目に付けたときだけ更新する。memo を省略した項目は既存のメモを残す。
+    """
+    latest: Dict[int, Dict[str, Any]] = {}
+    for result in results:
+        latest[result["check_id"]] = result
+    if not latest:
+        return []
+
+    saved = db.execute(text(f"""
+        INSERT INTO t_quality_check_result (project_id, check_id, is_checked, checked_at, memo)
+        SELECT p.project_id, u.check_id, u.is_checked, CASE WHEN u.is_checked THEN now() END, u.memo
+        FROM t_project p
+        CROSS JOIN unnest(CAST(:check_ids AS INT[]), CAST(:checked AS BOOLEAN[]), CAST(:memos AS TEXT[]))
+            AS u(check_id, is_checked, memo)
+        JOIN m_quality_checklist c ON c.check_id = u.check_id AND {APPLICABLE_CHECK_CONDITION}
+        WHERE p.project_id = :project_id
+        ON CONFLICT (project_id, check_id) DO UPDATE SET
+            is_checked = EXCLUDED.is_checked,
+            checked_at = CASE
+                WHEN NOT EXCLUDED.is_checked THEN NULL
+                WHEN t_quality_check_result.is_checked THEN t_quality_check_result.checked_at
+                ELSE EXCLUDED.checked_at
+            END,
+            memo = COALESCE(EXCLUDED.memo, t_quality_check_result.memo)
+        RETURNING check_id
+    """), {
+        "project_id": project_id,
+        "check_ids": list(latest),
+        "checked": [result["is_checked"] for result in latest.values()],
+        "memos": [result.get("memo") for result in latest.values()],
+    }).scalars().all()
+
+    not_applicable = sorted(set(latest) - set(saved))
+    if not_applicable:
+        raise ValueError(f"Checks not applicable to this project: {not_applicable}")
+    return sorted(saved)
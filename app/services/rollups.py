@@ -0,0 +1,259 @@
+# app/services/rollups.py
+#
+# 計測時間のロールアップ（集計済みテーブル）
+#
+#   - t_time_rollup_daily   : 日付（ログの開始日）× タスクテンプレートごとの計測時間とログ件数
+#   - t_time_rollup_project : プロジェクトごとの見積/実績時間の合計
+#
+# タイマー停止（同期API・タイマーイベントのバッチ）のたびに、停止したログの分だけ加算する。
+# 分析API（/analytics）はロールアップだけを読むため、t_timer_log の件数に関わらず応答時間は一定。
+#
+# 過去分の作り直しは python -m app.cli rollups backfill、ずれの確認は python -m app.cli rollups check で行う。
+# どちらも archive に切り離した月（services/partitions.py）は対象外。
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from .partitions import timer_log_history_start
+
+# 整合性チェックで一致とみなす誤差（分）。浮動小数の加算順の違いを吸収する
+ROLLUP_TOLERANCE_MIN = 1e-6
+
+# ----------------------------------------------------
+# 💡 増分更新（タイマー停止時）
+# ----------------------------------------------------
+
+def record_timer_rollups(db: Session, segments: Iterable[Tuple[int, int, datetime, float]]):
+    """
+    停止したログ (project_id, task_template_id, start_time, duration_min) をロールアップに加算する。
+    呼び出し元のトランザクション内で実行され、コミットは呼び出し元で行う。
+    """
+    daily: Dict[Tuple[date, int], List[float]] = defaultdict(lambda: [0.0, 0])
+    projects: Dict[int, float] = defaultdict(float)
+    for project_id, task_template_id, start_time, duration_min in segments:
+        if duration_min is None:
+            continue
+        entry = daily[(start_time.date(), task_template_id)]
+        entry[0] += duration_min
+        entry[1] += 1
+        projects[project_id] += duration_min
+    if not daily:
+        return
+
+    # 並行するフラッシュが同じ行を逆の順にロックしてデッドロックしないよう、キーの順に書き込む
+    daily_keys = sorted(daily)
+    project_ids = sorted(projects)
+    days, template_ids = zip(*daily_keys)
+    minutes, counts = zip(*(daily[key] for key in daily_keys))
+    db.execute(text("""
+        INSERT INTO t_time_rollup_daily (day, task_template_id, minutes, log_count)
+        SELECT * FROM unnest(CAST(:days AS DATE[]), CAST(:template_ids AS INT[]),
+                             CAST(:minutes AS FLOAT8[]), CAST(:counts AS INT[])) AS d(day, task_template_id, minutes, log_count)
+        ORDER BY d.day, d.task_template_id
+        ON CONFLICT (day, task_template_id) DO UPDATE SET
+            minutes = t_time_rollup_daily.minutes + EXCLUDED.minutes,
+            log_count = t_time_rollup_daily.log_count + EXCLUDED.log_count
+    """), {"days": list(days), "template_ids": list(template_ids), "minutes": list(minutes), "counts": list(counts)})
+
+    db.execute(text("""
+        INSERT INTO t_time_rollup_project (project_id, actual_total_min, updated_at)
+        SELECT d.project_id, d.minutes, now()
+        FROM unnest(CAST(:project_ids AS BIGINT[]), CAST(:minutes AS FLOAT8[])) AS d(project_id, minutes)
+        ORDER BY d.project_id
+        ON CONFLICT (project_id) DO UPDATE SET
+            actual_total_min = t_time_rollup_project.actual_total_min + EXCLUDED.actual_total_min,
+            updated_at = EXCLUDED.updated_at
+    """), {"project_ids": project_ids, "minutes": [projects[project_id] for project_id in project_ids]})
+
+def init_project_rollup(db: Session, project_id: int, est_total_min: int):
+    """新規プロジェクトの見積時間の合計を登録する（実績は0から加算していく）"""
+    db.execute(text("""
+        INSERT INTO t_time_rollup_project (project_id, est_total_min, actual_total_min, updated_at)
+        VALUES (:project_id, :est_total_min, 0, now())
+        ON CONFLICT (project_id) DO UPDATE SET est_total_min = EXCLUDED.est_total_min, updated_at = EXCLUDED.updated_at
+    """), {"project_id": project_id, "est_total_min": est_total_min})
+
+# ----------------------------------------------------
+# 💡 作り直し（バックフィル）と整合性チェック
+#    日別は t_timer_log から、プロジェクト別は t_project_task（実績はログの合計として維持済み）から集計する。
+# ----------------------------------------------------
+
+def _log_range_condition(date_from: Optional[date], date_to: Optional[date]) -> Tuple[str, Dict[str, Any]]:
+    conditions, params = ["l.duration_min IS NOT NULL"], {}
+    if date_from is not None:
+        conditions.append("l.start_time >= :date_from")
+        params["date_from"] = date_from
+    if date_to is not None:
+        conditions.append("l.start_time < :date_to")
+        params["date_to"] = date_to
+    return " AND ".join(conditions), params
+
+def _day_range_condition(date_from: Optional[date], date_to: Optional[date]) -> str:
+    conditions = ["TRUE"]
+    if date_from is not None:
+        conditions.append("day >= :date_from")
+    if date_to is not None:
+        conditions.append("day < :date_to")
+    return " AND ".join(conditions)
+
+DAILY_FROM_LOGS_SQL = """
+    SELECT l.start_time::date AS day, t.task_template_id, SUM(l.duration_min) AS minutes, COUNT(*) AS log_count
+    FROM t_timer_log l
+    JOIN t_project_task t ON t.project_task_id = l.project_task_id
+    WHERE {condition}
+    GROUP BY 1, 2
+"""
+
+PROJECT_FROM_TASKS_SQL = """
+    SELECT p.project_id,
+           COALESCE(SUM(t.est_time_min), 0) AS est_total_min,
+           COALESCE(SUM(t.actual_time_min), 0) AS actual_total_min
+    FROM t_project p
+    LEFT JOIN t_project_task t ON t.project_id = p.project_id
+    GROUP BY p.project_id
+"""
+
+def rebuild_time_rollups(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None) -> Dict[str, int]:
+    """
+    ロールアップを作り直す。日別は指定期間（省略時は t_timer_log に残っている全期間）だけ、プロジェクト別は常に全件。
+    更新した行数を返す。
+    """
+    # 💡 archive に切り離した月のログは読めないため、その期間の日別ロールアップは残しておく
+    date_from = date_from or timer_log_history_start(db)
+    condition, params = _log_range_condition(date_from, date_to)
+    db.execute(text(f"DELETE FROM t_time_rollup_daily WHERE {_day_range_condition(date_from, date_to)}"), params)
+    daily_rows = db.execute(text(f"""
+        INSERT INTO t_time_rollup_daily (day, task_template_id, minutes, log_count)
+        {DAILY_FROM_LOGS_SQL.format(condition=condition)}
+    """), params).rowcount
+
+    db.execute(text("DELETE FROM t_time_rollup_project"))
+    project_rows = db.execute(text(f"""
+        INSERT INTO t_time_rollup_project (project_id, est_total_min, actual_total_min, updated_at)
+        SELECT project_id, est_total_min, actual_total_min, now() FROM ({PROJECT_FROM_TASKS_SQL}) src
+    """)).rowcount
+    return {"daily": daily_rows, "projects": project_rows}
+
+@dataclass
+class RollupCheckReport:
+    daily_mismatch_count: int = 0
+    project_mismatch_count: int = 0
+    daily_mismatches: List[Dict[str, Any]] = field(default_factory=list) # 先頭 limit 件
+    project_mismatches: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.daily_mismatch_count == 0 and self.project_mismatch_count == 0
+
+def check_time_rollups(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                       limit: int = 20) -> RollupCheckReport:
+    """ロールアップと元データから計算し直した値を比べ、ずれている行の件数と先頭 limit 件を返す"""
+    date_from = date_from or timer_log_history_start(db)
+    condition, params = _log_range_condition(date_from, date_to)
+    params = {**params, "tolerance": ROLLUP_TOLERANCE_MIN, "limit": limit}
+    report = RollupCheckReport()
+
+    daily = db.execute(text(f"""
+        WITH expected AS ({DAILY_FROM_LOGS_SQL.format(condition=condition)}),
+        rollup AS (
+            SELECT day, task_template_id, minutes, log_count FROM t_time_rollup_daily
+            WHERE {_day_range_condition(date_from, date_to)}
+        )
+        SELECT COALESCE(e.day, r.day) AS day, COALESCE(e.task_template_id, r.task_template_id) AS task_template_id,
+               e.minutes AS expected_min, r.minutes AS rollup_min, e.log_count AS expected_logs, r.log_count AS rollup_logs,
+               COUNT(*) OVER () AS mismatch_count
+        FROM expected e
+        FULL OUTER JOIN rollup r ON r.day = e.day AND r.task_template_id = e.task_template_id
+        WHERE ABS(COALESCE(e.minutes, 0) - COALESCE(r.minutes, 0)) > :tolerance
+           OR COALESCE(e.log_count, 0) <> COALESCE(r.log_count, 0)
+        ORDER BY 1, 2
+        LIMIT :limit
+    """), params).mappings().all()
+    if daily:
+        report.daily_mismatch_count = daily[0]["mismatch_count"]
+        report.daily_mismatches = [{k: v for k, v in row.items() if k != "mismatch_count"} for row in daily]
+
+    projects = db.execute(text(f"""
+        WITH expected AS ({PROJECT_FROM_TASKS_SQL})
+        SELECT COALESCE(e.project_id, r.project_id) AS project_id,
+               e.est_total_min AS expected_est_min, r.est_total_min AS rollup_est_min,
+               e.actual_total_min AS expected_actual_min, r.actual_total_min AS rollup_actual_min,
+               COUNT(*) OVER () AS mismatch_count
+        FROM expected e
+        FULL OUTER JOIN t_time_rollup_project r ON r.project_id = e.project_id
+        WHERE e.est_total_min IS DISTINCT FROM r.est_total_min
+           OR ABS(COALESCE(e.actual_total_min, 0) - COALESCE(r.actual_total_min, 0)) > :tolerance
+        ORDER BY 1
+        LIMIT :limit
+    """), params).mappings().all()
+    if projects:
+        report.project_mismatch_count = projects[0]["mismatch_count"]
+        report.project_mismatches = [{k: v for k, v in row.items() if k != "mismatch_count"} for row in projects]
+    return report
+
+# ----------------------------------------------------
+# 💡 分析（ロールアップだけを読む）
+# ----------------------------------------------------
+
+def default_month_range(today: Optional[date] = None) -> Tuple[date, date]:
+    """今月の初日と翌月の初日"""
+    today = today or date.today()
+    start = today.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+TIME_BREAKDOWN_SQL = """
+    SELECT GROUPING(r.day) AS g_day, GROUPING(tt.task_category) AS g_category, GROUPING(r.task_template_id) AS g_template,
+           r.day, tt.task_category, r.task_template_id, MIN(tt.task_name) AS task_name,
+           SUM(r.minutes) AS minutes, SUM(r.log_count) AS log_count
+    FROM t_time_rollup_daily r
+    JOIN m_task_template tt ON tt.task_template_id = r.task_template_id
+    WHERE r.day >= :date_from AND r.day < :date_to
+    GROUP BY GROUPING SETS ((), (r.day), (tt.task_category), (tt.task_category, r.task_template_id))
+"""
+
+def get_time_breakdown(db: Session, date_from: date, date_to: date) -> Dict[str, Any]:
+    """期間内の計測時間を、合計・日別・カテゴリ別・テンプレート別に1クエリで集計する"""
+    rows = db.execute(text(TIME_BREAKDOWN_SQL), {"date_from": date_from, "date_to": date_to}).mappings().all()
+
+    document: Dict[str, Any] = {
+        "date_from": date_from, "date_to": date_to,
+        "total_min": 0.0, "log_count": 0,
+        "by_day": [], "by_category": [], "by_template": [],
+    }
+    for row in rows:
+        minutes, log_count = round(row["minutes"] or 0.0, 3), int(row["log_count"] or 0)
+        if row["g_day"] and row["g_category"] and row["g_template"]:
+            document["total_min"], document["log_count"] = minutes, log_count
+        elif not row["g_day"]:
+            document["by_day"].append({"day": row["day"], "minutes": minutes, "log_count": log_count})
+        elif not row["g_template"]:
+            document["by_template"].append({
+                "task_template_id": row["task_template_id"], "task_name": row["task_name"],
+                "task_category": row["task_category"], "minutes": minutes, "log_count": log_count,
+            })
+        else:
+            document["by_category"].append({"task_category": row["task_category"], "minutes": minutes, "log_count": log_count})
+
+    document["by_day"].sort(key=lambda item: item["day"])
+    document["by_category"].sort(key=lambda item: -item["minutes"])
+    document["by_template"].sort(key=lambda item: -item["minutes"])
+    return document
+
+def get_project_time_comparison(db: Session, date_from: date, date_to: date, limit: int) -> List[Dict[str, Any]]:
+    """期間内に作成されたプロジェクトの見積/実績時間（新しい順）"""
+    rows = db.execute(text("""
+        SELECT p.project_id, p.theme, p.created_at, r.est_total_min, r.actual_total_min,
+               r.actual_total_min - r.est_total_min AS diff_min,
+               CASE WHEN r.est_total_min > 0 THEN r.actual_total_min / r.est_total_min END AS actual_ratio
+        FROM t_project p
+        JOIN t_time_rollup_project r ON r.project_id = p.project_id
+        WHERE p.created_at >= :date_from AND p.created_at < :date_to
+        ORDER BY p.created_at DESC, p.project_id DESC
+        LIMIT :limit
+    """), {"date_from": date_from, "date_to": date_to, "limit": limit}).mappings().all()
+    return [dict(row) for row in rows]
@@ -0,0 +1,195 @@
+# app/services/scaffold_patch.py
+#
+# トーク骨子（t_project.scaffold_data）の部分更新
+#
+#   - JSON Patch（RFC 6902 の add / remove / replace / test）を jsonb_set・jsonb_insert・#- の式に変換し、
+#     サーバー側で1つの UPDATE として適用する（骨子全体を送り直さない）
+#   - 楽観的ロック: 呼び出し元が読んだバージョン（If-Match の ETag）と一致するときだけ更新する。
+#     すべての書き込み経路がバージョンを進めるため、間に別の更新が入っていれば VersionConflictError になる
+#   - どれかの操作の前提（パスの存在・test の一致）が崩れた場合は何も更新せず PatchConflictError を送出する
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from .artifact_history import has_artifact_history, parse_pointer, record_artifact_revision
+from .events import publish_project_event
+from .project_cache import get_project_version
+
+# 1回のパッチに含められる操作の数
+MAX_PATCH_OPERATIONS = 100
+
+PATCH_OPS = ("add", "remove", "replace", "test")
+
+class VersionConflictError(Exception):
+    """呼び出し元が読んだ後にプロジェクトが更新されていた"""
+    def __init__(self, current_version: int):
+        super().__init__(f"Project was modified (current version: {current_version})")
+        self.current_version = current_version
+
+class PatchConflictError(Exception):
+    """パッチの操作が現在の骨子に適用できなかった（パスがない・test が一致しない）"""
+    def __init__(self, index: int, operation: Dict[str, Any]):
+        super().__init__(f"Patch operation {index} ({operation['op']} {operation['path']}) cannot be applied to the current scaffold")
+        self.index = index
+
+# ----------------------------------------------------
+# 💡 ETag とパス
+# ----------------------------------------------------
+
+_ETAG_PATTERN = re.compile(r'^(?:W/)?"p(\d+)-v(\d+)(?:-[^"]*)?"$')
+
+def parse_if_match(if_match: Optional[str], project_id: int) -> Optional[int]:
+    """If-Match の ETag（GET /projects/{id} が返したもの）からバージョンを取り出す。形式が違えば None"""
+    if not if_match:
+        return None
+    match = _ETAG_PATTERN.match(if_match.strip())
+    if not match or int(match.group(1)) != project_id:
+        return None
+    return int(match.group(2))
+
+# ----------------------------------------------------
+# 💡 JSON Patch → SQL
+# ----------------------------------------------------
+
+@dataclass
+class _Step:
+    precondition: str # 適用できる条件（doc を参照する）
+    expression: str # 適用後の骨子（doc を参照する）
+
+def _compile_operation(index: int, operation: Dict[str, Any], params: Dict[str, Any]) -> _Step:
+    op, path = operation.get("op"), operation.get("path")
+    if op not in PATCH_OPS:
+        raise ValueError(f"Operation {index}: unsupported op '{op}' (supported: {', '.join(PATCH_OPS)})")
+    if not isinstance(path, str):
+        raise ValueError(f"Operation {index}: 'path' is required")
+    tokens = parse_pointer(path)
+    if op in ("add", "replace", "test") and "value" not in operation:
+        raise ValueError(f"Operation {index}: 'value' is required for {op}")
+
+    path_param, value_param = f"path_{index}", f"value_{index}"
+    params[path_param] = tokens
+    path_sql = f"CAST(:{path_param} AS TEXT[])"
+    if "value" in operation:
+        params[value_param] = json.dumps(operation["value"], ensure_ascii=False)
+    value_sql = f"CAST(:{value_param} AS JSONB)"
+
+    if op == "replace":
+        return _Step(f"doc #> {path_sql} IS NOT NULL", f"jsonb_set(doc, {path_sql}, {value_sql}, false)")
+    if op == "remove":
+        return _Step(f"doc #> {path_sql} IS NOT NULL", f"doc #- {path_sql}")
+    if op == "test":
+        return _Step(f"doc #> {path_sql} = {value_sql}", "doc")
+
+    # add: 親が配列なら指定位置に挿入（"-" は末尾に追加）、オブジェクトならキーを追加・置換する
+    parent_param = f"parent_{index}"
+    params[parent_param] = tokens[:-1]
+    parent_sql = f"CAST(:{parent_param} AS TEXT[])"
+    last = tokens[-1]
+    if last == "-":
+        return _Step(
+            f"jsonb_typeof(doc #> {parent_sql}) = 'array'",
+            f"jsonb_set(doc, {parent_sql}, (doc #> {parent_sql}) || jsonb_build_array({value_sql}), false)",
+        )
+    if last.isdigit():
+        params[f"position_{index}"] = int(last)
+        return _Step(
+            f"(jsonb_typeof(doc #> {parent_sql}) = 'object' OR (jsonb_typeof(doc #> {parent_sql}) = 'array' "
+            f"AND jsonb_array_length(doc #> {parent_sql}) >= :position_{index}))",
+            f"CASE WHEN jsonb_typeof(doc #> {parent_sql}) = 'array' "
+            f"THEN jsonb_insert(doc, {path_sql}, {value_sql}) ELSE jsonb_set(doc, {path_sql}, {value_sql}, true) END",
+        )
+    return _Step(f"jsonb_typeof(doc #> {parent_sql}) = 'object'", f"jsonb_set(doc, {path_sql}, {value_sql}, true)")
+
+def build_patch_sql(operations: List[Dict[str, Any]], with_previous: bool = False) -> Tuple[str, Dict[str, Any]]:
+    """
+    操作ごとに1つのCTEで骨子を変換し、最後に1回だけ UPDATE する文を組み立てる。
+    前提が崩れた操作があれば、それ以降の操作は適用せず failed にその番号を残す。
+    with_previous=True なら更新前の骨子も返す（版の履歴がまだないときの版1に使う）。
+    """
+    if not operations:
+        raise ValueError("Patch must contain at least one operation")
+    if len(operations) > MAX_PATCH_OPERATIONS:
+        raise ValueError(f"Too many operations (max {MAX_PATCH_OPERATIONS})")
+
+    params: Dict[str, Any] = {}
+    ctes = ["""s0 AS (
+        SELECT scaffold_data::jsonb AS doc, NULL::int AS failed
+        FROM t_project WHERE project_id = :project_id AND version = :expected_version
+    )"""]
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise ValueError(f"Operation {index}: must be an object")
+        step = _compile_operation(index, operation, params)
+        ctes.append(f"""s{index + 1} AS (
+        SELECT CASE WHEN failed IS NULL AND {step.precondition} THEN {step.expression} ELSE doc END AS doc,
+               COALESCE(failed, CASE WHEN {step.precondition} THEN NULL ELSE {index} END) AS failed
+        FROM s{index}
+    )""")
+
+    last = f"s{len(operations)}"
+    sql = f"""
+    WITH {', '.join(ctes)},
+    updated AS (
+        UPDATE t_project p
+        SET scaffold_data = {last}.doc
+        FROM {last}
+        WHERE p.project_id = :project_id AND p.version = :expected_version AND {last}.failed IS NULL
+        RETURNING octet_length({last}.doc::text) AS size_bytes
+    )
+    SELECT (SELECT failed FROM {last}) AS failed,
+           EXISTS (SELECT 1 FROM updated) AS updated,
+           (SELECT size_bytes FROM updated) AS size_bytes,
+           {"(SELECT doc FROM s0)" if with_previous else "NULL::jsonb"} AS previous
+    """
+    return sql, params
+
+# ----------------------------------------------------
+# 💡 適用
+# ----------------------------------------------------
+
+def patch_scaffold(db: Session, project_id: int, expected_version: int, operations: List[Dict[str, Any]],
+                   source: str = "patch") -> int:
+    """
+    骨子に JSON Patch を適用し、新しいバージョンを返す。適用した操作は版の履歴に差分として残す。
+    プロジェクトがなければ LookupError、バージョンが違えば VersionConflictError、
+    操作が適用できなければ PatchConflictError、操作が不正なら ValueError を送出する。
+    """
+    sql, params = build_patch_sql(operations, with_previous=not has_artifact_history(db, project_id, "scaffold"))
+    result = db.execute(text(sql), {**params, "project_id": project_id, "expected_version": expected_version}).mappings().one()
+
+    if not result["updated"]:
+        db.rollback()
+        if result["failed"] is not None:
+            raise PatchConflictError(result["failed"], operations[result["failed"]])
+        current_version = get_project_version(db, project_id)
+        if current_version is None:
+            raise LookupError("Project not found.")
+        raise VersionConflictError(current_version)
+
+    record_artifact_revision(
+        db, project_id, "scaffold", source,
+        previous=result["previous"], operations=operations, size_bytes=result["size_bytes"]
+    )
+
+    # 変更したパスだけを通知する（購読側は必要なら該当部分を読み直す。NOTIFY のペイロード上限に収まるよう先頭だけ）
+    paths = sorted({operation["path"] for operation in operations if operation["op"] != "test"})
+    publish_project_event(db, project_id, "scaffold_patched", paths=paths[:20])
+    db.commit()
+    return get_project_version(db, project_id)
+
+QUESTION_FIELDS = ("question_text", "target_time_min", "angle_type")
+
+def question_operations(index: int, fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """discussion_flow の1問のフィールドを置き換える操作（質問がなければ PatchConflictError になる）"""
+    if not fields:
+        raise ValueError("No fields to update")
+    unknown = set(fields) - set(QUESTION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown question fields: {sorted(unknown)}")
+    # add の前提（親がオブジェクト）で質問の存在を確かめる。質問に欠けているフィールドは追加される
+    return [{"op": "add", "path": f"/discussion_flow/{index}/{name}", "value": value} for name, value in fields.items()]
@@ -0,0 +1,213 @@
+# app/services/shorts.py
+#
+# VOD → Shorts ファネル (t_shorts_management)
+#
+#   - 候補の抽出: VOD プロジェクトの骨子（scaffold_data の discussion_flow）の質問ごとに1件の候補を作る。
+#       source_timestamp_sec : 収録作業のタイマーログ（section_index ごとの計測時間）を質問の順に積み上げた、VOD 内の開始位置。
+#                              計測のある VOD は計測した質問だけを候補にし、計測のない VOD は目標トーク時間（target_time_min）で代用する
+#       shorts_theme         : 質問文（100文字まで）
+#       is_high_hook         : 目標の SHORTS_HIGH_HOOK_RATIO 倍以上話した区間
+#     複数のプロジェクトの候補を1つの INSERT ... SELECT でまとめて作る。抽出し直すと未作成の候補は作り直し、
+#     編集済・公開済の Shorts と同じテーマの候補は作らない
+#   - 一覧: VOD・状態で絞り込み、shorts_id の keyset ページングで返す（ix_shorts_project_status / ix_shorts_status）
+#   - 状態の遷移: 未作成 → 編集済 → 公開済。遷移元の状態を UPDATE の条件にして、並行した更新でも飛び越えない
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+# Shorts 候補の抽出の設定 (環境変数で上書き可能)
+class ShortsSettings(BaseSettings):
+    shorts_recording_category: str = "収録" # 区間ごとの計測時間を読むタスクのカテゴリ（m_task_template.task_category）
+    shorts_intro_sec: int = 0 # 最初の質問の前にある導入部の長さ（秒）
+    shorts_min_section_sec: int = 15 # これより短い区間は候補にしない
+    shorts_high_hook_ratio: float = 1.3 # 目標トーク時間の何倍以上話したら is_high_hook にするか
+
+shorts_settings = ShortsSettings()
+
+STATUS_PENDING = "未作成"
+STATUS_EDITED = "編集済"
+STATUS_PUBLISHED = "公開済"
+
+# 遷移先 → 遷移元として許可する状態
+ALLOWED_TRANSITIONS = {
+    STATUS_EDITED: (STATUS_PENDING,),
+    STATUS_PUBLISHED: (STATUS_EDITED,),
+    STATUS_PENDING: (STATUS_EDITED,), # 編集をやり直す
+}
+
+SHORTS_COLUMNS = "shorts_id, vod_project_id, source_timestamp_sec, shorts_theme, status, is_high_hook, published_at"
+
+# ----------------------------------------------------
+# 💡 候補の抽出（1文）
+# ----------------------------------------------------
+
+EXTRACT_CANDIDATES_SQL = f"""
+    WITH questions AS (
+        SELECT p.project_id, q.ord - 1 AS section_index,
+               q.item ->> 'question_text' AS question_text,
+               CASE WHEN jsonb_typeof(q.item -> 'target_time_min') = 'number'
+                    THEN (q.item ->> 'target_time_min')::float8 END AS target_min
+        FROM t_project p
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(p.scaffold_data::jsonb -> 'discussion_flow') = 'array'
+                 THEN p.scaffold_data::jsonb -> 'discussion_flow' ELSE '[]'::jsonb END
+        ) WITH ORDINALITY AS q(item, ord)
+        WHERE p.project_id = ANY(:project_ids)
+    ),
+    recorded AS (
+        SELECT t.project_id, l.section_index, SUM(l.duration_min) AS actual_min
+        FROM t_project_task t
+        JOIN m_task_template mt ON mt.task_template_id = t.task_template_id
+        JOIN t_timer_log l ON l.project_task_id = t.project_task_id
+        WHERE t.project_id = ANY(:project_ids)
+          AND mt.task_category = :category
+          AND l.section_index IS NOT NULL
+          AND l.duration_min IS NOT NULL
+        GROUP BY t.project_id, l.section_index
+    ),
+    joined AS (
+        SELECT q.*, r.actual_min,
+               bool_or(r.actual_min IS NOT NULL) OVER (PARTITION BY q.project_id) AS has_recording
+        FROM questions q
+        LEFT JOIN recorded r USING (project_id, section_index)
+        WHERE COALESCE(q.question_text, '') <> ''
+    ),
+    sections AS (
+        -- 収録の計測がある VOD は計測した区間だけで VOD が構成されているとみなす
+        SELECT j.*,
+               CASE WHEN j.has_recording THEN COALESCE(j.actual_min, 0) ELSE COALESCE(j.target_min, 0) END * 60 AS length_sec
+        FROM joined j
+    ),
+    positioned AS (
+        SELECT s.*,
+               COALESCE(SUM(s.length_sec) OVER (
+                   PARTITION BY s.project_id ORDER BY s.section_index
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ), 0) AS offset_sec
+        FROM sections s
+    ),
+    removed AS (
+        DELETE FROM t_shorts_management
+        WHERE vod_project_id = ANY(:project_ids) AND status = :pending
+        RETURNING shorts_id
+    ),
+    inserted AS (
+        INSERT INTO t_shorts_management (vod_project_id, source_timestamp_sec, shorts_theme, status, is_high_hook)
+        SELECT s.project_id,
+               round(:intro_sec + s.offset_sec)::int,
+               left(s.question_text, 100),
+               :pending,
+               COALESCE(s.actual_min >= s.target_min * :high_hook_ratio, FALSE)
+        FROM positioned s
+        WHERE s.length_sec >= :min_section_sec
+          AND NOT EXISTS (
+              SELECT 1 FROM t_shorts_management kept
+              WHERE kept.vod_project_id = s.project_id
+                AND kept.status <> :pending
+                AND kept.shorts_theme = left(s.question_text, 100)
+          )
+        ORDER BY s.project_id, s.section_index
+        RETURNING {SHORTS_COLUMNS}
+    )
+    SELECT (SELECT COUNT(*) FROM removed) AS removed_count, inserted.*
+    FROM (SELECT 1) one
+    LEFT JOIN inserted ON TRUE
+    ORDER BY inserted.shorts_id
+"""
+
+def find_missing_projects(db: Session, project_ids: List[int]) -> List[int]:
+    found = set(db.execute(
+        text("SELECT project_id FROM t_project WHERE project_id = ANY(:project_ids)"), {"project_ids": project_ids}
+    ).scalars())
+    return sorted(set(project_ids) - found)
+
+def extract_shorts_candidates(db: Session, project_ids: List[int]) -> Dict[str, Any]:
+    """
+    VOD プロジェクトの Shorts 候補を作り直し、{"removed", "inserted", "candidates"} を返す。
+    呼び出し元のトランザクション内で実行され、コミットは呼び出し元で行う。
+    """
+    rows = db.execute(text(EXTRACT_CANDIDATES_SQL), {
+        "project_ids": sorted(set(project_ids)),
+        "category": shorts_settings.shorts_recording_category,
+        "pending": STATUS_PENDING,
+        "intro_sec": shorts_settings.shorts_intro_sec,
+        "min_section_sec": shorts_settings.shorts_min_section_sec,
+        "high_hook_ratio": shorts_settings.shorts_high_hook_ratio,
+    }).mappings().all()
+
+    candidates = [
+        {key: value for key, value in row.items() if key != "removed_count"}
+        for row in rows if row["shorts_id"] is not None
+    ]
+    return {"removed": rows[0]["removed_count"], "inserted": len(candidates), "candidates": candidates}
+
+# ----------------------------------------------------
+# 💡 一覧（keyset ページング）
+# ----------------------------------------------------
+
+def list_shorts(db: Session, vod_project_id: Optional[int], statuses: Optional[List[str]],
+                high_hook_only: bool, after_id: Optional[int], limit: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """shorts_id の昇順に limit 件を返す。2つ目の値は次のページの after_id（最後のページなら None）"""
+    conditions = ["shorts_id > :after_id"]
+    params: Dict[str, Any] = {"after_id": after_id or 0, "limit": limit + 1}
+    if vod_project_id is not None:
+        conditions.append("vod_project_id = :vod_project_id")
+        params["vod_project_id"] = vod_project_id
+    if statuses:
+        conditions.append("status = ANY(:statuses)")
+        params["statuses"] = statuses
+    if high_hook_only:
+        conditions.append("is_high_hook")
+
+    rows = db.execute(text(f"""
+        SELECT {SHORTS_COLUMNS}
+        FROM t_shorts_management
+        WHERE {' AND '.join(conditions)}
+        ORDER BY shorts_id
+        LIMIT :limit
+    """), params).mappings().all()
+    items = [dict(row) for row in rows[:limit]]
+    next_after_id = items[-1]["shorts_id"] if len(rows) > limit else None
+    return items, next_after_id
+
+# ----------------------------------------------------
+# 💡 状態の遷移（遷移元の状態を条件にした UPDATE）
+# ----------------------------------------------------
+
+def transition_shorts_status(db: Session, shorts_ids: List[int], status: str,
+                             published_at: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    遷移元として許可された状態にある Shorts だけを status に更新する。
+    (更新した行, 存在しないか遷移できなかったID) を返す。コミットは呼び出し元で行う。
+    """
+    if status not in ALLOWED_TRANSITIONS:
+        raise ValueError(f"Unknown status '{status}'. Choose from: {', '.join(ALLOWED_TRANSITIONS)}")
+
+    rows = db.execute(text(f"""
+        UPDATE t_shorts_management
+        SET status = :status,
+            published_at = CASE WHEN :status = :published THEN COALESCE(CAST(:published_at AS TIMESTAMP), now())
+                                ELSE NULL END
+        WHERE shorts_id = ANY(:shorts_ids) AND status = ANY(:from_statuses)
+        RETURNING {SHORTS_COLUMNS}
+    """), {
+        "status": status,
+        "published": STATUS_PUBLISHED,
+        "published_at": published_at,
+        "shorts_ids": list(shorts_ids),
+        "from_statuses": list(ALLOWED_TRANSITIONS[status]),
+    }).mappings().all()
+
+    updated = sorted((dict(row) for row in rows), key=lambda row: row["shorts_id"])
+    updated_ids = {row["shorts_id"] for row in updated}
+    return updated, sorted(set(shorts_ids) - updated_ids)
+
+def get_shorts(db: Session, shorts_id: int) -> Optional[Dict[str, Any]]:
+    row = db.execute(
+        text(f"SELECT {SHORTS_COLUMNS} FROM t_shorts_management WHERE shorts_id = :shorts_id"), {"shorts_id": shorts_id}
+    ).mappings().first()
+    return dict(row) if row else None
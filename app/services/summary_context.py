@@ -0,0 +1,140 @@
+# app/services/summary_context.py
+#
+# プロジェクトサマリー生成（AI）に渡す実績データの組み立て
+#
+#   - タスクごとの乖離、カテゴリごとの合計、プロジェクト全体の合計を1つの集計クエリで作る
+#   - 比較の基準（ベースライン）は t_task_estimate（テンプレートごとの過去の実績の中央値）から読むため、
+#     履歴の件数が増えてもクエリのコストは対象プロジェクトのタスク数にしか依存しない
+#   - 組み立てた結果は (project_id, version) をキーにキャッシュし、同じバージョンの再生成ではDBを読まない
+#
+# 💡 ベースラインは他のプロジェクトの完了でも変わるが、バージョンには含めない（次にこのプロジェクトが更新されたときに反映される）。
+
+import json
+from typing import Any, Dict, Optional
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import text # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from .dashboard import COMPLETED_TASK_STATUSES
+from .estimate import estimate_settings
+from .project_cache import ResponseLRUCache, get_project_version
+
+# サマリー用データの設定 (環境変数で上書き可能)
+class SummaryContextSettings(BaseSettings):
+    summary_context_cache_size: int = 256 # 保持するプロジェクト（バージョン）ごとのデータの件数
+
+summary_context_settings = SummaryContextSettings()
+
+# (project_id, version) -> プロンプトに埋め込むJSON文字列（UTF-8）
+summary_context_cache = ResponseLRUCache(summary_context_settings.summary_context_cache_size)
+
+# ----------------------------------------------------
+# 💡 集計クエリ（1クエリ）
+# ----------------------------------------------------
+
+SUMMARY_CONTEXT_SQL = """
+    WITH tasks AS (
+        SELECT t.task_template_id, tt.task_name, tt.task_category,
+               t.status = ANY(:completed_statuses) AS is_completed,
+               t.status, t.est_time_min, t.actual_time_min,
+               CASE WHEN e.sample_count >= :min_samples THEN e.median_min END AS baseline_min,
+               CASE WHEN e.sample_count >= :min_samples THEN e.sample_count END AS baseline_samples
+        FROM t_project_task t
+        JOIN m_task_template tt ON tt.task_template_id = t.task_template_id
+        LEFT JOIN t_task_estimate e ON e.task_template_id = t.task_template_id
+        WHERE t.project_id = :project_id
+    ),
+    categories AS (
+        SELECT task_category,
+               COUNT(*) AS task_count,
+               COUNT(*) FILTER (WHERE is_completed) AS completed_count,
+               SUM(est_time_min) AS est_total_min,
+               SUM(actual_time_min) AS actual_total_min,
+               SUM(baseline_min) AS baseline_total_min
+        FROM tasks
+        GROUP BY task_category
+    )
+    SELECT p.theme, p.progress_rate,
+           (
+               SELECT json_agg(json_build_object(
+                   '作業名', task_name,
+                   'カテゴリ', task_category,
+                   'ステータス', CASE WHEN is_completed THEN '✅完了' ELSE '⚠️' || status END,
+                   '見積(分)', est_time_min,
+                   '実績(分)', ROUND(actual_time_min::numeric, 1),
+                   '乖離(分)', ROUND((actual_time_min - est_time_min)::numeric, 1),
+                   '乖離率(%)', CASE WHEN est_time_min > 0
+                                     THEN ROUND(((actual_time_min - est_time_min) / est_time_min * 100)::numeric) END,
+                   '過去の中央値(分)', ROUND(baseline_min::numeric, 1),
+                   '中央値との差(分)', CASE WHEN actual_time_min > 0 THEN ROUND((actual_time_min - baseline_min)::numeric, 1) END,
+                   '過去の実績件数', baseline_samples
+               ) ORDER BY task_template_id)
+               FROM tasks
+           ) AS tasks,
+           (
+               SELECT json_agg(json_build_object(
+                   'カテゴリ', task_category,
+                   'タスク数', task_count,
+                   '完了数', completed_count,
+                   '見積合計(分)', est_total_min,
+                   '実績合計(分)', ROUND(actual_total_min::numeric, 1),
+                   '乖離(分)', ROUND((actual_total_min - est_total_min)::numeric, 1),
+                   '過去の中央値合計(分)', ROUND(baseline_total_min::numeric, 1)
+               ) ORDER BY task_category)
+               FROM categories
+           ) AS categories,
+           (
+               SELECT json_build_object(
+                   '見積合計(分)', SUM(est_time_min),
+                   '実績合計(分)', ROUND(SUM(actual_time_min)::numeric, 1),
+                   '乖離(分)', ROUND(SUM(actual_time_min - est_time_min)::numeric, 1),
+                   '過去の中央値合計(分)', ROUND(SUM(baseline_min)::numeric, 1),
+                   '未完了タスク数', COUNT(*) FILTER (WHERE NOT is_completed)
+               )
+               FROM tasks
+           ) AS totals
+    FROM t_project p
+    WHERE p.project_id = :project_id
+"""
+
+def load_summary_context(db: Session, project_id: int) -> Dict[str, Any]:
+    """サマリー生成に使う実績データを1クエリで集計して返す"""
+    row = db.execute(text(SUMMARY_CONTEXT_SQL), {
+        "project_id": project_id,
+        "completed_statuses": list(COMPLETED_TASK_STATUSES),
+        "min_samples": estimate_settings.estimate_min_samples,
+    }).mappings().first()
+    if row is None:
+        raise ValueError("Project not found.")
+    if not row["tasks"]:
+        raise ValueError("No tasks found for this project.")
+    return {
+        "テーマ": row["theme"],
+        "完了率(%)": row["progress_rate"],
+        "全体": row["totals"],
+        "カテゴリ別": row["categories"],
+        "タスク別": row["tasks"],
+    }
+
+# ----------------------------------------------------
+# 💡 バージョンごとのキャッシュ
+# ----------------------------------------------------
+
+def get_summary_context_json(db: Session, project_id: int) -> str:
+    """
+    プロンプトに埋め込むJSON文字列を返す。
+    プロジェクトのバージョンが変わっていなければ、前回組み立てた結果をそのまま使う。
+    """
+    version: Optional[int] = get_project_version(db, project_id)
+    if version is None:
+        raise ValueError("Project not found.")
+
+    key = (project_id, version)
+    cached = summary_context_cache.get(key)
+    if cached is not None:
+        return cached.decode("utf-8")
+
+    context_json = json.dumps(load_summary_context(db, project_id), ensure_ascii=False, indent=2)
+    summary_context_cache.put(key, context_json.encode("utf-8"))
+    return context_json
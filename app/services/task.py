@@ -4,6 +4,8 @@ from sqlalchemy import func, select # type: ignore
 from ..models.project import DBProject, DBProjectTask, DBTimerLog, DBTaskTemplate
 from ..models.master import DBTransitionRule
 from ..schemas.project import ProjectCreate, TimerStart, TimerStop, TaskTemplateCreate, ProjectTask
+from .events import publish_project_event
+from .estimate import record_task_actuals
 from datetime import datetime
 from typing import Optional, List
 
@@ -87,6 +89,8 @@ def complete_task(db: Session, project_id: int, task_id: int) -> DBProjectTask:
     db_task.status = "completed"
     db_task.completed_at = datetime.now()
     db.add(db_task)
+    record_task_actuals(db, [db_task.project_task_id]) # 見積もりの統計に実績を追加
+    publish_project_event(db, project_id, "task_completed", task_id=task_id, completed_at=db_task.completed_at)
     db.commit()
     db.refresh(db_task)
 
@@ -133,11 +133,14 @@
 
 # app/services/timer.py
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import HTTPException
 from ..models.project import DBProjectTask, DBTimerLog
+from .events import publish_project_event
+from .estimate import record_task_actuals
+from .rollups import record_timer_rollups
+from .dashboard import COMPLETED_TASK_STATUSES
 
 # ----------------------------------------------------
 # 💡 補助関数
@@ -155,7 +158,10 @@ def get_db_task(db: Session, project_id: int, task_template_id: int) -> DBProjec
     return db_task
 
 def get_active_log(db: Session, project_task_id: int) -> Optional[DBTimerLog]:
-    """計測中（end_timeがNULL）のログを取得"""
+    """
+    計測中（end_timeがNULL）のログを取得。
+    開始月が分からないため全パーティションを見るが、各パーティションの部分インデックス（計測中の行だけ）を引くだけで済む。
+    """
     return db.query(DBTimerLog).filter(
         DBTimerLog.project_task_id == project_task_id,
         DBTimerLog.end_time.is_(None)
@@ -183,6 +189,7 @@ def start_timer(db: Session, project_id: int, task_id: int) -> DBTimerLog:
         db_task.status = "進行中"
 
     db.add(new_log)
+    publish_project_event(db, project_id, "timer_started", task_id=task_id, start_time=new_log.start_time)
     db.commit()
     db.refresh(new_log)
     return new_log
@@ -203,18 +210,24 @@ def stop_timer(db: Session, project_id: int, task_id: int) -> DBTimerLog:
     duration_min = duration.total_seconds() / 60.0
     active_log.duration_min = duration_min
     
+    # 💡 主キーに start_time を含むため、UPDATE はログの開始月のパーティションだけに対して行われる
     db.add(active_log)
-    db.flush() # 一旦DBに反映（まだコミットしない）
 
-    # 3. タスクの実績合計時間を再集計して更新
-    # 💡 ログテーブルの duration_minutes を合計する
-    total_min = db.query(func.sum(DBTimerLog.duration_min)).filter(
-        DBTimerLog.project_task_id == db_task.project_task_id
-    ).scalar() or 0.0
+    # 3. タスクの実績合計時間に今回の経過時間を加算
+    # 💡 ログを全期間で合計し直すと全パーティション（切り離した過去の月は含まれない）を読むため、加算で更新する
+    db_task.actual_time_min = (db_task.actual_time_min or 0.0) + duration_min
 
-    # モデル定義に合わせたカラム名 (actual_time_min)
-    db_task.actual_time_min = float(total_min)
+    # 分析用のロールアップ（日別・プロジェクト別）に今回の経過時間を加算する
+    record_timer_rollups(db, [(project_id, db_task.task_template_id, active_log.start_time, duration_min)])
+
+    # 完了済みタスクの実績が変わった場合は見積もりの統計も更新する
+    if db_task.status in COMPLETED_TASK_STATUSES:
+        record_task_actuals(db, [db_task.project_task_id])
     
+    publish_project_event(
+        db, project_id, "timer_stopped",
+        task_id=task_id, duration_min=duration_min, actual_time_min=db_task.actual_time_min
+    )
     db.commit()
     db.refresh(active_log)
     return active_log
\ No newline at end of file
@@ -0,0 +1,393 @@
+# app/services/timer_events.py
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import insert, update, text, tuple_ # type: ignore
+from sqlalchemy.dialects.postgresql import insert as pg_insert # type: ignore
+from sqlalchemy.exc import DBAPIError, OperationalError, TimeoutError as PoolTimeoutError # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from ..database import SessionLocal
+from ..models.project import DBProjectTask, DBTimerLog, DBTimerEvent
+from ..schemas.project import TimerEventIn
+from .events import publish_project_event
+from .estimate import record_task_actuals
+from .rollups import record_timer_rollups
+from ..tracing import current_trace_id
+
+# 書き込みバッファの設定 (環境変数で上書き可能)
+class TimerEventSettings(BaseSettings):
+    timer_event_flush_interval_sec: float = 2.0 # 定期フラッシュの間隔（秒）
+    timer_event_max_batch: int = 500 # この件数に達したら即座にフラッシュする
+    timer_event_max_pending: int = 50000 # DB障害時に保持するイベント数の上限
+    timer_event_max_attempts: int = 3 # データの誤りで書き込めないイベントを再試行する回数（超えたら破棄してログに残す）
+
+timer_event_settings = TimerEventSettings()
+
+logger = logging.getLogger(__name__)
+
+# バッファに積むイベント (project_id, イベント, 受け付けたリクエストの trace_id)
+# 書き込みはバックグラウンドのスレッドで行うため、ログには受け付けたときの trace_id を付ける
+PendingEvent = Tuple[int, TimerEventIn, Optional[str]]
+
+# ----------------------------------------------------
+# 💡 補助関数
+# ----------------------------------------------------
+
+def to_local_naive(ts: datetime) -> datetime:
+    """タイムゾーン付きの時刻を、DBの TIMESTAMP 列に合わせてローカル時刻（naive）に変換する"""
+    if ts.tzinfo is not None:
+        return ts.astimezone().replace(tzinfo=None)
+    return ts
+
+def _duration_min(start: datetime, end: datetime) -> float:
+    """開始・終了時刻から経過時間（分）を計算する。時刻が逆転している場合は 0 とする"""
+    if end <= start:
+        return 0.0
+    return (end - start).total_seconds() / 60.0
+
+def is_transient_db_error(e: Exception) -> bool:
+    """接続断・タイムアウトなど、時間をおけば成功する見込みのあるDBエラーか（制約違反・不正な値は含まない）"""
+    if isinstance(e, (OperationalError, PoolTimeoutError)):
+        return True
+    return isinstance(e, DBAPIError) and e.connection_invalidated
+
+def find_known_event_ids(db: Session, event_ids: List[str]) -> set:
+    """既にDBへ記録済みのイベントIDを1クエリで取得する"""
+    if not event_ids:
+        return set()
+    rows = db.query(DBTimerEvent.event_id).filter(DBTimerEvent.event_id.in_(event_ids)).all()
+    return {row[0] for row in rows}
+
+# ----------------------------------------------------
+# 💡 バッチ永続化
+# ----------------------------------------------------
+
+def persist_timer_events(db: Session, items: List[Tuple[int, TimerEventIn]],
+                         trace_ids: Optional[Dict[str, Optional[str]]] = None) -> int:
+    """
+    (project_id, イベント) のリストをまとめて t_timer_log に反映する。
+    ログは一括INSERT/UPDATEで書き込み、タスクの実績時間はバッチごとに1回だけ更新する。
+    戻り値は実際に適用されたイベント数。trace_ids（event_id → 受け付けたリクエストの trace_id）はログに使う。
+    """
+    if not items:
+        return 0
+
+    # 1. (project_id, task_template_id) から project_task_id を一括で解決
+    keys = {(project_id, event.task_id) for project_id, event in items}
+    task_rows = db.query(
+        DBProjectTask.project_id, DBProjectTask.task_template_id, DBProjectTask.project_task_id
+    ).filter(
+        tuple_(DBProjectTask.project_id, DBProjectTask.task_template_id).in_(list(keys))
+    ).all()
+    task_id_map = {(row[0], row[1]): row[2] for row in task_rows}
+    task_key_of = {row[2]: (row[0], row[1]) for row in task_rows}
+
+    resolved: Dict[str, Tuple[int, TimerEventIn]] = {}
+    for project_id, event in items:
+        project_task_id = task_id_map.get((project_id, event.task_id))
+        if project_task_id is None:
+            logger.warning(
+                "⚠️ Timer event %s skipped: task %s not found in project %s.", event.event_id, event.task_id, project_id,
+                extra={"trace_id": (trace_ids or {}).get(event.event_id)}
+            )
+            continue
+        resolved[event.event_id] = (project_task_id, event)
+
+    if not resolved:
+        return 0
+
+    # 2. 受信記録を一括INSERTし、初めて届いたイベントだけを処理対象にする（冪等性）
+    stmt = pg_insert(DBTimerEvent).values([
+        {
+            "event_id": event_id,
+            "project_task_id": project_task_id,
+            "event_type": event.event_type,
+            "client_ts": to_local_naive(event.client_ts),
+            "received_at": datetime.now(),
+        }
+        for event_id, (project_task_id, event) in resolved.items()
+    ]).on_conflict_do_nothing(index_elements=['event_id']).returning(DBTimerEvent.event_id)
+    new_ids = {row[0] for row in db.execute(stmt)}
+
+    events_by_task: Dict[int, List[TimerEventIn]] = defaultdict(list)
+    for event_id in new_ids:
+        project_task_id, event = resolved[event_id]
+        events_by_task[project_task_id].append(event)
+
+    if not events_by_task:
+        db.commit()
+        return 0
+
+    # 3. 対象タスクの計測中ログを一括取得
+    open_logs = db.query(DBTimerLog.project_task_id, DBTimerLog.log_id, DBTimerLog.start_time).filter(
+        DBTimerLog.project_task_id.in_(list(events_by_task.keys())),
+        DBTimerLog.end_time.is_(None)
+    ).all()
+    open_by_task = {row[0]: {"log_id": row[1], "start_time": row[2]} for row in open_logs}
+
+    # 4. タスクごとにイベントを時系列で畳み込み、ログの追加・更新内容を組み立てる
+    new_logs: List[dict] = []
+    closed_logs: List[dict] = []
+    deltas: Dict[int, float] = {}
+    segments: List[Tuple[int, int, datetime, float]] = [] # ロールアップ用 (project_id, task_template_id, 開始時刻, 分)
+
+    for project_task_id, events in events_by_task.items():
+        events.sort(key=lambda e: to_local_naive(e.client_ts))
+        current: Optional[dict] = open_by_task.get(project_task_id)
+        project_id, task_template_id = task_key_of[project_task_id]
+        delta = 0.0
+
+        for event in events:
+            ts = to_local_naive(event.client_ts)
+
+            if event.event_type in ('stop', 'lap') and current is not None:
+                duration = _duration_min(current["start_time"], ts)
+                delta += duration
+                segments.append((project_id, task_template_id, current["start_time"], duration))
+                if "log_id" in current:
+                    # 主キー (log_id, start_time) で更新し、開始月のパーティションだけを対象にする
+                    closed_logs.append({
+                        "log_id": current["log_id"], "start_time": current["start_time"],
+                        "end_time": ts, "duration_min": duration,
+                    })
+                else:
+                    current.update(end_time=ts, duration_min=duration)
+                    new_logs.append(current)
+                current = None
+
+            if event.event_type in ('start', 'lap') and current is None:
+                current = {
+                    "project_task_id": project_task_id,
+                    "start_time": ts,
+                    "section_index": event.section_index,
+                    "memo": event.memo,
+                }
+            # 計測中の start / 計測していない stop は、同期APIと同じく二重操作として無視する
+
+        if current is not None and "log_id" not in current:
+            current.update(end_time=None, duration_min=None)
+            new_logs.append(current)
+        deltas[project_task_id] = delta
+
+    # 5. ログを一括で書き込む
+    if new_logs:
+        db.execute(insert(DBTimerLog), new_logs)
+    if closed_logs:
+        db.execute(update(DBTimerLog), closed_logs)
+
+    # 6. タスクの実績時間とステータスをバッチ単位で1回だけ更新
+    db.execute(
+        text("""
+            UPDATE t_project_task AS t
+            SET actual_time_min = COALESCE(t.actual_time_min, 0) + d.delta,
+                status = CASE WHEN t.status = '未着手' THEN '進行中' ELSE t.status END
+            FROM unnest(CAST(:task_ids AS BIGINT[]), CAST(:deltas AS FLOAT8[])) AS d(project_task_id, delta)
+            WHERE t.project_task_id = d.project_task_id
+        """),
+        {"task_ids": list(deltas.keys()), "deltas": list(deltas.values())}
+    )
+
+    # 完了済みタスクに実績が加わった場合は見積もりの統計も更新する
+    record_task_actuals(db, deltas.keys())
+    # 分析用のロールアップにバッチ内で停止したログの分をまとめて加算する
+    record_timer_rollups(db, segments)
+
+    # 7. プロジェクトごとに1件だけ変更通知を発行する
+    synced: Dict[int, List[dict]] = defaultdict(list)
+    for project_task_id, delta in deltas.items():
+        project_id, task_id = task_key_of[project_task_id]
+        synced[project_id].append({"task_id": task_id, "added_min": round(delta, 3)})
+    for project_id, tasks in synced.items():
+        publish_project_event(db, project_id, "timers_synced", tasks=tasks)
+
+    db.commit()
+    return len(new_ids)
+
+# ----------------------------------------------------
+# 💡 ライトビハインド・バッファ
+# ----------------------------------------------------
+
+class TimerEventBuffer:
+    """
+    受信したタイマーイベントをメモリ上に溜め、一定間隔または一定件数ごとに
+    まとめてDBへ書き込む。同じ event_id はバッファ内でも1つにまとめる。
+    """
+
+    def __init__(self, flush_interval_sec: float, max_batch: int, max_pending: int):
+        self.flush_interval_sec = flush_interval_sec
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._pending: Dict[str, PendingEvent] = {}
+        self._attempts: Dict[str, int] = {} # データの誤りで書き込めなかった回数（event_id ごと）
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def pending_ids(self, event_ids: List[str]) -> List[str]:
+        """指定したイベントのうち、まだDBに書き込まれずバッファに残っているものの event_id"""
+        with self._lock:
+            return [event_id for event_id in event_ids if event_id in self._pending]
+
+    def submit(self, db: Session, project_id: int, events: List[TimerEventIn]) -> Tuple[int, int]:
+        """イベントをバッファに積む。戻り値は (受付数, 重複数)"""
+        with self._lock:
+            candidates = {e.event_id: e for e in events if e.event_id not in self._pending}
+
+        # 既に永続化済みのイベントは1クエリでまとめて除外する
+        known_ids = find_known_event_ids(db, list(candidates.keys()))
+        trace_id = current_trace_id()
+
+        with self._lock:
+            if len(self._pending) + len(candidates) > self.max_pending:
+                raise ValueError("タイマーイベントの書き込み待ちが上限に達しています。時間をおいて再送してください。")
+            accepted = 0
+            for event_id, event in candidates.items():
+                if event_id in known_ids or event_id in self._pending:
+                    continue
+                self._pending[event_id] = (project_id, event, trace_id)
+                accepted += 1
+            pending = len(self._pending)
+
+        self._ensure_worker()
+        if pending >= self.max_batch:
+            self._wakeup.set()
+        return accepted, len(events) - accepted
+
+    def flush(self) -> int:
+        """
+        バッファの内容をDBへ書き込み、適用したイベント数を返す。
+        接続断などの一時的なエラーはバッチ全体をバッファに戻して次回に再試行し、例外を送出する。
+        それ以外（制約違反・不正な値など）はイベントを1件ずつ書き込み直し、書き込めなかったイベントだけを再試行に回す
+        （TIMER_EVENT_MAX_ATTEMPTS 回失敗したイベントは破棄してログに残す）。1件の不正なイベントで他のイベントを止めない。
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                items = list(self._pending.items())
+                self._pending.clear()
+
+            db = SessionLocal()
+            try:
+                applied = persist_timer_events(
+                    db, [(project_id, event) for _, (project_id, event, _) in items], _trace_ids(items)
+                )
+                self._forget_attempts(event_id for event_id, _ in items)
+                return applied
+            except Exception as e:
+                db.rollback()
+                if is_transient_db_error(e):
+                    logger.warning("⚠️ Timer event flush failed, will retry (trace_ids=%s): %s", _trace_id_summary(items), e)
+                    self._requeue(items)
+                    raise
+                logger.warning(
+                    "⚠️ Timer event batch rejected (%s), retrying %d events one by one (trace_ids=%s): %s",
+                    type(e).__name__, len(items), _trace_id_summary(items), getattr(e, "orig", e)
+                )
+            finally:
+                db.close()
+            return self._flush_one_by_one(items)
+
+    def _flush_one_by_one(self, items: List[Tuple[str, PendingEvent]]) -> int:
+        # 同じタスクの start / stop を順に適用できるよう、発生時刻の順に書き込む
+        items = sorted(items, key=lambda item: to_local_naive(item[1][1].client_ts))
+        applied = 0
+        for position, (event_id, item) in enumerate(items):
+            db = SessionLocal()
+            try:
+                project_id, event, trace_id = item
+                applied += persist_timer_events(db, [(project_id, event)], {event_id: trace_id})
+                self._forget_attempts([event_id])
+            except Exception as e:
+                db.rollback()
+                if is_transient_db_error(e):
+                    logger.warning("⚠️ Timer event flush failed, will retry (trace_ids=%s): %s", _trace_id_summary(items[position:]), e)
+                    self._requeue(items[position:])
+                    raise
+                self._reject(event_id, item, e)
+            finally:
+                db.close()
+        return applied
+
+    def _reject(self, event_id: str, item: PendingEvent, error: Exception):
+        """書き込めなかったイベントを再試行に回す。上限に達したら破棄し、再送できるよう内容をログに残す"""
+        with self._lock:
+            attempts = self._attempts.get(event_id, 0) + 1
+            if attempts < timer_event_settings.timer_event_max_attempts:
+                self._attempts[event_id] = attempts
+                self._pending.setdefault(event_id, item)
+                return
+            self._attempts.pop(event_id, None)
+        project_id, event, trace_id = item
+        logger.error(
+            "☠️ Timer event dropped after %d attempts (project %s): %s error: %s: %s",
+            attempts, project_id, event.model_dump_json(), type(error).__name__, getattr(error, "orig", error),
+            extra={"trace_id": trace_id}
+        )
+
+    def _requeue(self, items: List[Tuple[str, PendingEvent]]):
+        with self._lock:
+            for event_id, item in items:
+                self._pending.setdefault(event_id, item)
+
+    def _forget_attempts(self, event_ids):
+        with self._lock:
+            for event_id in event_ids:
+                self._attempts.pop(event_id, None)
+
+    def close(self):
+        """バックグラウンドスレッドを停止し、残っているイベントを書き込む"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_sec * 5)
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="timer-event-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval_sec)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass # 一時的なエラー。flush 内でログ出力・再キュー済み
+
+def _trace_ids(items: List[Tuple[str, PendingEvent]]) -> Dict[str, Optional[str]]:
+    return {event_id: trace_id for event_id, (_, _, trace_id) in items}
+
+def _trace_id_summary(items: List[Tuple[str, PendingEvent]], limit: int = 5) -> str:
+    """バッチに含まれるリクエストの trace_id（先頭 limit 件）"""
+    trace_ids = sorted({trace_id for _, (_, _, trace_id) in items if trace_id})
+    return ",".join(trace_ids[:limit]) + (",..." if len(trace_ids) > limit else "") if trace_ids else "-"
+
+timer_event_buffer = TimerEventBuffer(
+    flush_interval_sec=timer_event_settings.timer_event_flush_interval_sec,
+    max_batch=timer_event_settings.timer_event_max_batch,
+    max_pending=timer_event_settings.timer_event_max_pending,
+)
@@ -0,0 +1,313 @@
+# app/tracing.py
+#
+# OpenTelemetry 互換のトレーシング（TRACING_ENABLED=true で有効）
+#
+#   - HTTPリクエスト（ルートごと）、SQL文ごと、コミットごと、Gemini の generate_content ごとにスパンを作る
+#     （HTTPのサーバースパンとハンドラーのスパンは、トレーサープロバイダーを設定すると FastAPI 自身が出力する）
+#   - エクスポート先は TRACING_EXPORTER で選ぶ
+#       file    : TRACING_FILE に1スパン1行のJSONで追記する（既定。OTLPコレクターの代わり）
+#       otlp    : OTLP/HTTP で送信する（opentelemetry-exporter-otlp-proto-http が必要。宛先は OTEL_EXPORTER_OTLP_ENDPOINT）
+#       console : 標準出力に書き出す
+#   - app.* のロガー（サービスの警告・アクセスログ）の出力に trace_id / span_id を付与し、診断の記録やプロファイルにも trace_id を残す。
+#     バックグラウンドのスレッドで処理する記録（タイマーイベントの書き込みなど）は、受け付けたリクエストの trace_id を extra で渡す
+#
+# opentelemetry-sdk が入っていない、または無効の場合、各関数は何もしない。
+
+import json
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Optional, Sequence
+
+from pydantic_settings import BaseSettings # type: ignore
+from sqlalchemy import event # type: ignore
+
+try:
+    from opentelemetry import propagate, trace # type: ignore
+    from opentelemetry.sdk.resources import Resource # type: ignore
+    from opentelemetry.sdk.trace import ReadableSpan, TracerProvider # type: ignore
+    from opentelemetry.sdk.trace.export import ( # type: ignore
+        BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult,
+    )
+    from opentelemetry.trace import SpanKind, Status, StatusCode # type: ignore
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# トレーシングの設定 (環境変数で上書き可能)
+class TracingSettings(BaseSettings):
+    tracing_enabled: bool = False
+    tracing_exporter: str = "file" # file / otlp / console
+    tracing_file: str = "/tmp/app-traces.jsonl"
+    tracing_service_name: str = "minecraft-movie-api"
+    tracing_statement_max: int = 2000 # db.statement 属性に載せるSQLの最大文字数
+
+tracing_settings = TracingSettings()
+
+logger = logging.getLogger("app.tracing")
+
+TRACE_ID_HEADER = b"x-trace-id"
+
+# ----------------------------------------------------
+# 💡 エクスポーター
+# ----------------------------------------------------
+
+if OTEL_AVAILABLE:
+    class JsonLinesSpanExporter(SpanExporter):
+        """終了したスパンを1行1件のJSONでファイルに追記する"""
+
+        def __init__(self, path: str):
+            self.path = path
+            self._lock = threading.Lock()
+
+        def export(self, spans: Sequence["ReadableSpan"]) -> "SpanExportResult":
+            lines = [json.dumps(_span_to_dict(span), ensure_ascii=False, default=str) for span in spans]
+            try:
+                with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError as e:
+                logger.warning("⚠️ Failed to write spans to %s: %s", self.path, e)
+                return SpanExportResult.FAILURE
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+def _span_to_dict(span: "ReadableSpan") -> Dict[str, Any]:
+    context = span.get_span_context()
+    return {
+        "trace_id": format(context.trace_id, "032x"),
+        "span_id": format(context.span_id, "016x"),
+        "parent_span_id": format(span.parent.span_id, "016x") if span.parent else None,
+        "name": span.name,
+        "kind": span.kind.name,
+        "start_time_unix_nano": span.start_time,
+        "end_time_unix_nano": span.end_time,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3) if span.end_time else None,
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+        "service": span.resource.attributes.get("service.name"),
+    }
+
+def _create_exporter():
+    exporter = tracing_settings.tracing_exporter
+    if exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter # type: ignore
+            return OTLPSpanExporter()
+        except ImportError:
+            logger.warning("⚠️ opentelemetry-exporter-otlp-proto-http is not installed. Falling back to the file exporter.")
+    elif exporter == "console":
+        return ConsoleSpanExporter()
+    return JsonLinesSpanExporter(tracing_settings.tracing_file)
+
+def _create_tracer():
+    if not tracing_settings.tracing_enabled:
+        return None
+    if not OTEL_AVAILABLE:
+        logger.warning("⚠️ TRACING_ENABLED is set but opentelemetry-sdk is not installed. Tracing is disabled.")
+        return None
+    provider = TracerProvider(resource=Resource.create({"service.name": tracing_settings.tracing_service_name}))
+    provider.add_span_processor(BatchSpanProcessor(_create_exporter()))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer("app")
+
+_tracer = _create_tracer()
+
+def tracing_active() -> bool:
+    return _tracer is not None
+
+def shutdown_tracing():
+    """未送信のスパンを書き出して終了する"""
+    if _tracer is not None:
+        trace.get_tracer_provider().shutdown()
+
+# ----------------------------------------------------
+# 💡 アプリのコードから使う関数
+# ----------------------------------------------------
+
+def traced_span(name: str, **attributes: Any):
+    """スパンを作るコンテキストマネージャー（無効時は何もしない）"""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+def current_trace_id() -> Optional[str]:
+    """現在のトレースID（32桁の16進数）。トレース外・無効時は None"""
+    if _tracer is None:
+        return None
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, "032x") if context.is_valid else None
+
+# ----------------------------------------------------
+# 💡 ログへのトレースID付与
+# ----------------------------------------------------
+
+class TraceContextFilter(logging.Filter):
+    """
+    ログレコードに trace_id / span_id を付ける（トレース外は '-'）。
+    extra={"trace_id": ...} で渡された場合（リクエストの外で、受け付けたリクエストの分を記録する場合）はそれを使う。
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "trace_id", None):
+            record.span_id = getattr(record, "span_id", "-")
+            return True
+        trace_id, span_id = "-", "-"
+        if _tracer is not None:
+            context = trace.get_current_span().get_span_context()
+            if context.is_valid:
+                trace_id, span_id = format(context.trace_id, "032x"), format(context.span_id, "016x")
+        record.trace_id = trace_id
+        record.span_id = span_id
+        return True
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [trace_id=%(trace_id)s span_id=%(span_id)s] %(name)s: %(message)s"
+
+
+def configure_trace_logging():
+    """app.* ロガーの出力にトレースIDを含める（トレーシングが無効でもサービスの警告を出力するため、起動時に常に呼ぶ）"""
+    app_logger = logging.getLogger("app")
+    if any(isinstance(f, TraceContextFilter) for h in app_logger.handlers for f in h.filters):
+        return
+    handler = logging.StreamHandler()
+    handler.addFilter(TraceContextFilter())
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    app_logger.addHandler(handler)
+    app_logger.setLevel(logging.INFO)
+    app_logger.propagate = False
+
+# ----------------------------------------------------
+# 💡 HTTP（ASGIミドルウェア）
+# ----------------------------------------------------
+
+class TracingMiddleware:
+    """
+    レスポンスに X-Trace-Id を付け、trace_id 付きのアクセスログを出す。
+    サーバースパン（'METHOD /route' と http.* 属性）は、トレーサーが設定されていれば FastAPI 自身が作るので、
+    ここではそれを使う。無い場合（FastAPI のテレメトリを無効にしたときなど）だけ自前で作る。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        if trace.get_current_span().get_span_context().is_valid:
+            await self._handle(scope, receive, send, None)
+            return
+
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", [])}
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+        ) as span:
+            await self._handle(scope, receive, send, span)
+
+    async def _handle(self, scope, receive, send, own_span):
+        trace_id = current_trace_id()
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(TRACE_ID_HEADER, trace_id.encode())]}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if own_span is not None:
+                if route:
+                    own_span.update_name(f"{scope['method']} {route}")
+                    own_span.set_attribute("http.route", route)
+                own_span.set_attribute("http.response.status_code", status_holder["status"])
+                if status_holder["status"] >= 500:
+                    own_span.set_status(Status(StatusCode.ERROR))
+            logger.info(
+                "%s %s %s %.1fms", scope["method"], route or scope["path"], status_holder["status"],
+                (time.perf_counter() - started) * 1000
+            )
+
+# ----------------------------------------------------
+# 💡 SQL文とコミット
+# ----------------------------------------------------
+
+def install_sql_tracing(engine):
+    """SQL文ごとに子スパンを作る"""
+    if _tracer is None:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # スロークエリの EXPLAIN（診断用の別接続）はトレースに含めない
+        if conn.info.get("diagnostics_internal"):
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        span = _tracer.start_span(
+            f"db.{operation.lower() or 'query'}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "postgresql",
+                "db.operation.name": operation,
+                "db.query.text": statement[: tracing_settings.tracing_statement_max],
+                "db.executemany": executemany,
+            },
+        )
+        conn.info.setdefault("tracing_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("tracing_spans")
+        if spans:
+            span = spans.pop()
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.response.returned_rows", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("tracing_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+
+def install_commit_tracing(session_factory):
+    """セッションのコミットごとにスパンを作る（フラッシュで発行されるSQLはこのスパンの子になる）"""
+    if _tracer is None:
+        return
+
+    @event.listens_for(session_factory, "before_commit")
+    def _before_commit(session):
+        span = _tracer.start_span("db.commit")
+        session.info["tracing_commit"] = (span, trace.use_span(span, end_on_exit=False))
+        session.info["tracing_commit"][1].__enter__()
+
+    def _end_commit(session, error: bool):
+        entry = session.info.pop("tracing_commit", None)
+        if entry is None:
+            return
+        span, scope = entry
+        scope.__exit__(None, None, None)
+        if error:
+            span.set_status(Status(StatusCode.ERROR))
+        span.end()
+
+    @event.listens_for(session_factory, "after_commit")
+    def _after_commit(session):
+        _end_commit(session, error=False)
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _after_rollback(session):
+        _end_commit(session, error=True)
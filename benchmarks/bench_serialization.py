@@ -0,0 +1,117 @@
+# benchmarks/bench_serialization.py
+#
+# プロジェクト詳細レスポンスのシリアライズ経路を比較するベンチマーク（DB不要）。
+#
+#   python -m benchmarks.bench_serialization [--json result.json]
+#
+# 比較する経路:
+#   fastapi_default : ORMオブジェクト → response_model で検証 → jsonable な dict → 標準 json で出力
+#   model_dump_json : ORMオブジェクト → Project で1回だけ検証 → model_dump_json
+#   orjson_fragment : 行の dict → orjson（scaffold_data はDBのテキストを Fragment でそのまま埋め込む）
+#
+# DBドライバがJSONB列をパースするコストを含めるため、前2つの経路では scaffold の json.loads も計測に含める。
+
+import argparse
+import json
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.api.responses import dumps, jsonb_fragment
+from app.schemas.project import Project
+
+SCAFFOLD_SIZES = [8, 200, 2000] # discussion_flow の質問数
+TASK_SIZES = [4, 100, 1000] # プロジェクトあたりのタスク数
+
+def make_scaffold_text(questions: int) -> str:
+    return json.dumps({
+        "suggested_title": "AI時代の労働の価値について",
+        "script_intro_text": "導入フックの文章です。" * 20,
+        "discussion_flow": [
+            {"question_text": f"質問{i}: " + "具体的な体験を教えてください。" * 3, "target_time_min": 1.5, "angle_type": "疑問"}
+            for i in range(questions)
+        ],
+    }, ensure_ascii=False)
+
+def make_task_rows(count: int) -> list:
+    now = datetime.now()
+    return [
+        {
+            "project_task_id": i + 1,
+            "task_template_id": (i % 12) + 1,
+            "status": "完了" if i % 2 else "未着手",
+            "est_time_min": 30,
+            "actual_time_min": 12.5 * (i % 3),
+            "completed_at": now if i % 2 else None,
+        }
+        for i in range(count)
+    ]
+
+def make_project_row(scaffold_text: str, task_rows: list) -> dict:
+    return {
+        "project_id": 1,
+        "current_status_id": 1,
+        "theme": "ベンチマーク用テーマ",
+        "input_angle_id": 1,
+        "progress_rate": 50,
+        "scaffold_data": scaffold_text,
+        "created_at": datetime.now(),
+        "version": 1,
+        "tasks": task_rows,
+    }
+
+def path_fastapi_default(row: dict) -> bytes:
+    orm = SimpleNamespace(**{**row, "scaffold_data": json.loads(row["scaffold_data"]),
+                             "tasks": [SimpleNamespace(**t) for t in row["tasks"]]})
+    content = Project.model_validate(orm).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def path_model_dump_json(row: dict) -> bytes:
+    orm = SimpleNamespace(**{**row, "scaffold_data": json.loads(row["scaffold_data"]),
+                             "tasks": [SimpleNamespace(**t) for t in row["tasks"]]})
+    return Project.model_validate(orm).model_dump_json().encode()
+
+def path_orjson_fragment(row: dict) -> bytes:
+    return dumps({**row, "scaffold_data": jsonb_fragment(row["scaffold_data"])})
+
+PATHS = {
+    "fastapi_default": path_fastapi_default,
+    "model_dump_json": path_model_dump_json,
+    "orjson_fragment": path_orjson_fragment,
+}
+
+def measure(fn, row: dict, min_time_sec: float = 0.2) -> float:
+    """1回あたりの所要時間（マイクロ秒）を返す"""
+    timer = timeit.Timer(lambda: fn(row))
+    number, _ = timer.autorange()
+    number = max(number, 1)
+    best = min(timer.repeat(repeat=5, number=number))
+    return best / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="プロジェクトレスポンスのシリアライズ経路ベンチマーク")
+    parser.add_argument("--json", dest="json_path", help="結果をJSONで書き出すファイルパス")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'questions':>9} {'tasks':>6} {'bytes':>9} " + " ".join(f"{name:>16}" for name in PATHS) + "   speedup")
+    for questions in SCAFFOLD_SIZES:
+        for tasks in TASK_SIZES:
+            row = make_project_row(make_scaffold_text(questions), make_task_rows(tasks))
+            # 各経路が同じ内容を出力することを確認する
+            reference = json.loads(path_fastapi_default(row))
+            for name, fn in PATHS.items():
+                assert json.loads(fn(row)) == reference, f"{name} produced a different document"
+
+            timings = {name: measure(fn, row) for name, fn in PATHS.items()}
+            speedup = timings["fastapi_default"] / timings["orjson_fragment"]
+            size = len(path_orjson_fragment(row))
+            print(f"{questions:>9} {tasks:>6} {size:>9} " + " ".join(f"{timings[n]:>14.1f}us" for n in PATHS) + f"   x{speedup:.1f}")
+            results.append({"questions": questions, "tasks": tasks, "bytes": size, "us_per_call": timings, "speedup": speedup})
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "serialization", "results": results}, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
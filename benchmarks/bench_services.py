@@ -0,0 +1,254 @@
+# benchmarks/bench_services.py
+#
+# サービス層のマイクロベンチマーク（DATABASE_URL のDBを使用）。
+# 関数ごとに、データ量を変えながら「1回あたりの所要時間」と「1回あたりのSQL発行数」を計測する。
+#
+#   python -m benchmarks.bench_services [--only timer,complete] [--json result.json] [--check]
+#
+# 計測対象とデータ量:
+#   timer_start / timer_stop   : タスクあたりのタイマーログ数
+#   complete_task              : プロジェクトあたりのタスク数（update_project_progress を含む）
+#   update_project_progress    : プロジェクトあたりのタスク数
+#   check_and_transition       : ステータスあたりの遷移ルール数
+#   create_initial_project     : （固定）
+#   parse_ai_json              : 骨子の質問数（Markdownブロック付きの応答）
+#
+# 計測用のデータは1つのトランザクション内で作成し、終了時にロールバックする
+# （サービス関数の commit はセーブポイントの確定として扱われる）。
+#
+# --check を付けると、データ量を増やしたときにSQL発行数が増える関数（N+1 の兆候）があれば終了コード1で終わる。
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text # type: ignore
+
+from app.database import SessionLocal, engine
+from app.metrics import track_db_stats
+from app.schemas.project import ProjectCreate
+from app.services.ai_generator import parse_ai_json
+from app.services.project_main import check_and_transition_status, create_initial_project, update_project_progress
+from app.services.task import complete_task
+from app.services.timer import start_timer, stop_timer
+
+LOG_SIZES = [0, 100, 1000, 10000] # タスクあたりのタイマーログ数
+TASK_SIZES = [4, 50, 500] # プロジェクトあたりのタスク数
+RULE_SIZES = [1, 10, 100] # ステータスあたりの遷移ルール数
+QUESTION_SIZES = [8, 200, 2000] # 骨子の質問数
+
+# 計測用データの目印
+THEME_PREFIX = "bench-"
+
+# ----------------------------------------------------
+# 💡 計測の枠組み
+# ----------------------------------------------------
+
+@contextmanager
+def isolated_session():
+    """外側のトランザクションを最後にロールバックするセッション（commit はセーブポイントになる）"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+def measure(fn: Callable[[], None], setup: Optional[Callable[[], None]] = None,
+            min_time_sec: float = 0.3, min_runs: int = 5, max_runs: int = 200) -> Dict[str, float]:
+    """
+    fn を繰り返し実行し、1回あたりの所要時間（中央値）とSQL発行数（最大値）を返す。
+    setup は毎回 fn の前に実行され、計測には含めない。
+    """
+    timings: List[float] = []
+    statements: List[int] = []
+    started = time.perf_counter()
+    while len(timings) < min_runs or (time.perf_counter() - started < min_time_sec and len(timings) < max_runs):
+        if setup:
+            setup()
+        with track_db_stats() as stats:
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+        statements.append(stats.statements)
+    return {
+        "runs": len(timings),
+        "ms_per_call": round(statistics.median(timings) * 1000, 3),
+        "statements_per_call": max(statements),
+    }
+
+# ----------------------------------------------------
+# 💡 計測用データ
+# ----------------------------------------------------
+
+def make_project(db, tasks: int, status_id: int = 1) -> int:
+    """tasks 件のタスクを持つプロジェクトを作成し、project_id を返す"""
+    project_id = db.execute(text("""
+        INSERT INTO t_project (type_id, current_status_id, theme, input_angle_id, scaffold_data, created_at, progress_rate, version)
+        VALUES (1, :status_id, :theme, 1, '{}'::jsonb, now(), 0, 1)
+        RETURNING project_id
+    """), {"status_id": status_id, "theme": f"{THEME_PREFIX}{tasks}"}).scalar()
+    db.execute(text("""
+        INSERT INTO t_project_task (project_id, task_template_id, status, est_time_min, actual_time_min)
+        SELECT :project_id, templates.ids[1 + (i - 1) % cardinality(templates.ids)], '未着手', 30, 0
+        FROM generate_series(1, :tasks) AS i,
+             (SELECT ARRAY_AGG(task_template_id ORDER BY task_template_id) AS ids FROM m_task_template) AS templates
+    """), {"project_id": project_id, "tasks": tasks})
+    db.commit()
+    return project_id
+
+def first_task(db, project_id: int):
+    """プロジェクトの最初のタスクの (project_task_id, task_template_id)"""
+    return db.execute(text("""
+        SELECT project_task_id, task_template_id FROM t_project_task
+        WHERE project_id = :project_id ORDER BY project_task_id LIMIT 1
+    """), {"project_id": project_id}).one()
+
+def add_timer_logs(db, project_task_id: int, count: int):
+    db.execute(text("""
+        INSERT INTO t_timer_log (project_task_id, start_time, end_time, duration_min)
+        SELECT :project_task_id, now() - interval '1 minute' * (k * 30 + 10), now() - interval '1 minute' * (k * 30), 10
+        FROM generate_series(1, :count) AS k
+    """), {"project_task_id": project_task_id, "count": count})
+    db.commit()
+
+def make_scaffold_response(questions: int) -> str:
+    body = json.dumps({
+        "suggested_title": "ベンチマーク用タイトル",
+        "script_intro_text": "導入フックの文章です。" * 20,
+        "discussion_flow": [
+            {"question_text": f"質問{i}: 具体的な体験を教えてください。", "target_time_min": 1.5, "angle_type": "疑問"}
+            for i in range(questions)
+        ],
+    }, ensure_ascii=False, indent=2)
+    return f"```json\n{body}\n```"
+
+# ----------------------------------------------------
+# 💡 ベンチマーク本体（size ごとの計測結果を返す）
+# ----------------------------------------------------
+
+def bench_timer(db) -> Dict[str, List[Dict]]:
+    start_results, stop_results = [], []
+    for size in LOG_SIZES:
+        project_id = make_project(db, tasks=4)
+        project_task_id, template_id = first_task(db, project_id)
+        add_timer_logs(db, project_task_id, size)
+
+        start = measure(lambda: start_timer(db, project_id, template_id),
+                        setup=lambda: _ensure_stopped(db, project_task_id))
+        stop = measure(lambda: stop_timer(db, project_id, template_id),
+                       setup=lambda: _ensure_started(db, project_id, project_task_id, template_id))
+        start_results.append({"size": size, **start})
+        stop_results.append({"size": size, **stop})
+    return {"timer_start": start_results, "timer_stop": stop_results}
+
+def _ensure_stopped(db, project_task_id: int):
+    db.execute(text("""
+        UPDATE t_timer_log SET end_time = start_time, duration_min = 0
+        WHERE project_task_id = :project_task_id AND end_time IS NULL
+    """), {"project_task_id": project_task_id})
+    db.commit()
+
+def _ensure_started(db, project_id: int, project_task_id: int, template_id: int):
+    _ensure_stopped(db, project_task_id)
+    start_timer(db, project_id, template_id)
+
+def bench_complete(db) -> Dict[str, List[Dict]]:
+    complete_results, progress_results = [], []
+    for size in TASK_SIZES:
+        project_id = make_project(db, tasks=size)
+        project_task_id, template_id = first_task(db, project_id)
+
+        def reset():
+            db.execute(text("UPDATE t_project_task SET status = '未着手', completed_at = NULL WHERE project_task_id = :id"),
+                       {"id": project_task_id})
+            db.commit()
+
+        complete_results.append({"size": size, **measure(lambda: complete_task(db, project_id, template_id), setup=reset)})
+        progress_results.append({"size": size, **measure(lambda: update_project_progress(db, project_id))})
+    return {"complete_task": complete_results, "update_project_progress": progress_results}
+
+def bench_transition(db) -> Dict[str, List[Dict]]:
+    results = []
+    status_id = 1
+    for size in RULE_SIZES:
+        # 満たされない条件のルールを追加し、毎回すべてのルールが評価されるようにする
+        # （シードデータは rule_id を明示して投入しているため、シーケンスは使わない）
+        db.execute(text("""
+            INSERT INTO m_transition_rule (rule_id, current_status_id, next_status_id, required_task_ids, is_active)
+            SELECT (SELECT COALESCE(MAX(rule_id), 0) FROM m_transition_rule) + g, :status_id, :status_id + 1, ARRAY[-g], TRUE
+            FROM generate_series(1, :count) AS g
+        """), {"status_id": status_id, "count": size - (results[-1]["size"] if results else 0)})
+        db.commit()
+        project_id = make_project(db, tasks=12, status_id=status_id)
+        results.append({"size": size, **measure(lambda: check_and_transition_status(db, project_id))})
+    return {"check_and_transition": results}
+
+def bench_create(db) -> Dict[str, List[Dict]]:
+    project_in = ProjectCreate(theme=f"{THEME_PREFIX}create", input_angle_id=1)
+    return {"create_initial_project": [{"size": 1, **measure(lambda: create_initial_project(db, project_in))}]}
+
+def bench_parse(db) -> Dict[str, List[Dict]]:
+    results = []
+    for size in QUESTION_SIZES:
+        response_text = make_scaffold_response(size)
+        results.append({"size": size, "bytes": len(response_text.encode()), **measure(lambda: parse_ai_json(response_text))})
+    return {"parse_ai_json": results}
+
+BENCHMARKS = {
+    "timer": bench_timer,
+    "complete": bench_complete,
+    "transition": bench_transition,
+    "create": bench_create,
+    "parse": bench_parse,
+}
+
+def find_statement_growth(results: Dict[str, List[Dict]]) -> List[str]:
+    """データ量に応じてSQL発行数が増えている関数を返す"""
+    problems = []
+    for name, rows in results.items():
+        if len(rows) > 1 and rows[-1]["statements_per_call"] > rows[0]["statements_per_call"]:
+            problems.append(
+                f"{name}: statements grew from {rows[0]['statements_per_call']} (size={rows[0]['size']}) "
+                f"to {rows[-1]['statements_per_call']} (size={rows[-1]['size']})"
+            )
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="サービス層のマイクロベンチマーク")
+    parser.add_argument("--only", help=f"実行するベンチマーク（カンマ区切り）: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--json", dest="json_path", help="結果をJSONで書き出すファイルパス")
+    parser.add_argument("--check", action="store_true", help="データ量に応じてSQL発行数が増えたら失敗にする")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    results: Dict[str, List[Dict]] = {}
+    for name in names:
+        with isolated_session() as db:
+            results.update(BENCHMARKS[name](db))
+
+    print(f"{'function':<26} {'size':>7} {'runs':>5} {'ms/call':>10} {'stmts/call':>11}")
+    for function, rows in results.items():
+        for row in rows:
+            print(f"{function:<26} {row['size']:>7} {row['runs']:>5} {row['ms_per_call']:>10.3f} {row['statements_per_call']:>11}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "services", "results": results}, f, ensure_ascii=False, indent=2)
+
+    if args.check:
+        problems = find_statement_growth(results)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/seed_data.py
+#
+# 負荷試験用の合成データを投入する（DATABASE_URL のDBに対して実行する）。
+#
+#   python -m benchmarks.seed_data --projects 200 --tasks 12 --logs 5 [--reset]
+#
+# 投入するデータ:
+#   - N件のプロジェクト（テーマは 'loadtest-' で始まり、--reset でまとめて削除できる）
+#   - プロジェクトごとにM件のタスク（m_task_template を順に割り当てる）
+#   - タスクごとにK件の終了済みタイマーログ（actual_time_min はログの合計と一致させる）
+#
+# すべて generate_series を使った集合演算で投入するため、数十万行でも数秒で終わる。
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from sqlalchemy import text # type: ignore
+
+from app.database import engine, init_db
+
+# 負荷試験用データの目印
+THEME_PREFIX = "loadtest-"
+# 完了とみなすステータス (m_status)
+COMPLETED_STATUS_ID = 6
+
+SCAFFOLD = {
+    "suggested_title": "負荷試験用のトーク",
+    "script_intro_text": "負荷試験用の導入フックです。" * 10,
+    "discussion_flow": [
+        {"question_text": f"質問{i + 1}: 具体的な体験を教えてください。", "target_time_min": 1.5, "angle_type": "具体的体験"}
+        for i in range(8)
+    ],
+}
+
+def reset_seed_data(connection):
+    """'loadtest-' で始まるプロジェクトと、それにぶら下がるデータを削除する"""
+    params = {"pattern": THEME_PREFIX + "%"}
+    connection.execute(text("""
+        CREATE TEMP TABLE _seed_projects ON COMMIT DROP AS
+        SELECT project_id FROM t_project WHERE theme LIKE :pattern
+    """), params)
+    connection.execute(text("""
+        CREATE TEMP TABLE _seed_tasks ON COMMIT DROP AS
+        SELECT project_task_id FROM t_project_task WHERE project_id IN (SELECT project_id FROM _seed_projects)
+    """))
+    # t_project を ON DELETE CASCADE なしで参照する表を先に消す（ショート・品質チェックの結果はエンドポイントの負荷試験で作られる）
+    connection.execute(text("DELETE FROM t_shorts_management WHERE vod_project_id IN (SELECT project_id FROM _seed_projects)"))
+    connection.execute(text("DELETE FROM t_quality_check_result WHERE project_id IN (SELECT project_id FROM _seed_projects)"))
+    connection.execute(text("DELETE FROM t_timer_event WHERE project_task_id IN (SELECT project_task_id FROM _seed_tasks)"))
+    connection.execute(text("DELETE FROM t_timer_log WHERE project_task_id IN (SELECT project_task_id FROM _seed_tasks)"))
+    connection.execute(text("DELETE FROM t_project_task WHERE project_task_id IN (SELECT project_task_id FROM _seed_tasks)"))
+    deleted = connection.execute(text("DELETE FROM t_project WHERE project_id IN (SELECT project_id FROM _seed_projects)")).rowcount
+    print(f"🧹 Removed {deleted} seeded projects.")
+
+def seed(connection, projects: int, tasks: int, logs: int) -> Dict[str, int]:
+    """合成データを投入し、投入件数を返す"""
+    template_ids: List[int] = connection.execute(
+        text("SELECT task_template_id FROM m_task_template ORDER BY task_template_id")
+    ).scalars().all()
+    if not template_ids:
+        raise RuntimeError("m_task_template is empty. Run init-db/seed_data.sql first.")
+
+    # 1. プロジェクト（ステータスは 1〜5 の進行中に散らし、一部を完了にする）
+    project_count = connection.execute(text("""
+        INSERT INTO t_project (type_id, current_status_id, theme, input_angle_id, scaffold_data, created_at, progress_rate, version)
+        SELECT 1,
+               CASE WHEN g % 10 = 0 THEN :completed_status_id ELSE 1 + (g % 5) END,
+               :prefix || g,
+               1 + (g % 2),
+               CAST(:scaffold AS jsonb),
+               now() - interval '1 minute' * g,
+               0,
+               1
+        FROM generate_series(1, :projects) AS g
+    """), {
+        "projects": projects,
+        "prefix": THEME_PREFIX,
+        "completed_status_id": COMPLETED_STATUS_ID,
+        "scaffold": json.dumps(SCAFFOLD, ensure_ascii=False),
+    }).rowcount
+
+    # 2. タスク（テンプレートを順に割り当て、約3割を完了にする）
+    task_count = connection.execute(text("""
+        INSERT INTO t_project_task (project_id, task_template_id, status, est_time_min, actual_time_min, completed_at)
+        SELECT p.project_id,
+               (CAST(:template_ids AS int[]))[1 + (i - 1) % cardinality(CAST(:template_ids AS int[]))],
+               CASE WHEN (p.project_id + i) % 3 = 0 THEN '完了' ELSE '未着手' END,
+               10 + (i % 4) * 10,
+               0,
+               CASE WHEN (p.project_id + i) % 3 = 0 THEN p.created_at + interval '1 hour' * i END
+        FROM t_project p
+        CROSS JOIN generate_series(1, :tasks) AS i
+        WHERE p.theme LIKE :pattern
+          AND NOT EXISTS (SELECT 1 FROM t_project_task t WHERE t.project_id = p.project_id)
+    """), {"template_ids": template_ids, "tasks": tasks, "pattern": THEME_PREFIX + "%"}).rowcount
+
+    # 3. タイマーログ（終了済み、1件あたり5〜29分）
+    log_count = connection.execute(text("""
+        INSERT INTO t_timer_log (project_task_id, start_time, end_time, duration_min, section_index)
+        SELECT t.project_task_id,
+               p.created_at + interval '1 minute' * (k * 30),
+               p.created_at + interval '1 minute' * (k * 30 + 5 + (t.project_task_id + k) % 25),
+               5 + (t.project_task_id + k) % 25,
+               k % 8
+        FROM t_project_task t
+        JOIN t_project p ON p.project_id = t.project_id
+        CROSS JOIN generate_series(1, :logs) AS k
+        WHERE p.theme LIKE :pattern
+          AND NOT EXISTS (SELECT 1 FROM t_timer_log l WHERE l.project_task_id = t.project_task_id)
+    """), {"logs": logs, "pattern": THEME_PREFIX + "%"}).rowcount
+
+    # 4. 実績時間と進捗率をログ・タスクから集計する
+    connection.execute(text("""
+        UPDATE t_project_task t
+        SET actual_time_min = agg.total
+        FROM (
+            SELECT l.project_task_id, SUM(l.duration_min) AS total
+            FROM t_timer_log l
+            JOIN t_project_task t2 ON t2.project_task_id = l.project_task_id
+            JOIN t_project p ON p.project_id = t2.project_id
+            WHERE p.theme LIKE :pattern
+            GROUP BY l.project_task_id
+        ) agg
+        WHERE t.project_task_id = agg.project_task_id
+    """), {"pattern": THEME_PREFIX + "%"})
+    connection.execute(text("""
+        UPDATE t_project p
+        SET progress_rate = agg.rate
+        FROM (
+            SELECT project_id, (100 * COUNT(*) FILTER (WHERE status = '完了') / COUNT(*))::int AS rate
+            FROM t_project_task
+            GROUP BY project_id
+        ) agg
+        WHERE p.project_id = agg.project_id AND p.theme LIKE :pattern
+    """), {"pattern": THEME_PREFIX + "%"})
+
+    return {"projects": project_count, "tasks": task_count, "timer_logs": log_count}
+
+def main():
+    parser = argparse.ArgumentParser(description="負荷試験用の合成データ投入")
+    parser.add_argument("--projects", type=int, default=200, help="プロジェクト数 (N)")
+    parser.add_argument("--tasks", type=int, default=12, help="プロジェクトあたりのタスク数 (M)")
+    parser.add_argument("--logs", type=int, default=5, help="タスクあたりのタイマーログ数 (K)")
+    parser.add_argument("--reset", action="store_true", help="投入前に既存の負荷試験用データを削除する")
+    parser.add_argument("--init-db", action="store_true", help="投入前にテーブル作成・マイグレーションを実行する")
+    args = parser.parse_args()
+
+    if args.init_db:
+        init_db()
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        if args.reset:
+            reset_seed_data(connection)
+        counts = seed(connection, args.projects, args.tasks, args.logs)
+    print(f"🌱 Seeded {counts} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,71 @@
-import Image from "next/image";
+'use client';
+import { useEffect, useState } from 'react';
+import Link from 'next/link';
+import api from '@/lib/api';
+
+interface DashboardProject {
+  project_id: number;
+  theme: string;
+  status_name: string;
+  progress_rate: number;
+  task_count: number;
+  completed_task_count: number;
+  est_total_min: number;
+  actual_total_min: number;
+  active_timer: { task_id: number; start_time: string } | null;
+  artifacts: { scaffold: boolean; thumbnail: boolean; summary: boolean };
+}
+
+// ダッシュボードは /dashboard/ の1リクエストで全プロジェクト分の集計を取得する
+const POLL_INTERVAL_MS = 10000;
 
 export default function Home() {
+  const [projects, setProjects] = useState<DashboardProject[]>([]);
+
+  useEffect(() => {
+    const load = () =>
+      api.get('/dashboard/')
+        .then((res) => setProjects(res.data.projects))
+        .catch((error) => console.error('ダッシュボードの取得に失敗しました:', error));
+
+    load();
+    const timer = setInterval(load, POLL_INTERVAL_MS);
+    return () => clearInterval(timer);
+  }, []);
+
   return (
-    <div className="flex min-h-screen items-center justify-center bg-zinc-50 font-sans dark:bg-black">
-      <main className="flex min-h-screen w-full max-w-3xl flex-col items-center justify-between py-32 px-16 bg-white dark:bg-black sm:items-start">
-        <Image
-          className="dark:invert"
-          src="/next.svg"
-          alt="Next.js logo"
-          width={100}
-          height={20}
-          priority
-        />
-        <div className="flex flex-col items-center gap-6 text-center sm:items-start sm:text-left">
-          <h1 className="max-w-xs text-3xl font-semibold leading-10 tracking-tight text-black dark:text-zinc-50">
-            To get started, edit the page.tsx file.
-          </h1>
-          <p className="max-w-md text-lg leading-8 text-zinc-600 dark:text-zinc-400">
-            Looking for a starting point or more instructions? Head over to{" "}
-            <a
-              href="https://vercel.com/templates?framework=next.js&utm_source=create-next-app&utm_medium=appdir-template-tw&utm_campaign=create-next-app"
-              className="font-medium text-zinc-950 dark:text-zinc-50"
-            >
-              Templates
-            </a>{" "}
-            or the{" "}
-            <a
-              href="https://nextjs.org/learn?utm_source=create-next-app&utm_medium=appdir-template-tw&utm_campaign=create-next-app"
-              className="font-medium text-zinc-950 dark:text-zinc-50"
-            >
-              Learning
-            </a>{" "}
-            center.
-          </p>
-        </div>
-        <div className="flex flex-col gap-4 text-base font-medium sm:flex-row">
-          <a
-            className="flex h-12 w-full items-center justify-center gap-2 rounded-full bg-foreground px-5 text-background transition-colors hover:bg-[#383838] dark:hover:bg-[#ccc] md:w-[158px]"
-            href="https://vercel.com/new?utm_source=create-next-app&utm_medium=appdir-template-tw&utm_campaign=create-next-app"
-            target="_blank"
-            rel="noopener noreferrer"
-          >
-            <Image
-              className="dark:invert"
-              src="/vercel.svg"
-              alt="Vercel logomark"
-              width={16}
-              height={16}
-            />
-            Deploy Now
-          </a>
-          <a
-            className="flex h-12 w-full items-center justify-center rounded-full border border-solid border-black/[.08] px-5 transition-colors hover:border-transparent hover:bg-black/[.04] dark:border-white/[.145] dark:hover:bg-[#1a1a1a] md:w-[158px]"
-            href="https://nextjs.org/docs?utm_source=create-next-app&utm_medium=appdir-template-tw&utm_campaign=create-next-app"
-            target="_blank"
-            rel="noopener noreferrer"
+    <div className="p-10 max-w-5xl mx-auto">
+      <header className="mb-10">
+        <h1 className="text-3xl font-black text-slate-800">Dashboard</h1>
+        <p className="text-slate-500">進行中のプロジェクトと、今動いているタイマーを一覧します。</p>
+      </header>
+
+      <div className="space-y-4">
+        {projects.map((p) => (
+          <Link
+            key={p.project_id}
+            href={`/studio?projectId=${p.project_id}`}
+            className="block bg-white p-6 rounded-[24px] shadow-sm border border-slate-100 hover:border-emerald-300 transition-all"
           >
-            Documentation
-          </a>
-        </div>
-      </main>
+            <div className="flex items-center justify-between mb-3">
+              <div className="font-bold text-lg text-slate-800">{p.theme}</div>
+              <span className="px-3 py-1 bg-slate-100 text-slate-600 rounded-full text-xs font-bold">{p.status_name}</span>
+            </div>
+            <div className="w-full bg-slate-100 h-2 rounded-full overflow-hidden mb-3">
+              <div className="bg-emerald-500 h-full" style={{ width: `${p.progress_rate}%` }} />
+            </div>
+            <div className="flex flex-wrap gap-4 text-xs text-slate-500 font-mono">
+              <span>タスク {p.completed_task_count}/{p.task_count}</span>
+              <span>見積 {p.est_total_min}分 / 実績 {Math.round(p.actual_total_min)}分</span>
+              {p.active_timer && <span className="text-emerald-600 font-bold">● 計測中 (タスク{p.active_timer.task_id})</span>}
+              <span>
+                骨子{p.artifacts.scaffold ? '✅' : '—'} サムネ{p.artifacts.thumbnail ? '✅' : '—'} サマリー{p.artifacts.summary ? '✅' : '—'}
+              </span>
+            </div>
+          </Link>
+        ))}
+        {projects.length === 0 && <p className="text-slate-400">進行中のプロジェクトはありません。</p>}
+      </div>
     </div>
   );
 }
@@ -42,19 +42,23 @@ export default function PlannerPage() {
     }
 
     setIsGenerating(true);
+    // 💡 通信が不安定で再送しても、プロジェクトの重複作成やAIの再生成が起きないよう冪等キーを付ける
+    const requestId = crypto.randomUUID();
     try {
       // 1. プロジェクトを新規作成
       const projectRes = await api.post('/projects/', {
         theme: theme,
         input_angle_id: parseInt(selectedAngle),
         // 実際の実装に合わせて他の必須フィールドも送る
-      });
+      }, { headers: { 'Idempotency-Key': `${requestId}-create` } });
       
       const projectId = projectRes.data.project_id;
 
       // 2. AIトーク骨子を生成（Geminiを叩く）
       // バックエンドの generate_talk_scaffold 関数を呼び出すエンドポイントを想定
-      await api.post(`/projects/${projectId}/scaffold`);
+      await api.post(`/projects/${projectId}/scaffold`, null, {
+        headers: { 'Idempotency-Key': `${requestId}-scaffold` },
+      });
 
       alert("AI構成の生成が完了しました！スタジオに移動します。");
       
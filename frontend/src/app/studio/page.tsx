@@ -1,9 +1,16 @@
 'use client';
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
+import api from '@/lib/api';
+import { enqueueTimerEvent, flushTimerEvents, TimerEventType } from '@/lib/timerQueue';
+
+// 収録の計測対象タスク（seed_data.sql の「収録作業」）。?taskId= で上書きできる
+const RECORDING_TASK_ID = 4;
+// 送信できずにローカルに残ったタイマーイベントを再送する間隔
+const FLUSH_RETRY_INTERVAL_MS = 15000;
 
 export default function StudioPage() {
   // 仕様書の「雑談フローリスト（8個の質問）」を想定
-  const [questions] = useState([
+  const [questions, setQuestions] = useState([
     "最近、何かに矛盾を感じたことはありますか？",
     "その矛盾を解決するために、どんな行動をとりましたか？",
     "労働の価値について、あなたの考えを教えてください。",
@@ -15,12 +22,59 @@ export default function StudioPage() {
   ]);
   
   const [currentIndex, setCurrentIndex] = useState(0);
+  const [recording, setRecording] = useState(false);
+  const [projectId, setProjectId] = useState<number | null>(null);
+  const [taskId, setTaskId] = useState(RECORDING_TASK_ID);
+
+  // 💡 スタジオで描画するのは質問リストだけなので、トーク骨子のみを取得する
+  useEffect(() => {
+    const params = new URLSearchParams(window.location.search);
+    const projectId = params.get('projectId');
+    if (!projectId) return;
+    setProjectId(Number(projectId));
+    if (params.get('taskId')) setTaskId(Number(params.get('taskId')));
+
+    api.get(`/projects/${projectId}`, { params: { fields: 'theme', include: 'scaffold' } })
+      .then((res) => {
+        const flow = res.data.scaffold_data?.discussion_flow ?? [];
+        if (flow.length > 0) {
+          setQuestions(flow.map((q: { question_text: string }) => q.question_text));
+        }
+      })
+      .catch((error) => console.error('トーク骨子の取得に失敗しました:', error));
+  }, []);
+
+  // 💡 オフライン中に積まれたイベントは、起動時・オンライン復帰時・一定間隔で再送する
+  useEffect(() => {
+    if (projectId === null) return;
+    const flush = () => { flushTimerEvents(projectId); };
+
+    flush();
+    window.addEventListener('online', flush);
+    const timer = setInterval(flush, FLUSH_RETRY_INTERVAL_MS);
+    return () => {
+      window.removeEventListener('online', flush);
+      clearInterval(timer);
+    };
+  }, [projectId]);
+
+  // 質問（セクション）ごとの計測。lap は現在の区間を閉じて次の区間を開始する
+  const recordTimerEvent = (eventType: TimerEventType, sectionIndex?: number) => {
+    if (projectId === null) return;
+    enqueueTimerEvent(projectId, taskId, eventType, sectionIndex);
+    flushTimerEvents(projectId);
+  };
 
   const handleNext = () => {
-    if (currentIndex < questions.length - 1) {
-      // 💡 ここでバックエンドの stop_timer/start_timer を呼ぶ予定
+    if (!recording) {
+      recordTimerEvent('start', currentIndex);
+      setRecording(true);
+    } else if (currentIndex < questions.length - 1) {
+      recordTimerEvent('lap', currentIndex + 1);
       setCurrentIndex(currentIndex + 1);
     } else {
+      recordTimerEvent('stop');
+      setRecording(false);
       alert("すべての収録が完了しました！");
     }
   };
@@ -53,7 +107,7 @@ export default function StudioPage() {
             onClick={handleNext}
             className="w-full bg-slate-900 text-white py-8 rounded-3xl font-black text-2xl hover:bg-emerald-600 transition-all transform hover:-translate-y-1 active:scale-95 shadow-2xl shadow-slate-200"
           >
-            {currentIndex === questions.length - 1 ? '収録完了' : '回答完了、次の質問へ'}
+            {!recording ? '収録開始' : currentIndex === questions.length - 1 ? '収録完了' : '回答完了、次の質問へ'}
           </button>
         </div>
       </div>
@@ -0,0 +1,80 @@
+import api from './api';
+
+// オフラインでも計測を続けられるよう、タイマー操作をローカルにキューイングして
+// まとめて /projects/{id}/timer_events に送信する。
+// event_id により冪等なので、送信結果が不明な場合はそのまま再送してよい。
+// サーバーはイベントをワーカーのメモリ上のバッファに積むだけのこともあるため、
+// flush=true で送信し、DBへの書き込みが確認できたイベントだけをローカルから削除する。
+
+export type TimerEventType = 'start' | 'stop' | 'lap';
+
+export interface TimerEvent {
+  event_id: string;
+  task_id: number;
+  event_type: TimerEventType;
+  client_ts: string;
+  section_index?: number;
+  memo?: string;
+}
+
+const storageKey = (projectId: number) => `timer-events:${projectId}`;
+
+const load = (projectId: number): TimerEvent[] => {
+  if (typeof window === 'undefined') return [];
+  try {
+    return JSON.parse(window.localStorage.getItem(storageKey(projectId)) || '[]');
+  } catch {
+    return [];
+  }
+};
+
+const save = (projectId: number, events: TimerEvent[]) => {
+  window.localStorage.setItem(storageKey(projectId), JSON.stringify(events));
+};
+
+export const enqueueTimerEvent = (
+  projectId: number,
+  taskId: number,
+  eventType: TimerEventType,
+  sectionIndex?: number,
+) => {
+  const events = load(projectId);
+  events.push({
+    event_id: crypto.randomUUID(),
+    task_id: taskId,
+    event_type: eventType,
+    client_ts: new Date().toISOString(),
+    section_index: sectionIndex,
+  });
+  save(projectId, events);
+};
+
+interface TimerEventAck {
+  accepted: number;
+  duplicates: number;
+  pending: number;
+  pending_event_ids: string[];
+}
+
+export const flushTimerEvents = async (projectId: number): Promise<boolean> => {
+  const events = load(projectId);
+  if (events.length === 0) return true;
+
+  try {
+    const res = await api.post<TimerEventAck>(
+      `/projects/${projectId}/timer_events`,
+      { events },
+      { params: { flush: true } },
+    );
+    // 書き込み済みのイベントだけを削除する（送信中に積まれたイベント・バッファに残ったイベントは次回再送）
+    const pendingIds = new Set(res.data.pending_event_ids);
+    const persistedIds = new Set(
+      events.map((e) => e.event_id).filter((id) => !pendingIds.has(id)),
+    );
+    save(projectId, load(projectId).filter((e) => !persistedIds.has(e.event_id)));
+    return pendingIds.size === 0;
+  } catch (error) {
+    console.warn('タイマーイベントの送信に失敗しました。次回再送します。', error);
+    return false;
+  }
+};
@@ -0,0 +1,38 @@
+# gunicorn.conf.py
+#
+# 本番用の起動設定（マルチワーカー）。
+#
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# DB初期化はマスタープロセスでワーカーをフォークする前に1回だけ実行する。
+# 初期化が終わるまでワーカーは起動しないため、各ワーカーはDB初期化を行わずにリクエストを受け付けられる。
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+# 💡 ワーカー数は WEB_CONCURRENCY で上書きできる（未指定時は CPU数 x 2 + 1）
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120")) # AI生成のリクエストを考慮して長めに取る
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+errorlog = "-"
+
+# ワーカーで読み込み時の初期化をしないようにする（app.main が import される前に設定する）
+os.environ.setdefault("INIT_DB_ON_STARTUP", "false")
+
+def on_starting(server):
+    """マスタープロセスの起動時に1回だけDBを初期化する（失敗した場合はワーカーを起動しない）"""
+    from app.database import engine, init_db
+
+    init_db()
+    # フォーク前にマスターの接続を破棄し、ワーカー間でソケットを共有しないようにする
+    engine.dispose()
+
+def post_fork(server, worker):
+    """親プロセスから引き継いだ接続プールを使わず、ワーカーごとに新しく接続する"""
+    from app.database import engine
+
+    engine.dispose(close=False)
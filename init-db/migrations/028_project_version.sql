@@ -0,0 +1,5 @@
+-- init-db/migrations/028_project_version.sql
+-- 既存DB向け: t_project に書き込みバージョン列を追加する
+-- （新規DBは schema.sql に含まれているため不要）
+
+ALTER TABLE t_project ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
@@ -0,0 +1,6 @@
+-- init-db/migrations/031_dashboard_indexes.sql
+-- 既存DB向け: ダッシュボード集計・タイマー操作で使う外部キー列と計測中ログのインデックス
+
+CREATE INDEX IF NOT EXISTS ix_project_task_project ON t_project_task (project_id);
+CREATE INDEX IF NOT EXISTS ix_timer_log_task ON t_timer_log (project_task_id);
+CREATE INDEX IF NOT EXISTS ix_timer_log_open ON t_timer_log (project_task_id) WHERE end_time IS NULL;
@@ -0,0 +1,5 @@
+-- init-db/migrations/041_project_source_key.sql
+-- 既存DB向け: 一括インポート (python -m app.cli import) で元データのプロジェクトを識別する列と UPSERT 用の一意インデックス
+
+ALTER TABLE t_project ADD COLUMN IF NOT EXISTS source_key VARCHAR(255);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_project_source_key ON t_project (source_key);
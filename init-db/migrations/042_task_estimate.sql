@@ -0,0 +1,15 @@
+-- init-db/migrations/042_task_estimate.sql
+-- 既存DB向け: タスクテンプレートごとの実績時間の統計（見積もりエンジン）
+-- 作成後に `python -m app.cli rebuild-estimates` で過去の実績から初期値を計算する
+
+CREATE TABLE IF NOT EXISTS t_task_estimate (
+    task_template_id INT PRIMARY KEY REFERENCES m_task_template(task_template_id) ON DELETE CASCADE,
+    sample_count INT NOT NULL DEFAULT 0,
+    median_min FLOAT8,
+    p80_min FLOAT8,
+    mean_min FLOAT8,
+    trend_min_per_task FLOAT8,
+    sample_task_ids BIGINT[] NOT NULL DEFAULT '{}',
+    sample_values FLOAT8[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,22 @@
+-- init-db/migrations/044_time_rollups.sql
+-- 既存DB向け: 分析用の計測時間ロールアップ（日別 × タスクテンプレート、プロジェクト別の見積/実績）
+-- 作成後に `python -m app.cli rollups backfill` で過去のタイマーログから初期値を計算する
+
+CREATE TABLE IF NOT EXISTS t_time_rollup_daily (
+    day DATE NOT NULL,
+    task_template_id INT NOT NULL REFERENCES m_task_template(task_template_id) ON DELETE CASCADE,
+    minutes FLOAT8 NOT NULL DEFAULT 0,
+    log_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, task_template_id)
+);
+
+CREATE TABLE IF NOT EXISTS t_time_rollup_project (
+    project_id BIGINT PRIMARY KEY REFERENCES t_project(project_id) ON DELETE CASCADE,
+    est_total_min INT NOT NULL DEFAULT 0,
+    actual_total_min FLOAT8 NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 期間を指定したバックフィル・整合性チェックと、作成日での絞り込み用
+CREATE INDEX IF NOT EXISTS ix_timer_log_start ON t_timer_log (start_time);
+CREATE INDEX IF NOT EXISTS ix_project_created ON t_project (created_at);
@@ -0,0 +1,38 @@
+-- init-db/migrations/045_timer_log_partitions.sql
+-- 既存DB向け: t_timer_log を start_time の月ごとのレンジパーティションに変換する
+-- ここでは全行を default パーティションに移すだけで、月ごとのパーティションへの振り分けは
+-- 続けて実行される init_db（python -m app.cli partitions ensure と同じ処理）が行う
+-- 新規DB（schema.sql で作成）や、既にパーティション化されている場合は何もしない
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 't_timer_log'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE t_timer_log RENAME TO t_timer_log_unpartitioned;
+    ALTER SEQUENCE t_timer_log_log_id_seq OWNED BY NONE;
+
+    CREATE TABLE t_timer_log (
+        log_id BIGINT NOT NULL DEFAULT nextval('t_timer_log_log_id_seq'),
+        project_task_id BIGINT NOT NULL REFERENCES t_project_task(project_task_id),
+        start_time TIMESTAMP NOT NULL,
+        end_time TIMESTAMP,
+        section_index INT,
+        duration_min FLOAT8,
+        memo TEXT
+    ) PARTITION BY RANGE (start_time);
+    ALTER SEQUENCE t_timer_log_log_id_seq OWNED BY t_timer_log.log_id;
+    CREATE TABLE t_timer_log_default PARTITION OF t_timer_log DEFAULT;
+
+    INSERT INTO t_timer_log (log_id, project_task_id, start_time, end_time, section_index, duration_min, memo)
+    SELECT log_id, project_task_id, start_time, end_time, section_index, duration_min, memo
+    FROM t_timer_log_unpartitioned;
+    DROP TABLE t_timer_log_unpartitioned;
+
+    -- 旧テーブルのインデックス名と衝突しないよう、削除後に作成する
+    ALTER TABLE t_timer_log ADD PRIMARY KEY (log_id, start_time);
+    CREATE INDEX ix_timer_log_task ON t_timer_log (project_task_id);
+    CREATE INDEX ix_timer_log_open ON t_timer_log (project_task_id) WHERE end_time IS NULL;
+    CREATE INDEX ix_timer_log_start ON t_timer_log (start_time);
+END $$;
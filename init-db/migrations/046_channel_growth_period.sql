@@ -0,0 +1,12 @@
+-- init-db/migrations/046_channel_growth_period.sql
+-- 既存DB向け: チャンネル成長指標の期間 (start_date, end_date) の一意インデックス
+-- 取り込み（UPSERT）の衝突判定と、時系列APIの期間での絞り込みに使う
+
+-- 同じ期間の行が既にあれば、最後に記録した行だけを残す
+DELETE FROM t_channel_growth g
+USING t_channel_growth newer
+WHERE newer.start_date = g.start_date
+  AND newer.end_date = g.end_date
+  AND (newer.recorded_at, newer.record_id) > (g.recorded_at, g.record_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_channel_growth_period ON t_channel_growth (start_date, end_date);
@@ -0,0 +1,5 @@
+-- init-db/migrations/047_shorts_indexes.sql
+-- 既存DB向け: Shorts の一覧・状態での絞り込み用インデックス（keyset ページングのため shorts_id まで含める）
+
+CREATE INDEX IF NOT EXISTS ix_shorts_project_status ON t_shorts_management (vod_project_id, status, shorts_id);
+CREATE INDEX IF NOT EXISTS ix_shorts_status ON t_shorts_management (status, shorts_id);
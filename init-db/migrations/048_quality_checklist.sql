@@ -0,0 +1,13 @@
+-- init-db/migrations/048_quality_checklist.sql
+-- 既存DB向け: 品質チェックの結果の一意インデックスと、遷移ルールの品質チェック条件
+
+-- 同じプロジェクト・チェック項目の結果が既にあれば、最後に記録した行だけを残す
+DELETE FROM t_quality_check_result r
+USING t_quality_check_result newer
+WHERE newer.project_id = r.project_id
+  AND newer.check_id = r.check_id
+  AND newer.result_id > r.result_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_quality_check_result ON t_quality_check_result (project_id, check_id);
+
+ALTER TABLE m_transition_rule ADD COLUMN IF NOT EXISTS require_quality_checks BOOLEAN NOT NULL DEFAULT FALSE;
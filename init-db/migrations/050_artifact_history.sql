@@ -0,0 +1,17 @@
+-- init-db/migrations/050_artifact_history.sql
+-- 既存DB向け: 骨子・サムネイル・サマリーの版の履歴
+-- 既存の成果物は、次に書き込まれたときに書き込み前の内容が版1（baseline）として保存される
+
+CREATE TABLE IF NOT EXISTS t_artifact_history (
+    history_id BIGSERIAL PRIMARY KEY,
+    project_id BIGINT NOT NULL REFERENCES t_project(project_id) ON DELETE CASCADE,
+    artifact VARCHAR(20) NOT NULL, -- (scaffold, thumbnail, summary)
+    revision INT NOT NULL, -- プロジェクト × 成果物ごとに1から振る版番号
+    is_snapshot BOOLEAN NOT NULL, -- TRUE: 全体、FALSE: 直前の版からの JSON Patch
+    payload BYTEA NOT NULL, -- zlib で圧縮した JSON
+    size_bytes INT NOT NULL, -- この版の全体の JSON のサイズ（圧縮前）
+    source VARCHAR(30) NOT NULL, -- (baseline, generate, patch, regenerate_question, revert)
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_artifact_history_revision ON t_artifact_history (project_id, artifact, revision);
@@ -0,0 +1,71 @@
+-- init-db/migrations/051_quality_gate_seed.sql
+-- 既存DB向け: 品質チェックリストの初期項目と、品質チェックで公開待ちに進む遷移ルール（048 ではテーブルだけが追加されていた）
+-- 何度実行しても同じ結果になるよう、自然キーで重複を判定する
+
+-- シードの再実行で重複したチェック項目（同じ対象タスク・項目名）をまとめる。結果は最も小さい check_id の項目に付け替える
+-- 付け替え先ごとに結果を1行だけ残してから付け替える（同じ項目の重複をすべてチェックしたプロジェクトは複数行になるため）。
+-- 残すのは付け替え先自身の結果、なければ最後にチェックした結果
+WITH dup AS (
+    SELECT check_id, MIN(check_id) OVER (PARTITION BY target_task_id, check_item) AS keep_id
+    FROM m_quality_checklist
+),
+ranked AS (
+    SELECT r.result_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY r.project_id, dup.keep_id
+               ORDER BY (r.check_id = dup.keep_id) DESC, r.checked_at DESC NULLS LAST, r.result_id DESC
+           ) AS rn
+    FROM t_quality_check_result r
+    JOIN dup ON dup.check_id = r.check_id
+)
+DELETE FROM t_quality_check_result r
+USING ranked
+WHERE r.result_id = ranked.result_id AND ranked.rn > 1;
+
+WITH dup AS (
+    SELECT check_id, MIN(check_id) OVER (PARTITION BY target_task_id, check_item) AS keep_id
+    FROM m_quality_checklist
+)
+UPDATE t_quality_check_result r
+SET check_id = dup.keep_id
+FROM dup
+WHERE r.check_id = dup.check_id AND dup.check_id <> dup.keep_id;
+
+DELETE FROM m_quality_checklist c
+USING m_quality_checklist keep
+WHERE keep.target_task_id IS NOT DISTINCT FROM c.target_task_id
+  AND keep.check_item = c.check_item
+  AND keep.check_id < c.check_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_quality_checklist_item ON m_quality_checklist (target_task_id, check_item) NULLS NOT DISTINCT;
+
+INSERT INTO m_quality_checklist (check_item, target_task_id, is_required) VALUES
+('冒頭30秒で動画のテーマが伝わる', NULL, TRUE),
+('音量が揃っていて、ノイズや無音の間がない', 5, TRUE),
+('テロップ・字幕に誤字脱字がない', 6, TRUE),
+('BGM・効果音の利用規約とクレジット表記を確認した', 7, TRUE),
+('サムネイルの文字がスマートフォンの画面でも読める', 8, TRUE),
+('タイトル・概要欄に検索されるキーワードが入っている', 9, FALSE)
+ON CONFLICT (target_task_id, check_item) DO NOTHING;
+
+-- 048 のシードの公開待ちルールは、初期タスク（INITIAL_TASK_IDS）に含まれない「品質チェックリストの実行」(10) の完了も条件にしていたため、
+-- 品質チェックだけを条件にする
+UPDATE m_transition_rule
+SET required_task_ids = ARRAY[]::INT[]
+WHERE current_status_id = 4 AND next_status_id = 5 AND required_task_ids = ARRAY[10] AND require_quality_checks;
+
+-- 収録・準備中 (2) → 編集作業中 (3) → 最終チェック (4) → 公開待ち (5) のルール（同じ遷移のルールが既にあれば追加しない）
+INSERT INTO m_transition_rule (rule_id, current_status_id, next_status_id, required_task_ids, require_quality_checks)
+SELECT (SELECT COALESCE(MAX(rule_id), 0) + 1 FROM m_transition_rule), 4, 5, ARRAY[]::INT[], TRUE
+WHERE NOT EXISTS (SELECT 1 FROM m_transition_rule WHERE current_status_id = 4 AND next_status_id = 5);
+
+INSERT INTO m_transition_rule (rule_id, current_status_id, next_status_id, required_task_ids, require_quality_checks)
+SELECT (SELECT COALESCE(MAX(rule_id), 0) + 1 FROM m_transition_rule), 2, 3, ARRAY[4], FALSE
+WHERE NOT EXISTS (SELECT 1 FROM m_transition_rule WHERE current_status_id = 2 AND next_status_id = 3);
+
+INSERT INTO m_transition_rule (rule_id, current_status_id, next_status_id, required_task_ids, require_quality_checks)
+SELECT (SELECT COALESCE(MAX(rule_id), 0) + 1 FROM m_transition_rule), 3, 4, ARRAY[5], FALSE
+WHERE NOT EXISTS (SELECT 1 FROM m_transition_rule WHERE current_status_id = 3 AND next_status_id = 4);
+
+-- シードは rule_id を明示して投入しているため、SERIAL の採番を追いつかせる
+SELECT setval(pg_get_serial_sequence('m_transition_rule', 'rule_id'), (SELECT MAX(rule_id) FROM m_transition_rule));
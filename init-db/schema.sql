@@ -22,7 +22,8 @@ CREATE TABLE m_transition_rule (
     current_status_id INT NOT NULL REFERENCES m_status(status_id),
     next_status_id INT NOT NULL REFERENCES m_status(status_id),
     required_task_ids INT[] NOT NULL,  -- 遷移に必要な完了済みサブタスクIDの配列
-    is_active BOOLEAN NOT NULL DEFAULT TRUE
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    require_quality_checks BOOLEAN NOT NULL DEFAULT FALSE -- 必須の品質チェックがすべて済んでいることも遷移の条件にする
 );
 
 -- 4. パーソナルアングル選択マスタ (m_personal_angle)
@@ -41,6 +42,8 @@ CREATE TABLE m_quality_checklist (
     is_required BOOLEAN NOT NULL DEFAULT TRUE,
     is_active BOOLEAN NOT NULL DEFAULT TRUE
 );
+-- シードを何度実行しても重複しないための自然キー（対象タスク・項目名）
+CREATE UNIQUE INDEX ux_quality_checklist_item ON m_quality_checklist (target_task_id, check_item) NULLS NOT DISTINCT;
 
 -- 6. プロジェクト実績テーブル (t_project)
 CREATE TABLE t_project (
@@ -56,7 +59,9 @@ CREATE TABLE t_project (
     final_description TEXT,
     summary_data JSONB, -- 動画要約データ
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    published_at TIMESTAMP
+    published_at TIMESTAMP,
+    version INT NOT NULL DEFAULT 1, -- 書き込みごとに加算されるバージョン（ETag・キャッシュ用）
+    source_key VARCHAR(255) -- 一括インポート元での識別子（アプリで作成したものは NULL）
 );
 
 -- 7. サブタスク実績テーブル (t_project_task)
@@ -71,15 +76,29 @@ CREATE TABLE t_project_task (
 );
 
 -- 8. 時間計測ログテーブル (t_timer_log)
+-- start_time の月ごとのレンジパーティション。月ごとのパーティション (t_timer_log_pYYYYMM) は
+-- init_db / python -m app.cli partitions ensure で作成し、どの月にも当たらない行は default に入る
 CREATE TABLE t_timer_log (
-    log_id BIGSERIAL PRIMARY KEY,
+    log_id BIGSERIAL,
     project_task_id BIGINT NOT NULL REFERENCES t_project_task(project_task_id),
     start_time TIMESTAMP NOT NULL,
     end_time TIMESTAMP,
     section_index INT,
     duration_min float, -- 分単位で記録
-    memo TEXT
-);
+    memo TEXT,
+    PRIMARY KEY (log_id, start_time) -- パーティションキーを含める必要がある
+) PARTITION BY RANGE (start_time);
+CREATE TABLE t_timer_log_default PARTITION OF t_timer_log DEFAULT;
+
+-- 外部キー列と、計測中（end_time が NULL）のログだけを対象にした部分インデックス
+CREATE INDEX ix_project_task_project ON t_project_task (project_id);
+CREATE INDEX ix_timer_log_task ON t_timer_log (project_task_id);
+CREATE INDEX ix_timer_log_open ON t_timer_log (project_task_id) WHERE end_time IS NULL;
+-- 期間指定の集計（ロールアップのバックフィル・整合性チェック）と作成日での絞り込み
+CREATE INDEX ix_timer_log_start ON t_timer_log (start_time);
+CREATE INDEX ix_project_created ON t_project (created_at);
+-- 一括インポートの UPSERT キー
+CREATE UNIQUE INDEX ux_project_source_key ON t_project (source_key);
 
 -- 9. VOD → Shorts ファネル管理テーブル (t_shorts_management)
 CREATE TABLE t_shorts_management (
@@ -91,6 +110,9 @@ CREATE TABLE t_shorts_management (
     is_high_hook BOOLEAN NOT NULL DEFAULT FALSE,
     published_at TIMESTAMP
 );
+-- VOD ごと・状態ごとの一覧用（keyset ページングのため shorts_id まで含める）
+CREATE INDEX ix_shorts_project_status ON t_shorts_management (vod_project_id, status, shorts_id);
+CREATE INDEX ix_shorts_status ON t_shorts_management (status, shorts_id);
 
 -- 10. チャンネル成長トラッカーテーブル (t_channel_growth)
 CREATE TABLE t_channel_growth (
@@ -105,6 +127,8 @@ CREATE TABLE t_channel_growth (
     improvements_made TEXT,
     recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
+-- 期間ごとの取り込み（UPSERT）と期間での絞り込み用
+CREATE UNIQUE INDEX ux_channel_growth_period ON t_channel_growth (start_date, end_date);
 
 -- 11. 品質チェックリスト実績テーブル (t_quality_check_result)
 CREATE TABLE t_quality_check_result (
@@ -114,4 +138,77 @@ CREATE TABLE t_quality_check_result (
     is_checked BOOLEAN NOT NULL,
     checked_at TIMESTAMP,
     memo TEXT
-);
\ No newline at end of file
+);
+-- チェックリスト単位の一括保存（ON CONFLICT）とプロジェクトごとの取得用
+CREATE UNIQUE INDEX ux_quality_check_result ON t_quality_check_result (project_id, check_id);
+
+-- 12. タイマーイベント受信テーブル (t_timer_event)
+-- オフライン送信されたタイマーイベントの冪等性を確保するための受信記録
+CREATE TABLE t_timer_event (
+    event_id VARCHAR(64) PRIMARY KEY, -- クライアント生成の冪等ID
+    project_task_id BIGINT NOT NULL REFERENCES t_project_task(project_task_id),
+    event_type VARCHAR(10) NOT NULL, -- (start, stop, lap)
+    client_ts TIMESTAMP NOT NULL, -- クライアント側の発生時刻
+    received_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 13. 冪等キーテーブル (t_idempotency_key)
+-- プロジェクト作成・AI生成のPOSTが再送されたときに、保存済みのレスポンスを返すための記録
+CREATE TABLE t_idempotency_key (
+    idempotency_key VARCHAR(255) PRIMARY KEY, -- Idempotency-Key ヘッダーの値
+    request_fingerprint VARCHAR(64) NOT NULL, -- メソッド・パス・ボディのハッシュ
+    status VARCHAR(20) NOT NULL, -- (processing, completed)
+    response_status INT,
+    response_body JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+CREATE INDEX ix_idempotency_key_expires ON t_idempotency_key (expires_at);
+
+-- 14. タスク見積もりテーブル (t_task_estimate)
+-- タスクテンプレートごとの実績時間の統計。完了・タイマー停止のたびに直近の実績から更新し、新規プロジェクトの見積もりに使う
+CREATE TABLE t_task_estimate (
+    task_template_id INT PRIMARY KEY REFERENCES m_task_template(task_template_id) ON DELETE CASCADE,
+    sample_count INT NOT NULL DEFAULT 0, -- 統計に使った実績の件数（直近 ESTIMATE_WINDOW 件まで）
+    median_min FLOAT8,
+    p80_min FLOAT8,
+    mean_min FLOAT8,
+    trend_min_per_task FLOAT8, -- 完了1件ごとの実績時間の変化（Theil-Sen 推定の傾き）
+    sample_task_ids BIGINT[] NOT NULL DEFAULT '{}', -- 完了順の project_task_id
+    sample_values FLOAT8[] NOT NULL DEFAULT '{}', -- 対応する actual_time_min
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 15. 日別計測時間ロールアップ (t_time_rollup_daily)
+-- 日付（ログの開始日）× タスクテンプレートごとの計測時間。タイマー停止のたびに加算する（カテゴリは m_task_template から引く）
+CREATE TABLE t_time_rollup_daily (
+    day DATE NOT NULL,
+    task_template_id INT NOT NULL REFERENCES m_task_template(task_template_id) ON DELETE CASCADE,
+    minutes FLOAT8 NOT NULL DEFAULT 0,
+    log_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, task_template_id)
+);
+
+-- 16. プロジェクト別計測時間ロールアップ (t_time_rollup_project)
+-- プロジェクトごとの見積/実績時間の合計。作成時に見積を登録し、タイマー停止のたびに実績を加算する
+CREATE TABLE t_time_rollup_project (
+    project_id BIGINT PRIMARY KEY REFERENCES t_project(project_id) ON DELETE CASCADE,
+    est_total_min INT NOT NULL DEFAULT 0,
+    actual_total_min FLOAT8 NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 17. 成果物の版の履歴 (t_artifact_history)
+-- 骨子・サムネイル・サマリーの書き込みごとの版。直前の版との差分を圧縮して保存し、ARTIFACT_SNAPSHOT_INTERVAL 版ごとに全体を保存する
+CREATE TABLE t_artifact_history (
+    history_id BIGSERIAL PRIMARY KEY,
+    project_id BIGINT NOT NULL REFERENCES t_project(project_id) ON DELETE CASCADE,
+    artifact VARCHAR(20) NOT NULL, -- (scaffold, thumbnail, summary)
+    revision INT NOT NULL, -- プロジェクト × 成果物ごとに1から振る版番号
+    is_snapshot BOOLEAN NOT NULL, -- TRUE: 全体、FALSE: 直前の版からの JSON Patch
+    payload BYTEA NOT NULL, -- zlib で圧縮した JSON
+    size_bytes INT NOT NULL, -- この版の全体の JSON のサイズ（圧縮前）
+    source VARCHAR(30) NOT NULL, -- (baseline, generate, patch, regenerate_question, revert)
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX ux_artifact_history_revision ON t_artifact_history (project_id, artifact, revision);
\ No newline at end of file
@@ -33,4 +33,22 @@ ON CONFLICT (task_template_id) DO NOTHING;
 -- m_transition_rule: 企画中 (1) から 収録・準備中 (2) への遷移ルール
 INSERT INTO m_transition_rule (rule_id, current_status_id, next_status_id, required_task_ids) VALUES
 (1, 1, 2, ARRAY[2, 3])
-ON CONFLICT (rule_id) DO NOTHING;
\ No newline at end of file
+ON CONFLICT (rule_id) DO NOTHING;
+
+-- m_transition_rule: 収録作業 (4) が済んだら 編集作業中 (3)、カット編集 (5) が済んだら 最終チェック (4)、
+-- 最終チェック (4) から 公開待ち (5) へは必須の品質チェックがすべて済んでいること（初期タスクだけのプロジェクトでも進めるよう、タスクは条件にしない）
+INSERT INTO m_transition_rule (rule_id, current_status_id, next_status_id, required_task_ids, require_quality_checks) VALUES
+(2, 4, 5, ARRAY[]::INT[], TRUE),
+(3, 2, 3, ARRAY[4], FALSE),
+(4, 3, 4, ARRAY[5], FALSE)
+ON CONFLICT (rule_id) DO NOTHING;
+
+-- m_quality_checklist: 品質チェックリストの初期データ（target_task_id のタスクを含むプロジェクトに適用。NULL は全プロジェクト）
+INSERT INTO m_quality_checklist (check_item, target_task_id, is_required) VALUES
+('冒頭30秒で動画のテーマが伝わる', NULL, TRUE),
+('音量が揃っていて、ノイズや無音の間がない', 5, TRUE),
+('テロップ・字幕に誤字脱字がない', 6, TRUE),
+('BGM・効果音の利用規約とクレジット表記を確認した', 7, TRUE),
+('サムネイルの文字がスマートフォンの画面でも読める', 8, TRUE),
+('タイトル・概要欄に検索されるキーワードが入っている', 9, FALSE)
+ON CONFLICT (target_task_id, check_item) DO NOTHING;
\ No newline at end of file